@@ -0,0 +1,85 @@
+"""Normalized tags: tags / article_tags tables with materialized published counts
+
+Revision ID: a3b4c5d6e7f8
+Revises: f2a3b4c5d6e7
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'a3b4c5d6e7f8'
+down_revision = 'f2a3b4c5d6e7'
+branch_labels = None
+depends_on = None
+
+
+def _existing_tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _existing_indexes(table: str):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+# Backfill from the JSONB tag lists; idempotent, so safe on a database whose
+# tables were already created by Base.metadata.create_all().
+BACKFILL = (
+    """
+    INSERT INTO tags (name)
+    SELECT DISTINCT jsonb_array_elements_text(tags) FROM articles
+    WHERE jsonb_typeof(tags) = 'array'
+    ON CONFLICT (name) DO NOTHING
+    """,
+    """
+    INSERT INTO article_tags (article_id, tag_id)
+    SELECT DISTINCT a.id, t.id
+    FROM articles a
+    CROSS JOIN LATERAL jsonb_array_elements_text(a.tags) AS e(name)
+    JOIN tags t ON t.name = e.name
+    WHERE jsonb_typeof(a.tags) = 'array'
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    UPDATE tags SET published_count = COALESCE((
+        SELECT count(*) FROM article_tags at
+        JOIN articles a ON a.id = at.article_id
+        WHERE at.tag_id = tags.id AND a.status = 'PUBLISHED' AND NOT a.is_unlisted
+    ), 0)
+    """,
+)
+
+
+def upgrade() -> None:
+    tables = _existing_tables()
+    if 'tags' not in tables:
+        op.create_table(
+            'tags',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(), nullable=False, unique=True),
+            sa.Column('published_count', sa.Integer(), nullable=False, server_default='0'),
+        )
+        op.create_index('ix_tags_id', 'tags', ['id'])
+    if 'ix_tags_published_count_name' not in _existing_indexes('tags'):
+        op.create_index(
+            'ix_tags_published_count_name', 'tags', [sa.text('published_count DESC'), 'name']
+        )
+    if 'article_tags' not in tables:
+        op.create_table(
+            'article_tags',
+            sa.Column('article_id', sa.Integer(), sa.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('tag_id', sa.Integer(), sa.ForeignKey('tags.id', ondelete='CASCADE'), primary_key=True),
+        )
+    if 'ix_article_tags_tag_article' not in _existing_indexes('article_tags'):
+        op.create_index('ix_article_tags_tag_article', 'article_tags', ['tag_id', 'article_id'])
+
+    for statement in BACKFILL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    tables = _existing_tables()
+    if 'article_tags' in tables:
+        op.drop_table('article_tags')
+    if 'tags' in tables:
+        op.drop_table('tags')
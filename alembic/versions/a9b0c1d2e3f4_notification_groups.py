@@ -0,0 +1,43 @@
+"""Coalesced notifications: group_key and an index over open groups
+
+Revision ID: a9b0c1d2e3f4
+Revises: f8a9b0c1d2e3
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'a9b0c1d2e3f4'
+down_revision = 'f8a9b0c1d2e3'
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _existing_columns(table: str):
+    return {col["name"] for col in _inspector().get_columns(table)}
+
+
+def _existing_indexes(table: str):
+    return {ix["name"] for ix in _inspector().get_indexes(table)}
+
+
+def upgrade() -> None:
+    if 'group_key' not in _existing_columns('notifications'):
+        op.add_column('notifications', sa.Column('group_key', sa.String(length=100), nullable=True))
+    if 'ix_notifications_user_group_open' not in _existing_indexes('notifications'):
+        op.create_index(
+            'ix_notifications_user_group_open', 'notifications', ['user_id', 'group_key'],
+            postgresql_where=sa.text("group_key IS NOT NULL AND NOT is_read"),
+        )
+
+
+def downgrade() -> None:
+    if 'ix_notifications_user_group_open' in _existing_indexes('notifications'):
+        op.drop_index('ix_notifications_user_group_open', table_name='notifications')
+    if 'group_key' in _existing_columns('notifications'):
+        op.drop_column('notifications', 'group_key')
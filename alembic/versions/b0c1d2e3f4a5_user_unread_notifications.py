@@ -0,0 +1,42 @@
+"""Maintained unread-notification count on users
+
+Revision ID: b0c1d2e3f4a5
+Revises: a9b0c1d2e3f4
+Create Date: 2026-10-18 19:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'b0c1d2e3f4a5'
+down_revision = 'a9b0c1d2e3f4'
+branch_labels = None
+depends_on = None
+
+
+def _existing_columns(table: str):
+    return {col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    if 'unread_notifications' not in _existing_columns('users'):
+        op.add_column('users', sa.Column('unread_notifications', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        """
+        UPDATE users u
+        SET unread_notifications = n.unread
+        FROM (
+            SELECT user_id, count(*) AS unread
+            FROM notifications
+            WHERE NOT is_read
+            GROUP BY user_id
+        ) n
+        WHERE n.user_id = u.id AND u.unread_notifications IS DISTINCT FROM n.unread
+        """
+    )
+
+
+def downgrade() -> None:
+    if 'unread_notifications' in _existing_columns('users'):
+        op.drop_column('users', 'unread_notifications')
@@ -0,0 +1,58 @@
+"""Related articles: precomputed top-K neighbours per article
+
+Revision ID: b4c5d6e7f8a9
+Revises: a3b4c5d6e7f8
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'b4c5d6e7f8a9'
+down_revision = 'a3b4c5d6e7f8'
+branch_labels = None
+depends_on = None
+
+LISTED = sa.text("status = 'PUBLISHED' AND NOT is_unlisted")
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _existing_indexes(table: str):
+    return {ix["name"] for ix in _inspector().get_indexes(table)}
+
+
+def upgrade() -> None:
+    # Rows are filled in by the related-articles job: its sweep picks up every
+    # story with a NULL related_refreshed_at, so no backfill is needed here.
+    if 'related_refreshed_at' not in {c["name"] for c in _inspector().get_columns('articles')}:
+        op.add_column('articles', sa.Column('related_refreshed_at', sa.DateTime(), nullable=True))
+    if 'ix_articles_related_refresh' not in _existing_indexes('articles'):
+        op.create_index(
+            'ix_articles_related_refresh', 'articles',
+            [sa.text('related_refreshed_at ASC NULLS FIRST')], postgresql_where=LISTED,
+        )
+
+    if 'related_articles' not in _inspector().get_table_names():
+        op.create_table(
+            'related_articles',
+            sa.Column('article_id', sa.Integer(), sa.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('related_id', sa.Integer(), sa.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('score', sa.Float(), nullable=False),
+        )
+    indexes = _existing_indexes('related_articles')
+    if 'ix_related_articles_article_score' not in indexes:
+        op.create_index('ix_related_articles_article_score', 'related_articles', ['article_id', 'score', 'related_id'])
+    if 'ix_related_articles_related_id' not in indexes:
+        op.create_index('ix_related_articles_related_id', 'related_articles', ['related_id'])
+
+
+def downgrade() -> None:
+    if 'related_articles' in _inspector().get_table_names():
+        op.drop_table('related_articles')
+    if 'ix_articles_related_refresh' in _existing_indexes('articles'):
+        op.drop_index('ix_articles_related_refresh', table_name='articles')
+    if 'related_refreshed_at' in {c["name"] for c in _inspector().get_columns('articles')}:
+        op.drop_column('articles', 'related_refreshed_at')
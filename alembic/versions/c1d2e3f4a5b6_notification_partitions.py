@@ -0,0 +1,100 @@
+"""Partition notifications by month and add the unread keyset index
+
+Revision ID: c1d2e3f4a5b6
+Revises: b0c1d2e3f4a5
+Create Date: 2026-10-18 20:00:00.000000
+
+Rebuilds ``notifications`` as a table range-partitioned on ``created_at``
+(primary key ``(id, created_at)``, as partitioning requires), with one
+partition per month from the oldest row through two months ahead plus a
+default partition. Rows are copied across in one statement, so expect this to
+take a while on a large table. The id sequence carries over.
+
+Single-column indexes on ``id``, ``user_id`` and ``is_read`` are not
+recreated: the primary key and the composite indexes cover them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.retention import ensure_partitions, is_partitioned
+
+revision = 'c1d2e3f4a5b6'
+down_revision = 'b0c1d2e3f4a5'
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, user_id, message, type, is_read, extra_data, created_at, group_key"
+
+COLUMN_DDL = """
+    id integer NOT NULL DEFAULT nextval('notifications_id_seq'),
+    user_id integer NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    message varchar NOT NULL,
+    type varchar(20) NOT NULL DEFAULT 'system',
+    is_read boolean,
+    extra_data json,
+    created_at timestamp without time zone NOT NULL,
+    group_key varchar(100)
+"""
+
+
+def _existing_indexes(table: str):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _create_shared_indexes() -> None:
+    indexes = _existing_indexes('notifications')
+    if 'ix_notifications_created_at' not in indexes:
+        op.create_index('ix_notifications_created_at', 'notifications', ['created_at'])
+    if 'ix_notifications_user_created_id' not in indexes:
+        op.create_index('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id'])
+    if 'ix_notifications_user_group_open' not in indexes:
+        op.create_index(
+            'ix_notifications_user_group_open', 'notifications', ['user_id', 'group_key'],
+            postgresql_where=sa.text("group_key IS NOT NULL AND NOT is_read"),
+        )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not is_partitioned(bind):
+        op.execute("ALTER TABLE notifications RENAME TO notifications_unpartitioned")
+        op.execute("ALTER INDEX notifications_pkey RENAME TO notifications_unpartitioned_pkey")
+        op.execute(
+            f"CREATE TABLE notifications ({COLUMN_DDL}, PRIMARY KEY (id, created_at)) "
+            "PARTITION BY RANGE (created_at)"
+        )
+        op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id")
+        oldest = bind.execute(sa.text("SELECT min(created_at) FROM notifications_unpartitioned")).scalar()
+        ensure_partitions(bind, first_month=oldest.date() if oldest else None)
+        op.execute(
+            f"INSERT INTO notifications ({COLUMNS}) SELECT {COLUMNS} FROM notifications_unpartitioned"
+        )
+        op.execute("DROP TABLE notifications_unpartitioned")
+    # Also covers a fresh database, where the initial migration created the
+    # partitioned table straight from the models.
+    ensure_partitions(bind)
+
+    _create_shared_indexes()
+    if 'ix_notifications_user_read_created_id' not in _existing_indexes('notifications'):
+        op.create_index(
+            'ix_notifications_user_read_created_id', 'notifications',
+            ['user_id', 'is_read', 'created_at', 'id'],
+        )
+
+
+def downgrade() -> None:
+    if is_partitioned(op.get_bind()):
+        op.execute("ALTER TABLE notifications RENAME TO notifications_partitioned")
+        op.execute("ALTER INDEX notifications_pkey RENAME TO notifications_partitioned_pkey")
+        op.execute(f"CREATE TABLE notifications ({COLUMN_DDL}, PRIMARY KEY (id))")
+        op.execute("ALTER SEQUENCE notifications_id_seq OWNED BY notifications.id")
+        op.execute(
+            f"INSERT INTO notifications ({COLUMNS}) SELECT {COLUMNS} FROM notifications_partitioned"
+        )
+        op.execute("DROP TABLE notifications_partitioned")
+        op.create_index('ix_notifications_id', 'notifications', ['id'])
+        op.create_index('ix_notifications_user_id', 'notifications', ['user_id'])
+        op.create_index('ix_notifications_is_read', 'notifications', ['is_read'])
+        _create_shared_indexes()
+    elif 'ix_notifications_user_read_created_id' in _existing_indexes('notifications'):
+        op.drop_index('ix_notifications_user_read_created_id', table_name='notifications')
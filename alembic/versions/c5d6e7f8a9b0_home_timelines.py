@@ -0,0 +1,81 @@
+"""Home timelines: fan-out-on-write timeline entries and users.followers_count
+
+Revision ID: c5d6e7f8a9b0
+Revises: b4c5d6e7f8a9
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'c5d6e7f8a9b0'
+down_revision = 'b4c5d6e7f8a9'
+branch_labels = None
+depends_on = None
+
+# Mirrors app.services.timeline: authors at or under the threshold are fanned
+# out, each follow carrying the author's most recent stories.
+FANOUT_MAX_FOLLOWERS = int(os.getenv("TIMELINE_FANOUT_MAX_FOLLOWERS", 5000))
+BACKFILL_PER_AUTHOR = 100
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade() -> None:
+    if 'followers_count' not in {c["name"] for c in _inspector().get_columns('users')}:
+        op.add_column('users', sa.Column('followers_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        """
+        UPDATE users SET followers_count = COALESCE(
+            (SELECT count(*) FROM follows WHERE follows.followed_id = users.id), 0
+        )
+        """
+    )
+
+    if 'timeline_entries' not in _inspector().get_table_names():
+        op.create_table(
+            'timeline_entries',
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('article_id', sa.Integer(), sa.ForeignKey('articles.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('author_id', sa.Integer(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('published_date', sa.DateTime(), nullable=False),
+        )
+    indexes = {ix["name"] for ix in _inspector().get_indexes('timeline_entries')}
+    if 'ix_timeline_user_published_article' not in indexes:
+        op.create_index(
+            'ix_timeline_user_published_article', 'timeline_entries',
+            ['user_id', 'published_date', 'article_id'],
+        )
+    if 'ix_timeline_author_user' not in indexes:
+        op.create_index('ix_timeline_author_user', 'timeline_entries', ['author_id', 'user_id'])
+    if 'ix_timeline_article_id' not in indexes:
+        op.create_index('ix_timeline_article_id', 'timeline_entries', ['article_id'])
+
+    op.execute(
+        sa.text(
+            """
+            INSERT INTO timeline_entries (user_id, article_id, author_id, published_date)
+            SELECT f.follower_id, a.id, a.author_id, a.published_date
+            FROM follows f
+            JOIN users u ON u.id = f.followed_id AND u.followers_count <= :max_followers
+            CROSS JOIN LATERAL (
+                SELECT id, author_id, published_date FROM articles
+                WHERE author_id = f.followed_id AND status = 'PUBLISHED' AND NOT is_unlisted
+                ORDER BY published_date DESC, id DESC
+                LIMIT :per_author
+            ) a
+            ON CONFLICT DO NOTHING
+            """
+        ).bindparams(max_followers=FANOUT_MAX_FOLLOWERS, per_author=BACKFILL_PER_AUTHOR)
+    )
+
+
+def downgrade() -> None:
+    if 'timeline_entries' in _inspector().get_table_names():
+        op.drop_table('timeline_entries')
+    if 'followers_count' in {c["name"] for c in _inspector().get_columns('users')}:
+        op.drop_column('users', 'followers_count')
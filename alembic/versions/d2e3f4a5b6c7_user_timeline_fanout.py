@@ -0,0 +1,40 @@
+"""Per-author fan-out mode for home timelines
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'd2e3f4a5b6c7'
+down_revision = 'c1d2e3f4a5b6'
+branch_labels = None
+depends_on = None
+
+# Mirrors app.services.timeline: authors over the threshold are read at
+# request time; their timelines were never backfilled.
+FANOUT_MAX_FOLLOWERS = int(os.getenv("TIMELINE_FANOUT_MAX_FOLLOWERS", 5000))
+
+
+def _existing_columns(table: str):
+    return {col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    if 'timeline_fanout' not in _existing_columns('users'):
+        op.add_column('users', sa.Column('timeline_fanout', sa.Boolean(), nullable=False, server_default='true'))
+
+    op.execute(
+        sa.text(
+            "UPDATE users SET timeline_fanout = false WHERE followers_count > :max_followers"
+        ).bindparams(max_followers=FANOUT_MAX_FOLLOWERS)
+    )
+
+
+def downgrade() -> None:
+    if 'timeline_fanout' in _existing_columns('users'):
+        op.drop_column('users', 'timeline_fanout')
@@ -0,0 +1,52 @@
+"""List summaries: precomputed plain-text excerpt on articles
+
+Revision ID: d6e7f8a9b0c1
+Revises: c5d6e7f8a9b0
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.text import make_excerpt
+
+revision = 'd6e7f8a9b0c1'
+down_revision = 'c5d6e7f8a9b0'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 500
+
+
+def _existing_columns(table: str):
+    return {col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    if 'excerpt' not in _existing_columns('articles'):
+        op.add_column('articles', sa.Column('excerpt', sa.String(length=300), nullable=True))
+
+    # Backfill with the same function the write paths use, walking ids in
+    # batches so no single statement holds the whole table.
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text(
+                "SELECT id, content FROM articles WHERE id > :last AND excerpt IS NULL "
+                "ORDER BY id LIMIT :batch"
+            ),
+            {"last": last_id, "batch": BACKFILL_BATCH},
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("UPDATE articles SET excerpt = :excerpt WHERE id = :id"),
+            [{"id": row.id, "excerpt": make_excerpt(row.content)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    if 'excerpt' in _existing_columns('articles'):
+        op.drop_column('articles', 'excerpt')
@@ -0,0 +1,54 @@
+"""Full-text search: weighted tsvector generated column on articles with a GIN index
+
+Revision ID: d9e4f5a6b7c8
+Revises: c8d2e3f4a5b6
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+revision = 'd9e4f5a6b7c8'
+down_revision = 'c8d2e3f4a5b6'
+branch_labels = None
+depends_on = None
+
+# Frozen copy of app.models.article.SEARCH_DOCUMENT at the time of this revision.
+SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(subtitle, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'C')"
+)
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _existing_columns(table: str):
+    return {col["name"] for col in _inspector().get_columns(table)}
+
+
+def _existing_indexes(table: str):
+    return {ix["name"] for ix in _inspector().get_indexes(table)}
+
+
+def upgrade() -> None:
+    if 'search_vector' not in _existing_columns('articles'):
+        # Stored generated column: Postgres backfills every row and keeps it in
+        # sync on insert/update, so no application code maintains it.
+        op.add_column('articles', sa.Column(
+            'search_vector', TSVECTOR(), sa.Computed(SEARCH_DOCUMENT, persisted=True),
+        ))
+    if 'ix_articles_search_vector' not in _existing_indexes('articles'):
+        op.create_index(
+            'ix_articles_search_vector', 'articles', ['search_vector'], postgresql_using='gin',
+        )
+
+
+def downgrade() -> None:
+    if 'ix_articles_search_vector' in _existing_indexes('articles'):
+        op.drop_index('ix_articles_search_vector', table_name='articles')
+    if 'search_vector' in _existing_columns('articles'):
+        op.drop_column('articles', 'search_vector')
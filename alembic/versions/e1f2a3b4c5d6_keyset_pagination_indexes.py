@@ -0,0 +1,44 @@
+"""Keyset pagination: composite (sort key, id) indexes behind every list endpoint
+
+Revision ID: e1f2a3b4c5d6
+Revises: d9e4f5a6b7c8
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'e1f2a3b4c5d6'
+down_revision = 'd9e4f5a6b7c8'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_articles_views_count_id', 'articles', ['views_count', 'id']),
+    ('ix_articles_likes_count_id', 'articles', ['likes_count', 'id']),
+    ('ix_articles_published_date_id', 'articles', ['published_date', 'id']),
+    ('ix_articles_author_id_id', 'articles', ['author_id', 'id']),
+    ('ix_comments_article_created_id', 'comments', ['article_id', 'created_date', 'id']),
+    ('ix_comments_article_likes_created_id', 'comments', ['article_id', 'likes_count', 'created_date', 'id']),
+    ('ix_notifications_user_created_id', 'notifications', ['user_id', 'created_at', 'id']),
+    ('ix_bookmarks_user_created_id', 'bookmarks', ['user_id', 'created_at', 'id']),
+    ('ix_view_history_user_viewed_id', 'view_history', ['user_id', 'viewed_at', 'id']),
+    ('ix_follows_followed_id_id', 'follows', ['followed_id', 'id']),
+    ('ix_follows_follower_id_id', 'follows', ['follower_id', 'id']),
+)
+
+
+def _existing_indexes(table: str):
+    return {ix["name"] for ix in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def upgrade() -> None:
+    for name, table, columns in INDEXES:
+        if name not in _existing_indexes(table):
+            op.create_index(name, table, columns)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        if name in _existing_indexes(table):
+            op.drop_index(name, table_name=table)
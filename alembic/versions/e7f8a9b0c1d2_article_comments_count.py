@@ -0,0 +1,42 @@
+"""Engagement counters: maintained comments_count column on articles
+
+Revision ID: e7f8a9b0c1d2
+Revises: d6e7f8a9b0c1
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'e7f8a9b0c1d2'
+down_revision = 'd6e7f8a9b0c1'
+branch_labels = None
+depends_on = None
+
+
+def _existing_columns(table: str):
+    return {col["name"] for col in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade() -> None:
+    if 'comments_count' not in _existing_columns('articles'):
+        op.add_column('articles', sa.Column('comments_count', sa.Integer(), nullable=False, server_default='0'))
+
+    op.execute(
+        """
+        UPDATE articles a
+        SET comments_count = c.n
+        FROM (
+            SELECT article_id, count(*) AS n
+            FROM comments
+            WHERE NOT is_deleted
+            GROUP BY article_id
+        ) c
+        WHERE c.article_id = a.id AND a.comments_count IS DISTINCT FROM c.n
+        """
+    )
+
+
+def downgrade() -> None:
+    if 'comments_count' in _existing_columns('articles'):
+        op.drop_column('articles', 'comments_count')
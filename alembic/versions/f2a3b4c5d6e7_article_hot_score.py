@@ -0,0 +1,60 @@
+"""Trending: decayed recent views and materialized hot score on articles
+
+Revision ID: f2a3b4c5d6e7
+Revises: e1f2a3b4c5d6
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'f2a3b4c5d6e7'
+down_revision = 'e1f2a3b4c5d6'
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _existing_columns(table: str):
+    return {col["name"] for col in _inspector().get_columns(table)}
+
+
+def _existing_indexes(table: str):
+    return {ix["name"] for ix in _inspector().get_indexes(table)}
+
+
+def upgrade() -> None:
+    cols = _existing_columns('articles')
+    if 'recent_views' not in cols:
+        op.add_column('articles', sa.Column('recent_views', sa.Float(), nullable=False, server_default='0'))
+    if 'hot_score' not in cols:
+        op.add_column('articles', sa.Column('hot_score', sa.Float(), nullable=False, server_default='0'))
+    if 'hot_refreshed_at' not in cols:
+        op.add_column('articles', sa.Column('hot_refreshed_at', sa.DateTime(), nullable=True))
+
+    indexes = _existing_indexes('articles')
+    # Trending no longer orders by lifetime views; dropping the index keeps the
+    # frequent views_count updates from the view flush cheap (HOT-eligible).
+    if 'ix_articles_views_count_id' in indexes:
+        op.drop_index('ix_articles_views_count_id', table_name='articles')
+    if 'ix_articles_trending' not in indexes:
+        op.create_index(
+            'ix_articles_trending', 'articles', ['hot_score', 'id'],
+            postgresql_where=sa.text("status = 'PUBLISHED' AND NOT is_unlisted"),
+        )
+
+
+def downgrade() -> None:
+    indexes = _existing_indexes('articles')
+    if 'ix_articles_trending' in indexes:
+        op.drop_index('ix_articles_trending', table_name='articles')
+    if 'ix_articles_views_count_id' not in indexes:
+        op.create_index('ix_articles_views_count_id', 'articles', ['views_count', 'id'])
+
+    cols = _existing_columns('articles')
+    for name in ('hot_refreshed_at', 'hot_score', 'recent_views'):
+        if name in cols:
+            op.drop_column('articles', name)
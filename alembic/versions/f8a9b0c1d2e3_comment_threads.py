@@ -0,0 +1,63 @@
+"""Threaded comments: maintained replies_count and per-thread keyset indexes
+
+Revision ID: f8a9b0c1d2e3
+Revises: e7f8a9b0c1d2
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = 'f8a9b0c1d2e3'
+down_revision = 'e7f8a9b0c1d2'
+branch_labels = None
+depends_on = None
+
+
+def _inspector():
+    return sa.inspect(op.get_bind())
+
+
+def _existing_columns(table: str):
+    return {col["name"] for col in _inspector().get_columns(table)}
+
+
+def _existing_indexes(table: str):
+    return {ix["name"] for ix in _inspector().get_indexes(table)}
+
+
+def upgrade() -> None:
+    if 'replies_count' not in _existing_columns('comments'):
+        op.add_column('comments', sa.Column('replies_count', sa.Integer(), nullable=False, server_default='0'))
+
+    indexes = _existing_indexes('comments')
+    if 'ix_comments_article_roots_created_id' not in indexes:
+        op.create_index(
+            'ix_comments_article_roots_created_id', 'comments', ['article_id', 'created_date', 'id'],
+            postgresql_where=sa.text("parent_id IS NULL"),
+        )
+    if 'ix_comments_parent_created_id' not in indexes:
+        op.create_index('ix_comments_parent_created_id', 'comments', ['parent_id', 'created_date', 'id'])
+
+    op.execute(
+        """
+        UPDATE comments p
+        SET replies_count = r.n
+        FROM (
+            SELECT parent_id, count(*) AS n
+            FROM comments
+            WHERE parent_id IS NOT NULL AND NOT is_deleted
+            GROUP BY parent_id
+        ) r
+        WHERE r.parent_id = p.id AND p.replies_count IS DISTINCT FROM r.n
+        """
+    )
+
+
+def downgrade() -> None:
+    indexes = _existing_indexes('comments')
+    for name in ('ix_comments_parent_created_id', 'ix_comments_article_roots_created_id'):
+        if name in indexes:
+            op.drop_index(name, table_name='comments')
+    if 'replies_count' in _existing_columns('comments'):
+        op.drop_column('comments', 'replies_count')
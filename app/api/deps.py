@@ -1,18 +1,23 @@
 """Request-scoped dependencies: the authorization surface routers depend on.
 
 Routers import identity from here (interface segregation: each route asks for
-exactly the guarantee it needs — a user, maybe-a-user, an admin, a super
-admin) and never touch token internals directly.
+exactly the guarantee it needs — a principal, maybe-a-principal, a full user
+row, an admin, a super admin) and never touch token internals directly.
+Principals come from ``principal_cache``, so identity-only routes cost no
+query; only ``get_current_user`` loads the row. Read-only routes take their
+session from ``get_read_db`` / ``get_async_read_db``, which may be a replica.
 """
 import logging
-from typing import Optional
+from typing import AsyncIterator, Iterator, Optional
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.principals import Principal, principal_cache
 from app.core.security import (  # noqa: F401  (re-exported for routers)
     create_access_token,
     create_preview_token,
@@ -25,7 +30,8 @@ from app.core.security import (  # noqa: F401  (re-exported for routers)
     verify_refresh_token,
     verify_user_credentials,
 )
-from app.db.session import get_db
+from app.db.replicas import replica_router
+from app.db.session import async_session_scope, get_async_db, session_scope
 from app.models.enums import UserRole
 from app.models.user import UserDB
 
@@ -41,64 +47,116 @@ _credentials_exception = HTTPException(
 )
 
 
-def _resolve_user(token: str, db: Session) -> Optional[UserDB]:
-    """Decode an access token and load its active user, or return None."""
+async def _resolve_principal(token: str, db: AsyncSession) -> Optional[Principal]:
+    """Decode an access token and return its active principal, or None.
+
+    Served from ``principal_cache`` when possible; the session is only queried
+    on a miss.
+    """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         if payload.get("token_type") != "access":
             return None
-        user_id = payload.get("sub")
-        if not user_id:
-            return None
-        user = db.query(UserDB).filter(UserDB.id == int(user_id)).first()
+        user_id = int(payload.get("sub") or 0)
     except (JWTError, ValueError):
         return None
-    if user is None or not user.is_active:
+    if not user_id:
         return None
-    return user
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        generation = principal_cache.generation()
+        user = await db.get(UserDB, user_id)
+        if user is None:
+            return None
+        principal = Principal.from_user(user)
+        principal_cache.put(principal, generation)
+    return principal if principal.is_active else None
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> UserDB:
-    """Require a valid access token; yield its active user or raise 401."""
-    user = _resolve_user(token, db)
-    if user is None:
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    """Require a valid access token; yield its principal or raise 401.
+
+    For routes that only need identity, role or preferences: no query on a
+    cache hit.
+    """
+    principal = await _resolve_principal(token, db)
+    if principal is None:
         raise _credentials_exception
-    return user
+    return principal
 
 
-def get_optional_user(
-    token: Optional[str] = Depends(oauth2_scheme_optional), db: Session = Depends(get_db)
-) -> Optional[UserDB]:
-    """Yield the authenticated user when credentials are present and valid, else None.
+async def get_optional_principal(
+    token: Optional[str] = Depends(oauth2_scheme_optional), db: AsyncSession = Depends(get_async_db)
+) -> Optional[Principal]:
+    """Yield the principal when credentials are present and valid, else None.
 
     Used by public endpoints whose response varies for signed-in viewers.
     Never raises on missing or invalid credentials.
     """
     if not token:
         return None
-    return _resolve_user(token, db)
+    return await _resolve_principal(token, db)
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal), db: AsyncSession = Depends(get_async_db)
+) -> UserDB:
+    """Require a valid access token; yield its active user row or raise 401.
+
+    For routes that read or change profile fields the principal lacks. The row
+    belongs to the request's ``get_async_db`` session.
+    """
+    # On a cache miss the row is already in the session's identity map.
+    user = await db.get(UserDB, principal.id)
+    if user is None or not user.is_active:
+        principal_cache.invalidate(principal.id)
+        raise _credentials_exception
+    return user
+
+
+def get_read_db(
+    request: Request, principal: Optional[Principal] = Depends(get_optional_principal)
+) -> Iterator[Session]:
+    """Yield a session for a route that only reads: a replica when one is usable.
+
+    Falls back to the primary when no replica is healthy and current, and for
+    the caller's reads shortly after its own writes. Never use it for a route
+    that writes.
+    """
+    db = replica_router.read_session(request, principal.id if principal else None)
+    with session_scope(db):
+        yield db
+
+
+async def get_async_read_db(
+    request: Request, principal: Optional[Principal] = Depends(get_optional_principal)
+) -> AsyncIterator[AsyncSession]:
+    """``get_read_db`` for ``async def`` routes."""
+    db = await replica_router.async_read_session(request, principal.id if principal else None)
+    async with async_session_scope(db):
+        yield db
 
 
-def is_admin(user: UserDB) -> bool:
+def is_admin(user: Principal) -> bool:
     """Predicate: the user holds the admin or super-admin role."""
     return user.role in {UserRole.ADMIN, UserRole.SUPER_ADMIN}
 
 
-def is_super_admin(user: UserDB) -> bool:
+def is_super_admin(user: Principal) -> bool:
     """Predicate: the user holds the super-admin role."""
     return user.role == UserRole.SUPER_ADMIN
 
 
-def require_admin(current_user: UserDB = Depends(get_current_user)) -> UserDB:
+async def require_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Admit only admins and super admins; raise 403 otherwise."""
     if not is_admin(current_user):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
     return current_user
 
 
-def require_super_admin(current_user: UserDB = Depends(get_current_user)) -> UserDB:
+async def require_super_admin(current_user: Principal = Depends(get_current_principal)) -> Principal:
     """Admit only super admins; raise 403 otherwise."""
     if not is_super_admin(current_user):
         raise HTTPException(
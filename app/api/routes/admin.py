@@ -3,19 +3,21 @@ from sqlalchemy.orm import Session
 from typing import List
 import logging
 
+from app.core.cache import response_cache
+from app.core.principals import principal_cache
+from app.services.notifications import notification_outbox
 from app.db.session import get_db
-from app.schemas.article import ArticleResponse
+from app.schemas.article import ArticleCard, article_cards
 from app.schemas.comment import CommentResponse
 from app.models.enums import UserRole
 from app.models.refresh_token import RefreshTokenDB
 from app.schemas.user import UserResponse, PromoteUserRequest
-from app.api.deps import require_admin, require_super_admin
+from app.api.deps import Principal, require_admin, require_super_admin
 from app.services import (
     get_all_users, promote_user, delete_article, delete_comment,
     get_articles, get_all_comments, get_article_by_id, get_comment_by_id,
     get_user_by_id, update_user_role, delete_user_from_db
 )
-from app.models.user import UserDB
 from app.schemas.token import RefreshTokenResponse
 
 # Logger setup
@@ -26,7 +28,7 @@ router = APIRouter()
 @router.get("/users", response_model=List[UserResponse])
 def list_users(
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_super_admin)
+    current_user: Principal = Depends(require_super_admin)
 ):
     """ Super admins can view all users. """
     users = get_all_users(db)
@@ -38,7 +40,7 @@ def promote_to_admin(
     user_id: int,
     role: str,  # Expecting "admin" or "super_admin"
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_super_admin)
+    current_user: Principal = Depends(require_super_admin)
 ):
     """ Super admins can promote users to admin or super admin. """
     new_role = UserRole.__members__.get(role.upper())
@@ -68,7 +70,7 @@ def change_user_role(
     user_id: int,
     request: PromoteUserRequest,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_super_admin)
+    current_user: Principal = Depends(require_super_admin)
 ):
     """Allow only Super Admins to change user roles."""
     db_user = get_user_by_id(db, user_id)
@@ -93,21 +95,22 @@ def change_user_role(
     return {"detail": f"User {updated_user.username} role updated to {updated_user.role.value}"}
 
 
-@router.get("/articles", response_model=List[ArticleResponse])
+@router.get("/articles", response_model=List[ArticleCard])
 def list_all_articles(
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin)
+    current_user: Principal = Depends(require_admin),
+    full: bool = False,
 ):
     """ Admins can view all articles regardless of status. """
-    articles = get_articles(db, status=None, include_unlisted=True, limit=200)
+    articles = get_articles(db, status=None, include_unlisted=True, limit=200, full=full)
     logger.info(f"Admin {current_user.id} retrieved {len(articles)} articles.")
-    return articles
+    return article_cards(articles, full)
 
 @router.delete("/articles/{article_id}")
 def remove_article(
     article_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """ Admins can delete any article. """
     article = get_article_by_id(db, article_id)
@@ -118,7 +121,7 @@ def remove_article(
 @router.get("/comments", response_model=List[CommentResponse])
 def list_all_comments(
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """ Admins can view all comments. """
     comments = get_all_comments(db)
@@ -129,7 +132,7 @@ def list_all_comments(
 def remove_comment_admin(
     comment_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """ Allow only admins and super admins to delete any comment. """
     comment = get_comment_by_id(db, comment_id)
@@ -140,7 +143,7 @@ def remove_comment_admin(
 @router.get("/active-sessions", response_model=List[RefreshTokenResponse])
 def get_active_sessions(
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """ Admins can view active user sessions """
     sessions = db.query(RefreshTokenDB).filter(RefreshTokenDB.is_active == True).all()
@@ -150,7 +153,7 @@ def get_active_sessions(
 def revoke_token(
     token_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin)
+    current_user: Principal = Depends(require_admin)
 ):
     """ Admins can revoke user sessions """
     token = db.query(RefreshTokenDB).filter_by(id=token_id).first()
@@ -166,7 +169,7 @@ def revoke_token(
 def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_super_admin)
+    current_user: Principal = Depends(require_super_admin)
 ):
     """Allow only Super Admins to delete users."""
     db_user = get_user_by_id(db, user_id)
@@ -183,10 +186,24 @@ def delete_user(
 def toggle_verified(
     user_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_super_admin)
+    current_user: Principal = Depends(require_super_admin)
 ):
     """Toggle a user's verified-writer badge (super admins only)."""
     db_user = get_user_by_id(db, user_id)
     db_user.is_verified = not db_user.is_verified
     db.commit()
+    principal_cache.invalidate(db_user.id)
+    response_cache.invalidate("articles", f"user:{db_user.username}")
     return {"detail": f"User {db_user.username} verified={db_user.is_verified}", "is_verified": db_user.is_verified}
+
+
+@router.get("/cache-stats")
+def cache_stats(current_user: Principal = Depends(require_admin)):
+    """Response-cache hit/miss counters for this worker."""
+    return response_cache.stats()
+
+
+@router.get("/outbox-stats")
+def outbox_stats(current_user: Principal = Depends(require_admin)):
+    """Notification outbox depth, lag, and delivery counters for this worker."""
+    return notification_outbox.stats()
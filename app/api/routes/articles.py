@@ -1,29 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, or_
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import or_
 from typing import List, Optional
-from datetime import datetime, timezone
+from datetime import datetime
 import logging
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.core.config import FRONTEND_URL
 from app.models.article import ArticleDB
-from app.models.follow import FollowDB
 from app.models.user import UserDB
-from app.models.view_history import ViewHistoryDB
 from app.models.enums import ArticleStatus
 from app.schemas.article import (
-    ArticleCreate, ArticleUpdate, ArticleResponse, TagCount, SearchResults,
+    ArticleCard, ArticleCreate, ArticleUpdate, ArticleResponse, TagCount, SearchResults,
+    article_cards,
 )
 from app.api.deps import (
-    create_preview_token, get_current_user, get_optional_user, is_admin,
-    require_admin, verify_preview_token,
+    Principal, create_preview_token, get_current_principal, get_optional_principal, get_read_db,
+    is_admin, require_admin, verify_preview_token,
 )
 from app.services import (
     create_new_article, get_article_by_id,
     update_article, delete_article, get_articles, get_user_drafts,
     can_view_article as _can_view_article,
 )
+from app.services.articles import article_sort_key, invalidate_article_caches
+from app.services.related import get_related_articles, related_index
+from app.services.tags import is_listed, sync_article_tags, top_tags
+from app.services.timeline import home_timeline, sync_article_timelines
+from app.services.views import view_counter
+from app.utils.pagination import next_cursor, set_next_cursor
 
 logger = logging.getLogger(__name__)
 
@@ -36,7 +43,7 @@ VALID_SORTS = {"latest", "trending", "top"}
 def create_article(
     article: ArticleCreate,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """ Create a new article. Only authenticated users can post. """
     new_article = create_new_article(db, article, author_id=current_user.id)
@@ -44,106 +51,104 @@ def create_article(
     return new_article
 
 
-@router.get("", response_model=List[ArticleResponse])
+@router.get("", response_model=List[ArticleCard])
 def list_articles(
+    request: Request,
     response: Response,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     search: Optional[str] = None,
     category: Optional[str] = None,
     tag: Optional[str] = None,
     sort: str = "latest",
     skip: int = 0,
     limit: int = 10,
+    after: Optional[str] = None,
+    full: bool = False,
 ):
     """Public feed of PUBLISHED articles.
 
     Supports search/category/tag filters and latest/trending/top sorting; the
-    total matching count is exposed via the X-Total-Count header so clients
-    can paginate.
+    total matching count is exposed via the X-Total-Count header. Pass the
+    ``X-Next-Cursor`` value back as ``after`` to page by keyset (``skip`` is
+    the legacy offset fallback). Items are summaries with an excerpt; pass
+    ``full=true`` to include each article's body.
     """
     limit = min(50, max(1, limit))
     if sort not in VALID_SORTS:
         sort = "latest"
 
     articles, total = get_articles(
-        db, search=search, category=category, tag=tag, skip=skip, limit=limit,
-        status=ArticleStatus.PUBLISHED, sort=sort, with_total=True,
+        db, search=search, category=category, tag=tag, skip=skip, limit=limit, after=after,
+        status=ArticleStatus.PUBLISHED, sort=sort, with_total=True, full=full,
     )
     response.headers["X-Total-Count"] = str(total)
-    return articles or []
+    set_next_cursor(request, response, next_cursor(articles, limit, lambda a: article_sort_key(a, sort)))
+    return article_cards(articles, full)
 
 
-@router.get("/featured", response_model=List[ArticleResponse])
-def featured_articles(db: Session = Depends(get_db), limit: int = 6):
+@router.get("/featured", response_model=List[ArticleCard])
+def featured_articles(db: Session = Depends(get_read_db), limit: int = 6, full: bool = False):
     """Editors' picks: published stories flagged by admins."""
     limit = min(12, max(1, limit))
-    return get_articles(db, status=ArticleStatus.PUBLISHED, featured_only=True, limit=limit)
+    articles = get_articles(
+        db, status=ArticleStatus.PUBLISHED, featured_only=True, limit=limit, full=full
+    )
+    return article_cards(articles, full)
 
 
-@router.get("/feed", response_model=List[ArticleResponse])
+@router.get("/feed", response_model=List[ArticleCard])
 def following_feed(
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: Principal = Depends(get_current_principal),
     skip: int = 0,
     limit: int = 20,
+    after: Optional[str] = None,
+    full: bool = False,
 ):
     """ Personalized feed: published articles from authors the user follows. """
     limit = min(50, max(1, limit))
-    followed_ids = db.query(FollowDB.followed_id).filter(FollowDB.follower_id == current_user.id)
-    articles = (
-        db.query(ArticleDB)
-        .filter(
-            ArticleDB.author_id.in_(followed_ids.subquery()),
-            ArticleDB.status == ArticleStatus.PUBLISHED,
-            ArticleDB.is_unlisted == False,
-        )
-        .order_by(ArticleDB.published_date.desc().nulls_last(), ArticleDB.id.desc())
-        .offset(max(0, skip))
-        .limit(limit)
-        .all()
+    articles = home_timeline(db, current_user.id, skip=skip, limit=limit, after=after, full=full)
+    set_next_cursor(
+        request, response, next_cursor(articles, limit, lambda a: (a.published_date, a.id))
     )
-    return articles
+    return article_cards(articles, full)
 
 
-@router.get("/my-drafts", response_model=List[ArticleResponse])
+@router.get("/my-drafts", response_model=List[ArticleCard])
 def list_my_drafts(
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     skip: int = 0,
     limit: int = 50,
+    full: bool = False,
 ):
     """ Return all DRAFT articles belonging to the authenticated user. """
     limit = min(100, max(1, limit))
-    drafts = get_user_drafts(db, author_id=current_user.id, skip=skip, limit=limit)
-    return drafts or []
+    drafts = get_user_drafts(db, author_id=current_user.id, skip=skip, limit=limit, full=full)
+    return article_cards(drafts, full)
 
 
 @router.get("/tags", response_model=List[TagCount])
-def list_tags(db: Session = Depends(get_db), limit: int = 30):
+def list_tags(db: Session = Depends(get_read_db), limit: int = 30):
     """ All tags used across published articles, with usage counts (most used first). """
     limit = min(100, max(1, limit))
-    tag_expr = func.jsonb_array_elements_text(ArticleDB.tags).label("tag")
-    rows = (
-        db.query(tag_expr, func.count().label("count"))
-        .filter(ArticleDB.status == ArticleStatus.PUBLISHED, ArticleDB.is_unlisted == False)
-        .group_by("tag")
-        .order_by(func.count().desc())
-        .limit(limit)
-        .all()
-    )
-    return [{"tag": r.tag, "count": r.count} for r in rows]
+    return [{"tag": t.name, "count": t.published_count} for t in top_tags(db, limit)]
 
 
 @router.get("/search", response_model=SearchResults)
 def search_everything(
     q: str,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = 20,
+    full: bool = False,
 ):
     """Site-wide search across published articles and authors.
 
     Supports the operators ``author:<username>`` and ``tag:<tag>``; remaining
-    words are matched against titles, subtitles, and body text.
+    words are full-text matched against titles, subtitles, and body text and
+    ranked by relevance.
     """
     limit = min(50, max(1, limit))
     q = q.strip()
@@ -164,7 +169,7 @@ def search_everything(
 
     articles = get_articles(
         db, search=text_query, author_username=author_filter, tag=tag_filter,
-        status=ArticleStatus.PUBLISHED, limit=limit,
+        status=ArticleStatus.PUBLISHED, sort="relevance", limit=limit, full=full,
     )
     author_term = author_filter or text_query
     authors = []
@@ -181,115 +186,74 @@ def search_everything(
             .limit(10)
             .all()
         )
-    return {"articles": articles, "authors": authors}
+    return {"articles": article_cards(articles, full), "authors": authors}
 
 
 @router.get("/slug/{slug}", response_model=ArticleResponse)
 def read_article_by_slug(
     slug: str,
-    db: Session = Depends(get_db),
-    current_user: Optional[UserDB] = Depends(get_optional_user),
+    db: Session = Depends(get_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal),
 ):
     """ Retrieve an article by its slug. Drafts/deleted are private. """
     article = db.query(ArticleDB).filter(ArticleDB.slug == slug).first()
     if not article or not _can_view_article(article, current_user):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
-    _count_view(db, article, current_user)
+    _count_view(article, current_user)
     return article
 
 
 @router.get("/{article_id}", response_model=ArticleResponse)
 def read_article(
     article_id: int,
-    db: Session = Depends(get_db),
-    current_user: Optional[UserDB] = Depends(get_optional_user),
+    db: Session = Depends(get_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal),
 ):
     """ Retrieve a specific article by its ID. Drafts/deleted are private. """
     article = get_article_by_id(db, article_id)
     if not _can_view_article(article, current_user):
         # 404 rather than 403 so we don't reveal that a draft/deleted article exists.
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
-    _count_view(db, article, current_user)
+    _count_view(article, current_user)
     return article
 
 
-def _count_view(db: Session, article: ArticleDB, viewer: Optional[UserDB]) -> None:
-    """Increment the view counter for published articles (not for the author's own views)."""
+def _count_view(article: ArticleDB, viewer: Optional[Principal]) -> None:
+    """Count a view of a published article (not the author's own views).
+
+    The view is buffered in memory and written behind by ``view_counter``, so
+    reads never take a row lock. The response shows the stored count plus the
+    views still waiting to be flushed.
+    """
     if article.status != ArticleStatus.PUBLISHED:
         return
     if viewer is not None and viewer.id == article.author_id:
         return
-    try:
-        db.query(ArticleDB).filter(ArticleDB.id == article.id).update(
-            {ArticleDB.views_count: ArticleDB.views_count + 1}, synchronize_session=False
-        )
-        if viewer is not None:
-            # Upsert the reader's history entry so "recently viewed" stays fresh.
-            existing = db.query(ViewHistoryDB).filter(
-                ViewHistoryDB.user_id == viewer.id,
-                ViewHistoryDB.article_id == article.id,
-            ).first()
-            if existing:
-                existing.viewed_at = datetime.utcnow()
-            else:
-                db.add(ViewHistoryDB(user_id=viewer.id, article_id=article.id))
-        db.commit()
-        # Don't hand-increment: commit expired the instance, so serializing the
-        # response re-reads the already-incremented value from the DB. Adding 1
-        # here would double-count in the returned payload.
-        db.refresh(article)
-    except Exception:
-        logger.warning(f"View counting failed for article {article.id}", exc_info=True)
-        db.rollback()  # view counting must never break reads
-
-
-@router.get("/{article_id}/related", response_model=List[ArticleResponse])
+    view_counter.record(article.id, viewer.id if viewer is not None else None)
+    # set_committed_value adjusts the loaded value without marking the row dirty.
+    set_committed_value(
+        article, "views_count", (article.views_count or 0) + view_counter.pending(article.id)
+    )
+
+
+@router.get("/{article_id}/related", response_model=List[ArticleCard])
 def related_articles(
     article_id: int,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     limit: int = 4,
+    full: bool = False,
 ):
-    """ Published articles related by shared tags or category (excluding the article itself). """
+    """ Published articles related by shared tags, category, or readership (excluding the article itself). """
     limit = min(10, max(1, limit))
     article = get_article_by_id(db, article_id)
-
-    filters = []
-    if article.tags:
-        filters.extend(ArticleDB.tags.contains([t]) for t in article.tags[:5])
-    if article.category:
-        filters.append(func.lower(ArticleDB.category) == func.lower(article.category))
-
-    query = db.query(ArticleDB).filter(
-        ArticleDB.status == ArticleStatus.PUBLISHED,
-        ArticleDB.is_unlisted == False,
-        ArticleDB.id != article.id,
-    )
-    if filters:
-        query = query.filter(or_(*filters))
-    related = query.order_by(ArticleDB.views_count.desc(), ArticleDB.id.desc()).limit(limit).all()
-
-    if len(related) < limit:
-        seen = {a.id for a in related} | {article.id}
-        extra = (
-            db.query(ArticleDB)
-            .filter(
-                ArticleDB.status == ArticleStatus.PUBLISHED,
-                ArticleDB.is_unlisted == False,
-                ArticleDB.id.notin_(seen),
-            )
-            .order_by(ArticleDB.id.desc())
-            .limit(limit - len(related))
-            .all()
-        )
-        related.extend(extra)
-    return related
+    return article_cards(get_related_articles(db, article, limit, full=full), full)
 
 
 @router.get("/{article_id}/preview-token")
 def issue_preview_token(
     article_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Issue a shareable secret link token for one of the author's drafts."""
     article = get_article_by_id(db, article_id)
@@ -312,13 +276,14 @@ def read_draft_preview(token: str, db: Session = Depends(get_db)):
 def toggle_feature(
     article_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """Toggle a story in or out of the editors' picks (admins only)."""
     article = get_article_by_id(db, article_id)
     article.is_featured = not article.is_featured
     db.commit()
     db.refresh(article)
+    invalidate_article_caches(article.author.username)
     return article
 
 
@@ -327,7 +292,7 @@ def update_existing_article(
     article_id: int,
     article_data: ArticleUpdate,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """ Allow authors to update their own articles, and admins to edit any. """
     article = get_article_by_id(db, article_id)
@@ -350,7 +315,7 @@ def update_existing_article(
 def delete_existing_article(
     article_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """ Allow authors to delete their own articles, and admins to remove any. """
     article = get_article_by_id(db, article_id)
@@ -366,7 +331,7 @@ def delete_existing_article(
 def share_article(
     article_id: int,
     db: Session = Depends(get_db),
-    current_user: Optional[UserDB] = Depends(get_optional_user),
+    current_user: Optional[Principal] = Depends(get_optional_principal),
 ):
     article = db.query(ArticleDB).filter(ArticleDB.id == article_id).first()
     if not article or not _can_view_article(article, current_user):
@@ -379,10 +344,10 @@ def share_article(
 @router.put("/{article_id}/publish")
 async def toggle_publish(
     article_id: int,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    article = get_article_by_id(db, article_id)
+    article = await db.run_sync(get_article_by_id, article_id)
     admin = is_admin(current_user)
     if article.author_id != current_user.id and not admin:
         raise HTTPException(status_code=403, detail="Not authorized")
@@ -390,12 +355,18 @@ async def toggle_publish(
     # resurrected via publish (admins moderate through the admin routes).
     if article.status == ArticleStatus.DELETED and not admin:
         raise HTTPException(status_code=404, detail="Article not found")
+    was_listed = is_listed(article)
     if article.status == ArticleStatus.PUBLISHED:
         article.status = ArticleStatus.DRAFT
         article.published_date = None
     else:
         article.status = ArticleStatus.PUBLISHED
-        article.published_date = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(article)
+        article.published_date = datetime.utcnow()
+    await db.run_sync(sync_article_tags, article, article.tags, was_listed)
+    await db.run_sync(sync_article_timelines, article, was_listed)
+    await db.commit()
+    await db.refresh(article)
+    related_index.mark(article.id)
+    author = await db.get(UserDB, article.author_id)
+    invalidate_article_caches(author.username)
     return {"status": article.status, "published_date": article.published_date}
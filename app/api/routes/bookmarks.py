@@ -1,52 +1,65 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from typing import List
+from typing import List, Optional
 import logging
 
 from app.db.session import get_db
 from app.models.bookmark import BookmarkDB
 from app.models.article import ArticleDB
-from app.models.user import UserDB
 from app.models.enums import ArticleStatus
-from app.schemas.article import ArticleResponse
-from app.api.deps import get_current_user
+from app.schemas.article import ArticleCard, article_cards
+from app.api.deps import Principal, get_current_principal
 from app.services import get_article_by_id, can_view_article
+from app.services.articles import card_options
+from app.utils.pagination import after_cursor, next_cursor, set_next_cursor
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[ArticleResponse])
+@router.get("/", response_model=List[ArticleCard])
 def list_bookmarks(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     skip: int = 0,
     limit: int = 50,
+    after: Optional[str] = None,
+    full: bool = False,
 ):
     """The user's reading list: bookmarked articles, most recently saved first."""
     limit = min(100, max(1, limit))
-    rows = (
-        db.query(ArticleDB)
+    key = (BookmarkDB.created_at, BookmarkDB.id)
+    query = (
+        db.query(ArticleDB, BookmarkDB.created_at, BookmarkDB.id)
+        .options(*card_options(full))
         .join(BookmarkDB, BookmarkDB.article_id == ArticleDB.id)
         .filter(
             BookmarkDB.user_id == current_user.id,
             ArticleDB.status == ArticleStatus.PUBLISHED,
         )
-        .order_by(BookmarkDB.created_at.desc())
+    )
+    if after:
+        query = query.filter(after_cursor(key, after))
+        skip = 0
+    rows = (
+        query.order_by(*(col.desc() for col in key))
         .offset(max(0, skip))
         .limit(limit)
         .all()
     )
-    return rows
+    set_next_cursor(request, response, next_cursor(rows, limit, lambda row: row[1:]))
+    return article_cards([article for article, _, _ in rows], full)
 
 
 @router.get("/{article_id}/status")
 def bookmark_status(
     article_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Whether the current user has bookmarked this article."""
     bookmarked = (
@@ -62,7 +75,7 @@ def bookmark_status(
 def add_bookmark(
     article_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Save an article to the reading list."""
     article = get_article_by_id(db, article_id)  # 404 if missing
@@ -81,7 +94,7 @@ def add_bookmark(
 def remove_bookmark(
     article_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Remove an article from the reading list."""
     bookmark = db.query(BookmarkDB).filter(
@@ -1,31 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
 from sqlalchemy import func
 from typing import List, Optional
 import logging
 
-from app.db.session import get_db
-from app.schemas.comment import CommentCreate, CommentUpdate, CommentResponse
-from app.api.deps import get_current_user, get_optional_user, is_admin
+from app.db.session import get_async_db, get_db
+from app.schemas.comment import CommentCreate, CommentUpdate, CommentResponse, CommentThread
+from app.api.deps import (
+    Principal, get_current_principal, get_optional_principal, get_read_db, is_admin,
+)
 from app.services import (
     create_new_comment, get_comments_by_article, get_comment_by_id, delete_comment,
-    get_article_by_id, extract_mentions, can_view_article as _can_view_article,
+    get_article_by_id, extract_mentions, get_first_replies, get_replies,
+    can_view_article as _can_view_article,
 )
 
 MAX_MENTIONS_PER_COMMENT = 10
-from app.services.notifications import send_notification_to_user
-from app.models.user import UserDB
+MAX_REPLIES_PER_THREAD = 10
+from app.services.notifications import notification_outbox
 from app.models.article import ArticleDB
 from app.models.comment import CommentDB
 from app.models.comment_like import CommentLikeDB
+from app.services.comments import comment_sort_key
+from app.services.counters import add_comment_like, remove_comment_like
+from app.utils.pagination import next_cursor, set_next_cursor
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
-def _with_like_state(db: Session, comments: List[CommentDB], user: Optional[UserDB]) -> List[CommentResponse]:
+def _with_like_state(db: Session, comments: List[CommentDB], user: Optional[Principal]) -> List[CommentResponse]:
     """Attach liked_by_me to serialized comments for the requesting user."""
     liked_ids = set()
     if user is not None and comments:
@@ -47,92 +54,152 @@ def _with_like_state(db: Session, comments: List[CommentDB], user: Optional[User
 @router.post("/", response_model=CommentResponse)
 async def add_comment(
     comment: CommentCreate,
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """ Comment on an article, or reply to an existing comment via parent_id. """
-    article = get_article_by_id(db, comment.article_id)
+    article = await db.run_sync(get_article_by_id, comment.article_id)
     # Can't comment on something you can't see (another user's draft/deleted post).
     if not _can_view_article(article, current_user):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
 
     parent = None
     if comment.parent_id is not None:
-        parent = get_comment_by_id(db, comment.parent_id)
+        parent = await db.run_sync(get_comment_by_id, comment.parent_id)
         if parent.article_id != comment.article_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Parent comment belongs to a different article",
             )
 
-    new_comment = create_new_comment(db, comment, author_id=current_user.id)
+    new_comment = await db.run_sync(create_new_comment, comment, current_user.id)
     logger.info(f"User {current_user.id} commented on article '{article.title}' (ID: {comment.article_id})")
 
     # Notify the article author (new comment) or the parent comment's author (reply).
-    try:
-        if parent is not None and parent.user_id != current_user.id:
-            await send_notification_to_user(
-                db=db,
-                user_id=parent.user_id,
-                message=f"{current_user.username} replied to your comment on \"{article.title}\"",
-                notif_type="comment",
-                extra_data={"article_id": article.id, "comment_id": new_comment.id},
-            )
-        elif parent is None and article.author_id != current_user.id:
-            await send_notification_to_user(
-                db=db,
-                user_id=article.author_id,
-                message=f"{current_user.username} commented on \"{article.title}\"",
-                notif_type="comment",
-                extra_data={"article_id": article.id, "comment_id": new_comment.id},
-            )
-    except Exception:
-        pass  # notification failure must not fail the comment operation
+    extra = {"article_id": article.id, "comment_id": new_comment.id}
+    if parent is not None and parent.user_id != current_user.id:
+        notification_outbox.enqueue(
+            parent.user_id,
+            f"{{actors}} replied to your comment on \"{article.title}\"",
+            notif_type="comment",
+            extra_data=extra,
+            group_key=f"reply:comment:{parent.id}",
+            actor=current_user.username,
+        )
+    elif parent is None and article.author_id != current_user.id:
+        notification_outbox.enqueue(
+            article.author_id,
+            f"{{actors}} commented on \"{article.title}\"",
+            notif_type="comment",
+            extra_data=extra,
+            group_key=f"comment:article:{article.id}",
+            actor=current_user.username,
+        )
 
     # @mentions notify the named writers (never the comment's own author), capped
     # to prevent mass-notification spam from a single comment.
     try:
-        for mentioned in extract_mentions(db, new_comment.content, current_user.id)[:MAX_MENTIONS_PER_COMMENT]:
-            await send_notification_to_user(
-                db=db,
-                user_id=mentioned.id,
-                message=f"{current_user.username} mentioned you on \"{article.title}\"",
+        mentions = await db.run_sync(extract_mentions, new_comment.content, current_user.id)
+        for mentioned in mentions[:MAX_MENTIONS_PER_COMMENT]:
+            notification_outbox.enqueue(
+                mentioned.id,
+                f"{current_user.username} mentioned you on \"{article.title}\"",
                 notif_type="mention",
-                extra_data={"article_id": article.id, "comment_id": new_comment.id},
+                extra_data=extra,
             )
     except Exception:
-        pass
+        logger.warning("Failed to resolve comment mentions", exc_info=True)
 
-    return _with_like_state(db, [new_comment], current_user)[0]
+    return (await db.run_sync(_with_like_state, [new_comment], current_user))[0]
 
 
 @router.get("/{article_id}", response_model=List[CommentResponse])
 def list_comments(
     article_id: int,
-    db: Session = Depends(get_db),
-    current_user: Optional[UserDB] = Depends(get_optional_user),
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal),
     skip: int = 0,
     limit: int = 100,
     sort: str = "new",
+    after: Optional[str] = None,
 ):
     """Comments for an article (flat list; replies carry parent_id).
 
-    ``sort=new`` orders by recency; ``sort=top`` by like count.
+    ``sort=new`` orders by recency; ``sort=top`` by like count. Page with the
+    ``X-Next-Cursor`` value as ``after``; ``skip`` remains as an offset fallback.
+    ``/comments/{article_id}/threads`` serves the same comments nested.
     """
     limit = min(200, max(1, limit))
     if sort not in {"new", "top"}:
         sort = "new"
     get_article_by_id(db, article_id)  # 404 if missing
-    comments = get_comments_by_article(db, article_id, skip, limit, sort=sort)
+    comments = get_comments_by_article(db, article_id, skip, limit, sort=sort, after=after)
+    set_next_cursor(request, response, next_cursor(comments, limit, lambda c: comment_sort_key(c, sort)))
     return _with_like_state(db, comments, current_user)
 
 
+@router.get("/{article_id}/threads", response_model=List[CommentThread])
+def list_comment_threads(
+    article_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal),
+    limit: int = 20,
+    replies: int = 3,
+    sort: str = "new",
+    after: Optional[str] = None,
+):
+    """Top-level comments, each with its first ``replies`` direct replies.
+
+    Threads page by ``X-Next-Cursor`` like the flat list. Each comment carries
+    ``replies_count``; fetch the rest of a thread from ``/comments/{id}/replies``.
+    """
+    limit = min(50, max(1, limit))
+    replies = min(MAX_REPLIES_PER_THREAD, max(0, replies))
+    if sort not in {"new", "top"}:
+        sort = "new"
+    get_article_by_id(db, article_id)  # 404 if missing
+    roots = get_comments_by_article(db, article_id, limit=limit, sort=sort, after=after, top_level_only=True)
+    first_replies = get_first_replies(db, [c.id for c in roots], replies)
+    loaded = roots + [r for thread in first_replies.values() for r in thread]
+    items = {item.id: item for item in _with_like_state(db, loaded, current_user)}
+    set_next_cursor(request, response, next_cursor(roots, limit, lambda c: comment_sort_key(c, sort)))
+    return [
+        CommentThread(
+            **items[c.id].model_dump(),
+            replies=[items[r.id] for r in first_replies.get(c.id, [])],
+        )
+        for c in roots
+    ]
+
+
+@router.get("/{comment_id}/replies", response_model=List[CommentResponse])
+def list_replies(
+    comment_id: int,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal),
+    limit: int = 20,
+    after: Optional[str] = None,
+):
+    """A comment's direct replies, oldest first, paged by ``X-Next-Cursor``."""
+    limit = min(100, max(1, limit))
+    get_comment_by_id(db, comment_id)  # 404 if missing
+    replies = get_replies(db, comment_id, limit=limit, after=after)
+    set_next_cursor(request, response, next_cursor(replies, limit, lambda c: (c.created_date, c.id)))
+    return _with_like_state(db, replies, current_user)
+
+
 @router.put("/{comment_id}", response_model=CommentResponse)
 def edit_comment(
     comment_id: int,
     data: CommentUpdate,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """ Edit a comment. Only the comment's author may edit it. """
     comment = get_comment_by_id(db, comment_id)
@@ -150,20 +217,15 @@ def edit_comment(
 def like_comment(
     comment_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """ Like a comment (idempotent errors: 400 when already liked). """
     comment = get_comment_by_id(db, comment_id)
-    try:
-        db.add(CommentLikeDB(user_id=current_user.id, comment_id=comment_id))
-        db.flush()
-        likes = db.query(func.count(CommentLikeDB.id)).filter(CommentLikeDB.comment_id == comment_id).scalar()
-        comment.likes_count = likes
-        db.commit()
-    except IntegrityError:
-        db.rollback()
+    likes = add_comment_like(db, current_user.id, comment_id)
+    db.commit()
+    if likes is None:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You already liked this comment")
-    db.refresh(comment)
+    set_committed_value(comment, "likes_count", likes)
     return _with_like_state(db, [comment], current_user)[0]
 
 
@@ -171,22 +233,15 @@ def like_comment(
 def unlike_comment(
     comment_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """ Remove a like from a comment. """
     comment = get_comment_by_id(db, comment_id)
-    like = db.query(CommentLikeDB).filter(
-        CommentLikeDB.user_id == current_user.id,
-        CommentLikeDB.comment_id == comment_id,
-    ).one_or_none()
-    if like is None:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You have not liked this comment")
-    db.delete(like)
-    db.flush()
-    likes = db.query(func.count(CommentLikeDB.id)).filter(CommentLikeDB.comment_id == comment_id).scalar()
-    comment.likes_count = likes
+    likes = remove_comment_like(db, current_user.id, comment_id)
     db.commit()
-    db.refresh(comment)
+    if likes is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You have not liked this comment")
+    set_committed_value(comment, "likes_count", likes)
     return _with_like_state(db, [comment], current_user)[0]
 
 
@@ -194,7 +249,7 @@ def unlike_comment(
 def remove_comment(
     comment_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Allow the comment owner, the article's author, and admins to delete a comment."""
     comment = get_comment_by_id(db, comment_id)
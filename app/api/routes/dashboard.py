@@ -1,16 +1,13 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 import logging
 
 from app.db.session import get_db
 from app.models.article import ArticleDB
-from app.models.comment import CommentDB
 from app.models.follow import FollowDB
-from app.models.user import UserDB
 from app.models.enums import ArticleStatus
 from app.schemas.dashboard import DashboardStats, ArticleStats
-from app.api.deps import get_current_user
+from app.api.deps import Principal, get_current_principal
 
 logger = logging.getLogger(__name__)
 
@@ -20,17 +17,9 @@ router = APIRouter()
 @router.get("/", response_model=DashboardStats)
 def get_dashboard(
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Author analytics: per-article stats plus aggregate totals."""
-    comment_counts = dict(
-        db.query(CommentDB.article_id, func.count(CommentDB.id))
-        .join(ArticleDB, ArticleDB.id == CommentDB.article_id)
-        .filter(ArticleDB.author_id == current_user.id, CommentDB.is_deleted == False)
-        .group_by(CommentDB.article_id)
-        .all()
-    )
-
     articles = (
         db.query(ArticleDB)
         .filter(ArticleDB.author_id == current_user.id, ArticleDB.status != ArticleStatus.DELETED)
@@ -47,7 +36,7 @@ def get_dashboard(
             published_date=a.published_date,
             views_count=a.views_count or 0,
             likes_count=a.likes_count or 0,
-            comments_count=comment_counts.get(a.id, 0),
+            comments_count=a.comments_count or 0,
         )
         for a in articles
     ]
@@ -5,7 +5,7 @@ from fastapi import APIRouter, Depends
 from fastapi.responses import Response
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
+from app.api.deps import get_read_db
 from app.core.config import FRONTEND_URL
 from app.models.article import ArticleDB
 from app.models.enums import ArticleStatus
@@ -25,7 +25,7 @@ def _published(db: Session, limit: int = 50):
 
 
 @router.get("/rss.xml", include_in_schema=False)
-def rss_feed(db: Session = Depends(get_db)):
+def rss_feed(db: Session = Depends(get_read_db)):
     """RSS 2.0 feed of the latest published articles."""
     items = []
     for a in _published(db, limit=30):
@@ -52,7 +52,7 @@ def rss_feed(db: Session = Depends(get_db)):
 
 
 @router.get("/rss/{username}.xml", include_in_schema=False)
-def author_rss_feed(username: str, db: Session = Depends(get_db)):
+def author_rss_feed(username: str, db: Session = Depends(get_read_db)):
     """RSS 2.0 feed of one writer's published stories."""
     from app.models.user import UserDB
 
@@ -96,7 +96,7 @@ def author_rss_feed(username: str, db: Session = Depends(get_db)):
 
 
 @router.get("/sitemap.xml", include_in_schema=False)
-def sitemap(db: Session = Depends(get_db)):
+def sitemap(db: Session = Depends(get_read_db)):
     """Sitemap of the public site: home plus all published posts."""
     urls = [f"<url><loc>{FRONTEND_URL}/</loc></url>"]
     for a in _published(db, limit=1000):
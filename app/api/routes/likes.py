@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
-from sqlalchemy import update, func
+from app.core.cache import response_cache
 from app.models.article import ArticleDB
 from app.models.like import LikeDB
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.schemas.like import LikeResponse
-from app.api.deps import get_current_user
+from app.api.deps import Principal, get_current_principal
 from app.services import get_article_with_likes
-from app.services.notifications import send_notification_to_user
+from app.services.counters import add_article_like, remove_article_like
+from app.services.notifications import notification_outbox
 from app.models.user import UserDB
 import logging
 
@@ -20,64 +22,47 @@ logging.basicConfig(level=logging.INFO)
 @router.post("/{article_id}", response_model=LikeResponse)
 async def like_article(
     article_id: int,
-    db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    user: Principal = Depends(get_current_principal)
 ):
     """Like an article (if not already liked)."""
     logger.info(f"User {user.id} attempting to like article {article_id}")
 
-    article = db.query(ArticleDB).filter(ArticleDB.id == article_id).first()
-    if not article:
-        logger.warning(f"Article {article_id} not found")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
-
-    existing_like = db.query(LikeDB).filter(
-        LikeDB.article_id == article_id,
-        LikeDB.user_id == user.id
-    ).first()
-
-    if existing_like:
-        logger.info(f"User {user.id} already liked article {article_id}")
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You already liked this article")
-
     try:
-        # Insert like, then recompute the denormalized count — committed atomically.
-        new_like = LikeDB(article_id=article_id, user_id=user.id)
-        db.add(new_like)
-        db.flush()  # surfaces the unique-constraint violation before we commit
-
-        likes_count = db.query(func.count(LikeDB.id)).filter(LikeDB.article_id == article_id).scalar()
-        db.query(ArticleDB).filter(ArticleDB.id == article_id).update({"likes_count": likes_count})
-        db.commit()
-
-        logger.info(f"User {user.id} liked article {article_id}, new count: {likes_count}")
-
+        # Insert the like and bump the denormalized count in one statement.
+        liked = await db.run_sync(add_article_like, user.id, article_id)
+        await db.commit()
     except IntegrityError:
-        # Concurrent duplicate like — the unique constraint fired.
-        db.rollback()
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You already liked this article")
+        # The like's foreign key fired: there is no such article.
+        await db.rollback()
+        logger.warning(f"Article {article_id} not found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
     except SQLAlchemyError as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error processing like for article {article_id}: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error processing like")
 
-    # Notification is fire-and-forget — must not roll back the already-committed like
-    if article.author_id != user.id:
-        try:
-            await send_notification_to_user(
-                db=db,
-                user_id=article.author_id,
-                message=f"{user.username} liked your article \"{article.title}\"",
-                notif_type="like",
-                extra_data={"article_id": article.id},
-            )
-        except Exception:
-            pass  # notification failure must not fail the like operation
+    if liked is None:
+        logger.info(f"User {user.id} already liked article {article_id}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You already liked this article")
+    likes_count = liked.likes_count
+    response_cache.invalidate("engagement")
+    logger.info(f"User {user.id} liked article {article_id}, new count: {likes_count}")
+
+    if liked.author_id != user.id:
+        notification_outbox.enqueue(
+            liked.author_id,
+            f"{{actors}} liked your article \"{liked.title}\"",
+            notif_type="like",
+            extra_data={"article_id": article_id},
+            group_key=f"like:article:{article_id}",
+            actor=user.username,
+        )
 
     return LikeResponse(
         message="Successfully liked the article.",
         user_id=user.id,
-        article_id=article.id,
+        article_id=article_id,
         likes_count=likes_count
     )
 
@@ -85,45 +70,33 @@ async def like_article(
 def unlike_article(
     article_id: int,
     db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_user)
+    user: Principal = Depends(get_current_principal)
 ):
     """Unlike an article (if previously liked)."""
     logger.info(f"User {user.id} is trying to unlike article {article_id}")
 
-    article = db.query(ArticleDB).filter(ArticleDB.id == article_id).first()
-    if not article:
-        logger.warning(f"Article {article_id} not found")
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
-
-    like = db.query(LikeDB).filter(
-        LikeDB.article_id == article_id,
-        LikeDB.user_id == user.id
-    ).one_or_none()
-
-    if not like:
-        logger.info(f"User {user.id} has not liked article {article_id}")
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You have not liked this article")
-
     try:
-        # Delete the like and recompute the count in a single transaction.
-        db.delete(like)
-        db.flush()
-
-        likes_count = db.query(func.count(LikeDB.id)).filter(LikeDB.article_id == article_id).scalar()
-        db.query(ArticleDB).filter(ArticleDB.id == article_id).update({"likes_count": likes_count})
+        # Delete the like and decrement the count in one statement.
+        likes_count = remove_article_like(db, user.id, article_id)
         db.commit()
-
-        logger.info(f"User {user.id} unliked article {article_id}, new count: {likes_count}")
-
     except SQLAlchemyError as e:
         db.rollback()
         logger.error(f"Unlike processing error: {str(e)}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Error processing unlike")
 
+    if likes_count is None:
+        if db.get(ArticleDB, article_id) is None:
+            logger.warning(f"Article {article_id} not found")
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Article not found")
+        logger.info(f"User {user.id} has not liked article {article_id}")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="You have not liked this article")
+    response_cache.invalidate("engagement")
+    logger.info(f"User {user.id} unliked article {article_id}, new count: {likes_count}")
+
     return LikeResponse(
         message="Successfully unliked the article.",
         user_id=user.id,
-        article_id=article.id,
+        article_id=article_id,
         likes_count=likes_count
     )
 
@@ -132,7 +105,7 @@ def unlike_article(
 def get_like_status(
     article_id: int,
     db: Session = Depends(get_db),
-    user: UserDB = Depends(get_current_user),
+    user: Principal = Depends(get_current_principal),
 ):
     """Return whether the current user has liked the article, plus the total count."""
     likes_count = db.query(ArticleDB.likes_count).filter(ArticleDB.id == article_id).scalar()
@@ -1,8 +1,7 @@
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
 from fastapi.responses import FileResponse
-from app.api.deps import get_current_user, require_admin
+from app.api.deps import Principal, get_current_principal, require_admin
 from app.utils.file_validation import detect_file_type
-from app.models.user import UserDB
 from app.core.config import UPLOAD_FOLDER
 
 import shutil
@@ -64,7 +63,7 @@ def validate_and_sanitize_filename(filename: str) -> Path:
 @router.post("/upload/")
 async def upload_file(
     file: UploadFile = File(...),
-    current_user: UserDB = Depends(get_current_user)  # Requires authentication
+    current_user: Principal = Depends(get_current_principal)  # Requires authentication
 ):
     """Handles secure media file uploads (Authenticated Users Only)."""
     ensure_upload_dir()
@@ -93,7 +92,7 @@ async def upload_file(
 
 
 @router.get("/files/")
-def list_files(current_user: UserDB = Depends(require_admin)):
+def list_files(current_user: Principal = Depends(require_admin)):
     """Returns a list of uploaded files (admins only)."""
     ensure_upload_dir()
 
@@ -107,7 +106,7 @@ def list_files(current_user: UserDB = Depends(require_admin)):
 @router.delete("/delete/{filename}")
 def delete_file(
     filename: str,
-    current_user: UserDB = Depends(require_admin)  # Admins only
+    current_user: Principal = Depends(require_admin)  # Admins only
 ):
     """Delete an uploaded file (admins only)."""
     ensure_upload_dir()
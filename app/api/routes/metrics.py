@@ -0,0 +1,164 @@
+"""Prometheus scrape endpoint (mounted at the app root).
+
+Request metrics come from ``MetricsMiddleware``; everything else is read from
+the owning component at scrape time: database pools, replicas, WebSockets,
+caches, the notification outbox, write-behind buffers and SQL totals.
+"""
+import hmac
+from typing import Callable, List
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.responses import Response
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.metrics import family, http_metrics, render
+from app.core.principals import principal_cache
+from app.db.instrumentation import sql_instrumentation
+from app.db.replicas import replica_router
+from app.db.session import async_engine, engine, pool_stats
+from app.services.notifications import notification_outbox
+from app.services.retention import notification_retention
+from app.services.views import view_counter
+from app.ws import websocket_hub
+
+router = APIRouter()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Unlabelled values read from a component's stats() at scrape time:
+# source -> ((metric, type, stats key, help), ...).
+STAT_METRICS = {
+    websocket_hub.stats: (
+        ("websocket_users", "gauge", "users", "Users with an open WebSocket on this worker."),
+        ("websocket_connections", "gauge", "connections", "Open WebSocket connections on this worker."),
+        ("websocket_queued_messages", "gauge", "queued", "Messages waiting in WebSocket send queues."),
+        ("websocket_published_total", "counter", "published", "Messages published to the backplane."),
+        ("websocket_delivered_total", "counter", "delivered", "Messages queued on local sockets."),
+        ("websocket_evicted_slow_total", "counter", "evicted_slow", "Sockets closed for falling behind."),
+        ("websocket_reaped_idle_total", "counter", "reaped_idle", "Sockets closed after going silent."),
+    ),
+    response_cache.stats: (
+        ("response_cache_hits_total", "counter", "hits", "Response cache hits."),
+        ("response_cache_misses_total", "counter", "misses", "Response cache misses."),
+        ("response_cache_invalidated_total", "counter", "invalidated_entries", "Response cache entries dropped."),
+        ("response_cache_entries", "gauge", "entries", "Entries in the response cache."),
+    ),
+    principal_cache.stats: (
+        ("principal_cache_hits_total", "counter", "hits", "Principal cache hits."),
+        ("principal_cache_misses_total", "counter", "misses", "Principal cache misses."),
+        ("principal_cache_invalidated_total", "counter", "invalidated_entries", "Principal cache entries dropped."),
+        ("principal_cache_entries", "gauge", "entries", "Entries in the principal cache."),
+    ),
+    notification_outbox.stats: (
+        ("notification_outbox_depth", "gauge", "queue_depth", "Events waiting to be stored."),
+        ("notification_outbox_oldest_seconds", "gauge", "oldest_pending_seconds", "Age of the oldest pending event."),
+        ("notification_outbox_batch_lag_seconds", "gauge", "last_batch_lag_seconds", "Lag of the last batch stored."),
+        ("notification_outbox_stored_total", "counter", "stored", "Notifications stored."),
+        ("notification_outbox_skipped_total", "counter", "skipped_by_preference", "Events muted by preference."),
+        ("notification_outbox_dropped_total", "counter", "dropped", "Notification events dropped."),
+        ("notification_outbox_coalesced_total", "counter", "coalesced", "Events merged into an unread one."),
+        ("notification_outbox_batches_total", "counter", "batches", "Notification batches stored."),
+    ),
+    view_counter.stats: (
+        ("view_buffer_pending_articles", "gauge", "pending_articles", "Articles with unflushed views."),
+        ("view_buffer_pending_history", "gauge", "pending_history", "Unflushed history touches."),
+    ),
+    sql_instrumentation.stats: (
+        ("sql_queries_total", "counter", "queries", "SQL statements executed."),
+        ("sql_query_seconds_total", "counter", "seconds", "Time spent executing SQL statements."),
+        ("sql_slow_queries_total", "counter", "slow_queries", "Statements slower than SQL_SLOW_QUERY_MS."),
+        ("sql_n_plus_one_requests_total", "counter", "n_plus_one_requests", "Requests flagged as N+1s."),
+    ),
+}
+
+
+def _stat_families() -> List[str]:
+    lines: List[str] = []
+    for source, metrics in STAT_METRICS.items():
+        stats = source()
+        for name, kind, key, help_text in metrics:
+            lines += family(name, kind, help_text, [({}, stats[key])])
+    lines += family(
+        "notification_retention_deleted_total", "counter", "Expired notifications deleted.",
+        [({}, notification_retention.deleted)],
+    )
+    lines += family(
+        "notification_retention_dropped_partitions_total", "counter",
+        "Expired notification partitions dropped.",
+        [({}, notification_retention.dropped_partitions)],
+    )
+    return lines
+
+
+def _pool_families() -> List[str]:
+    pools = [
+        ({"pool": "primary", "driver": "psycopg2"}, engine),
+        ({"pool": "primary", "driver": "asyncpg"}, async_engine.sync_engine),
+    ]
+    for n, replica in enumerate(replica_router.replicas, start=1):
+        pools.append(({"pool": f"replica-{n}", "driver": "psycopg2"}, replica.engine))
+        pools.append(({"pool": f"replica-{n}", "driver": "asyncpg"}, replica.async_engine.sync_engine))
+    stats = [(labels, pool_stats(db_engine)) for labels, db_engine in pools]
+
+    def pool_family(name: str, kind: str, help_text: str, key: str) -> List[str]:
+        return family(name, kind, help_text, [(labels, s[key]) for labels, s in stats])
+
+    return (
+        pool_family("db_pool_size", "gauge", "Connections the pool keeps open.", "size")
+        + pool_family("db_pool_checked_out", "gauge", "Connections in use.", "checked_out")
+        + pool_family("db_pool_idle", "gauge", "Open connections waiting in the pool.", "idle")
+        + pool_family("db_pool_overflow", "gauge", "Connections open beyond the pool size.", "overflow")
+        + pool_family("db_pool_waits_total", "counter", "Checkouts that found the pool busy.", "waits")
+        + pool_family("db_pool_wait_seconds_total", "counter", "Time waited on a busy pool.", "wait_seconds")
+    )
+
+
+def _replica_families() -> List[str]:
+    if not replica_router.enabled:
+        return []
+    stats = replica_router.stats()
+    replicas = [({"replica": f"replica-{n}"}, r) for n, r in enumerate(stats["replicas"], start=1)]
+
+    def replica_family(name: str, kind: str, help_text: str, key: str) -> List[str]:
+        return family(name, kind, help_text, [(labels, r[key]) for labels, r in replicas])
+
+    return (
+        replica_family("db_replica_healthy", "gauge", "1 while the replica is in rotation.", "healthy")
+        + replica_family("db_replica_lag_seconds", "gauge", "Lag at the last health check.", "lag_seconds")
+        + replica_family("db_replica_reads_total", "counter", "Reads routed to the replica.", "reads")
+        + family(
+            "db_reads_primary_fallback_total", "counter",
+            "Reads sent to the primary for lack of a usable replica.", [({}, stats["primary_reads"])],
+        )
+        + family(
+            "db_reads_sticky_total", "counter",
+            "Reads kept on the primary after the caller's write.", [({}, stats["sticky_reads"])],
+        )
+        + family(
+            "db_replica_failovers_total", "counter",
+            "Replicas taken out of rotation by a failed connection.", [({}, stats["failovers"])],
+        )
+    )
+
+
+SECTIONS: List[Callable[[], List[str]]] = [
+    http_metrics.render,
+    _pool_families,
+    _replica_families,
+    _stat_families,
+]
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Prometheus text exposition for this worker.
+
+    Open unless ``METRICS_TOKEN`` is set, in which case scrapers send it as a
+    bearer token.
+    """
+    if settings.METRICS_TOKEN and not hmac.compare_digest(
+        request.headers.get("authorization", ""), f"Bearer {settings.METRICS_TOKEN}"
+    ):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return Response(render(section() for section in SECTIONS), media_type=CONTENT_TYPE)
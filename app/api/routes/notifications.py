@@ -1,13 +1,26 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models.notification import NotificationDB
-from app.schemas.notification import NotificationResponse
-from app.services.notifications import fetch_unread_notifications, serialize_notification
-from app.ws import websocket_manager
-from app.db.session import get_db
-from app.api.deps import get_current_user
+from app.schemas.notification import NotificationResponse, UnreadCount
+from app.services.notifications import (
+    delete_user_notification,
+    fetch_notifications,
+    fetch_unread_notifications,
+    mark_all_notifications_read,
+    mark_notification_read,
+    push_unread_count,
+    serialize_notification,
+    unread_count,
+    unread_count_message,
+)
+from app.utils.pagination import next_cursor, set_next_cursor
+from app.ws import websocket_hub
+from app.db.session import AsyncSessionLocal, get_async_db, get_db
+from app.api.deps import Principal, get_current_principal, get_current_user
 from app.models.user import UserDB
+import json
 import logging
 
 from fastapi import Query, HTTPException, status
@@ -18,11 +31,18 @@ logger = logging.getLogger(__name__)
 
 
 @router.websocket("/ws/{user_id}")
-async def websocket_endpoint(websocket: WebSocket, user_id: int, token: str = Query(...)):
+async def websocket_endpoint(
+    websocket: WebSocket, user_id: int, token: str = Query(...), heartbeat: bool = Query(False)
+):
     """WebSocket endpoint authenticated by a short-lived, single-purpose ws ticket.
 
     Only ``token_type == "ws"`` is accepted; the long-lived access token is never
     valid here, so it never needs to appear in a URL/query string.
+
+    With ``?heartbeat=1`` the server sends ``ping`` every
+    ``WS_PING_INTERVAL_SECONDS``, and a client that sends nothing (``pong``
+    included) for ``WS_IDLE_TIMEOUT_SECONDS`` is dropped. Without it the socket
+    is never pinged or reaped for silence.
     """
     try:
         user_data = verify_access_token(token)
@@ -38,99 +58,111 @@ async def websocket_endpoint(websocket: WebSocket, user_id: int, token: str = Qu
         await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
         return
 
-    await websocket_manager.connect(websocket, user_id)
+    conn = await websocket_hub.connect(websocket, user_id, heartbeat)
+    async with AsyncSessionLocal() as db:
+        websocket_hub.push(conn, unread_count_message(await db.run_sync(unread_count, user_id)))
 
+    # Replies go through the connection's queue like pushes, so the socket has
+    # a single writer. Any frame counts as liveness for the idle reaper.
     try:
         while True:
             data = await websocket.receive_text()
-            if data == "get_notifications":
-                db_gen = get_db()
-                db = next(db_gen)
-                try:
-                    notifications = fetch_unread_notifications(db, user_id, 0, 10)
-                    payload = [serialize_notification(n) for n in notifications]
-                finally:
-                    db_gen.close()
-                await websocket.send_json({"notifications": payload})
+            conn.touch()
+            if data == "pong":
+                continue
+            if data == "ping":
+                websocket_hub.push(conn, "pong")
+            elif data == "get_unread_count":
+                async with AsyncSessionLocal() as db:
+                    count = await db.run_sync(unread_count, user_id)
+                websocket_hub.push(conn, unread_count_message(count))
+            elif data == "get_notifications":
+                async with AsyncSessionLocal() as db:
+                    notifications = await db.run_sync(fetch_unread_notifications, user_id, 0, 10)
+                payload = [serialize_notification(n) for n in notifications]
+                websocket_hub.push(conn, json.dumps({"notifications": payload}))
             else:
-                await websocket.send_text(f"Received unknown command: {data}")
+                websocket_hub.push(conn, f"Received unknown command: {data}")
 
     except WebSocketDisconnect:
-        await websocket_manager.disconnect(user_id, websocket)
+        await websocket_hub.disconnect(user_id, websocket)
     except Exception:
         logger.warning(f"WebSocket error for user {user_id}", exc_info=True)
-        await websocket_manager.disconnect(user_id, websocket)
+        await websocket_hub.disconnect(user_id, websocket)
+
+def _notification_key(notification: NotificationDB):
+    return (notification.created_at, notification.id)
+
+
+@router.get("/unread-count", response_model=UnreadCount)
+async def get_unread_count(current_user: UserDB = Depends(get_current_user)):
+    """The badge count: read from the already-loaded user, no notification query."""
+    return {"unread_count": current_user.unread_notifications}
+
 
 @router.get("/unread", response_model=List[NotificationResponse])
 def get_unread_notifications(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     skip: int = 0,
-    limit: int = 10
+    limit: int = 10,
+    after: Optional[str] = None,
 ):
     """Fetch unread notifications for the current user."""
-    return fetch_unread_notifications(db, current_user.id, skip, limit)
+    limit = min(100, max(1, limit))
+    rows = fetch_unread_notifications(db, current_user.id, skip, limit, after=after)
+    set_next_cursor(request, response, next_cursor(rows, limit, _notification_key))
+    return rows
 
 
 @router.get("/", response_model=List[NotificationResponse])
 def get_all_notifications(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     skip: int = 0,
     limit: int = 30,
+    after: Optional[str] = None,
 ):
     """Fetch all notifications (read and unread), newest first."""
     limit = min(100, max(1, limit))
-    return (
-        db.query(NotificationDB)
-        .filter(NotificationDB.user_id == current_user.id)
-        .order_by(NotificationDB.created_at.desc())
-        .offset(max(0, skip))
-        .limit(limit)
-        .all()
-    )
+    rows = fetch_notifications(db, current_user.id, skip, limit, after=after)
+    set_next_cursor(request, response, next_cursor(rows, limit, _notification_key))
+    return rows
 
 @router.post("/read/{notification_id}")
 async def mark_read(
     notification_id: int,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    notif = db.query(NotificationDB).filter(
-        NotificationDB.id == notification_id,
-        NotificationDB.user_id == current_user.id,
-    ).first()
-    if not notif:
+    count = await db.run_sync(mark_notification_read, current_user.id, notification_id)
+    if count is None:
         raise HTTPException(status_code=404, detail="Notification not found")
-    notif.is_read = True
-    db.commit()
-    return {"message": "Marked as read"}
+    await push_unread_count(current_user.id, count)
+    return {"message": "Marked as read", "unread_count": count}
 
 @router.post("/read-all")
 async def mark_all_read(
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    db.query(NotificationDB).filter(
-        NotificationDB.user_id == current_user.id,
-        NotificationDB.is_read == False,
-    ).update({"is_read": True})
-    db.commit()
-    return {"message": "All notifications marked as read"}
+    count = await db.run_sync(mark_all_notifications_read, current_user.id)
+    await push_unread_count(current_user.id, count)
+    return {"message": "All notifications marked as read", "unread_count": count}
 
 @router.delete("/{notification_id}")
 async def delete_notification(
     notification_id: int,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    notif = db.query(NotificationDB).filter(
-        NotificationDB.id == notification_id,
-        NotificationDB.user_id == current_user.id,
-    ).first()
-    if not notif:
+    count = await db.run_sync(delete_user_notification, current_user.id, notification_id)
+    if count is None:
         raise HTTPException(status_code=404, detail="Notification not found")
-    db.delete(notif)
-    db.commit()
-    return {"message": "Deleted"}
+    await push_unread_count(current_user.id, count)
+    return {"message": "Deleted", "unread_count": count}
 
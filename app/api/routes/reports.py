@@ -5,10 +5,9 @@ from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_user, require_admin
+from app.api.deps import Principal, get_current_principal, require_admin
 from app.db.session import get_db
 from app.models.report import ReportDB
-from app.models.user import UserDB
 from app.schemas.report import ReportCreate, ReportResponse
 from app.services import get_article_by_id, get_comment_by_id, can_view_article
 
@@ -21,7 +20,7 @@ router = APIRouter()
 def create_report(
     report: ReportCreate,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """File a report against a story or a comment."""
     if report.article_id is not None:
@@ -47,7 +46,7 @@ def create_report(
 @router.get("/", response_model=List[ReportResponse])
 def list_reports(
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
     status: Optional[str] = None,
 ):
     """Review queue for admins, optionally filtered by status (open/resolved)."""
@@ -61,7 +60,7 @@ def list_reports(
 def resolve_report(
     report_id: int,
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(require_admin),
+    current_user: Principal = Depends(require_admin),
 ):
     """Mark a report as resolved."""
     report = db.query(ReportDB).filter(ReportDB.id == report_id).first()
@@ -1,8 +1,10 @@
 import logging
 import os
 import secrets
-from fastapi import APIRouter, Depends, HTTPException, status, Request, UploadFile, File
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request, Response, UploadFile, File
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
@@ -10,29 +12,35 @@ from typing import List
 from slowapi import Limiter
 from app.core.ratelimit import client_ip_key
 
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.schemas.user import (
     UserCreate, UserResponse, UserProfileUpdate, UserPasswordChange, UserPublicProfile,
-    NotificationPrefs, FollowUserEntry, AccountDelete,
+    NotificationPrefs, FollowUserEntry, AccountDelete, ViewerState,
 )
-from app.schemas.article import ArticleResponse
+from app.schemas.article import ArticleCard, article_cards
 from app.schemas.token import RefreshTokenResponse, RefreshRequest
 from app.models.view_history import ViewHistoryDB
 from app.services import delete_user_from_db, get_user_drafts
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from typing import Optional
 from app.api.deps import (
-    create_access_token, get_current_user, get_optional_user, hash_password, verify_password,
+    Principal, create_access_token, get_async_read_db, get_current_principal, get_current_user,
+    get_optional_principal, hash_password, verify_password,
     verify_user_credentials, create_refresh_token, verify_refresh_token, create_ws_ticket
 )
-from app.services import create_new_user, get_user_by_username, update_user_profile
+from app.services import create_new_user, get_user_by_username, get_viewer_state, update_user_profile
 from app.utils.file_validation import detect_file_type
-from app.services.notifications import send_notification_to_user
+from app.utils.pagination import after_cursor, next_cursor, set_next_cursor
+from app.services.articles import card_options
+from app.services.notifications import notification_outbox
+from app.services.timeline import follow, unfollow
 from app.models.user import UserDB, UserRole
 from app.models.article import ArticleDB
 from app.models.follow import FollowDB
 from app.models.enums import ArticleStatus
 from app.models.refresh_token import RefreshTokenDB
+from app.core.cache import response_cache
+from app.core.principals import principal_cache
 from app.core.config import ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS, UPLOAD_FOLDER
 
 logger = logging.getLogger(__name__)
@@ -45,6 +53,9 @@ IMAGE_MIME_TO_EXT = {
     "image/webp": ".webp",
 }
 
+# Ids of each kind accepted by one /me/viewer-state call (a feed page's worth).
+MAX_VIEWER_STATE_IDS = 100
+
 router = APIRouter()
 limiter = Limiter(key_func=client_ip_key)
 
@@ -114,7 +125,7 @@ def refresh_access_token(body: RefreshRequest, db: Session = Depends(get_db)):
 @router.post("/logout", status_code=status.HTTP_200_OK)
 def logout_user(
     db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Logout by revoking the user's active refresh tokens. Idempotent."""
     try:
@@ -130,7 +141,7 @@ def logout_user(
 
 
 @router.get("/ws-ticket")
-def get_ws_ticket(current_user: UserDB = Depends(get_current_user)):
+def get_ws_ticket(current_user: Principal = Depends(get_current_principal)):
     """Issue a short-lived, single-purpose ticket for authenticating a WebSocket handshake.
 
     The long-lived access token is never exposed to client-side JavaScript; the browser
@@ -146,43 +157,46 @@ async def get_my_profile(current_user: UserDB = Depends(get_current_user)):
 async def update_my_profile(
     data: UserProfileUpdate,
     current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Usernames and emails are stored lowercase; compare case-insensitively so a
     # case-variant of an existing name is rejected (not left to hit the DB unique
     # constraint as a 500).
     if data.username and data.username.lower() != current_user.username:
-        if db.query(UserDB).filter(func.lower(UserDB.username) == data.username.lower()).first():
+        if await db.scalar(select(UserDB.id).where(func.lower(UserDB.username) == data.username.lower())):
             raise HTTPException(status_code=409, detail="Username already taken")
     if data.email and data.email.lower() != current_user.email:
-        if db.query(UserDB).filter(func.lower(UserDB.email) == data.email.lower()).first():
+        if await db.scalar(select(UserDB.id).where(func.lower(UserDB.email) == data.email.lower())):
             raise HTTPException(status_code=409, detail="Email already in use")
     # exclude_unset (not exclude_none) so the client can explicitly clear a field
     # (e.g. remove a website) by sending null.
-    updated = update_user_profile(db, current_user, data.model_dump(exclude_unset=True))
+    updated = await db.run_sync(update_user_profile, current_user, data.model_dump(exclude_unset=True))
     return updated
 
 @router.put("/me/password")
 async def change_password(
     data: UserPasswordChange,
     current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    if not verify_password(data.current_password, current_user.hashed_password):
+    # bcrypt is deliberately slow; keep it off the event loop.
+    if not await run_in_threadpool(verify_password, data.current_password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Current password is incorrect")
-    current_user.hashed_password = hash_password(data.new_password)
+    current_user.hashed_password = await run_in_threadpool(hash_password, data.new_password)
     # Revoke existing sessions so a stolen refresh token can't outlive the reset.
-    db.query(RefreshTokenDB).filter_by(user_id=current_user.id, is_active=True).update(
-        {"is_active": False, "revoked": True}
+    await db.execute(
+        update(RefreshTokenDB)
+        .where(RefreshTokenDB.user_id == current_user.id, RefreshTokenDB.is_active == True)
+        .values(is_active=False, revoked=True)
     )
-    db.commit()
+    await db.commit()
     return {"message": "Password updated successfully"}
 
 @router.post("/me/avatar", response_model=UserResponse)
 async def upload_avatar(
     file: UploadFile = File(...),
     current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     MAX_AVATAR_SIZE = 10 * 1024 * 1024  # 10MB
     contents = await file.read()
@@ -200,12 +214,13 @@ async def upload_avatar(
     with open(path, "wb") as f:
         f.write(contents)
     current_user.avatar_url = f"/media/{filename}"
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    response_cache.invalidate("articles", f"user:{current_user.username}")
     return current_user
 
 @router.get("/me/notification-prefs", response_model=NotificationPrefs)
-async def get_notification_prefs(current_user: UserDB = Depends(get_current_user)):
+async def get_notification_prefs(current_user: Principal = Depends(get_current_principal)):
     return current_user
 
 
@@ -213,20 +228,40 @@ async def get_notification_prefs(current_user: UserDB = Depends(get_current_user
 async def update_notification_prefs(
     prefs: NotificationPrefs,
     current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     current_user.notify_likes = prefs.notify_likes
     current_user.notify_comments = prefs.notify_comments
     current_user.notify_follows = prefs.notify_follows
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    principal_cache.invalidate(current_user.id)
+    await db.refresh(current_user)
     return current_user
 
 
-def _build_public_profile(db: Session, user: UserDB, current_user: Optional[UserDB]) -> UserPublicProfile:
+@router.get("/me/viewer-state", response_model=ViewerState)
+async def my_viewer_state(
+    article_ids: List[int] = Query(default=[]),
+    author_ids: List[int] = Query(default=[]),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Liked/bookmarked flags for a page of articles and following flags for its authors.
+
+    Pass each id as a repeated query param (``?article_ids=1&article_ids=2``),
+    up to ``MAX_VIEWER_STATE_IDS`` of each, instead of one status call per card.
+    """
+    if len(article_ids) > MAX_VIEWER_STATE_IDS or len(author_ids) > MAX_VIEWER_STATE_IDS:
+        raise HTTPException(
+            status_code=400, detail=f"At most {MAX_VIEWER_STATE_IDS} article and author ids per request"
+        )
+    return await db.run_sync(get_viewer_state, current_user.id, article_ids, author_ids)
+
+
+def _build_public_profile(db: Session, user: UserDB, current_user: Optional[Principal]) -> UserPublicProfile:
     """Serialize a user to UserPublicProfile with aggregate follower/story counts."""
     profile = UserPublicProfile.model_validate(user)
-    profile.followers_count = db.query(FollowDB).filter(FollowDB.followed_id == user.id).count()
+    profile.followers_count = user.followers_count
     profile.following_count = db.query(FollowDB).filter(FollowDB.follower_id == user.id).count()
     profile.articles_count = (
         db.query(ArticleDB)
@@ -246,199 +281,226 @@ def _build_public_profile(db: Session, user: UserDB, current_user: Optional[User
 @router.get("/{username}/profile", response_model=UserPublicProfile)
 async def get_public_profile(
     username: str,
-    db: Session = Depends(get_db),
-    current_user: Optional[UserDB] = Depends(get_optional_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user: Optional[Principal] = Depends(get_optional_principal),
 ):
-    user = get_user_by_username(db, username)
+    user = await db.run_sync(get_user_by_username, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    return _build_public_profile(db, user, current_user)
+    return await db.run_sync(_build_public_profile, user, current_user)
 
 
 @router.post("/{username}/follow", status_code=status.HTTP_200_OK)
 async def follow_user(
     username: str,
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Follow another user."""
-    target = get_user_by_username(db, username)
+    target = await db.run_sync(get_user_by_username, username)
     if not target:
         raise HTTPException(status_code=404, detail="User not found")
     if target.id == current_user.id:
         raise HTTPException(status_code=400, detail="You cannot follow yourself")
 
     try:
-        db.add(FollowDB(follower_id=current_user.id, followed_id=target.id))
-        db.commit()
+        followers = await db.run_sync(follow, current_user.id, target.id)
+        await db.commit()
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Already following this user")
+    response_cache.invalidate(f"user:{target.username}", f"user:{current_user.username}")
+
+    notification_outbox.enqueue(
+        target.id,
+        "{actors} started following you",
+        notif_type="follow",
+        extra_data={"follower_username": current_user.username},
+        group_key="follow",
+        actor=current_user.username,
+    )
 
-    try:
-        await send_notification_to_user(
-            db=db,
-            user_id=target.id,
-            message=f"{current_user.username} started following you",
-            notif_type="follow",
-            extra_data={"follower_username": current_user.username},
-        )
-    except Exception:
-        pass  # notification failure must not fail the follow
-
-    followers = db.query(FollowDB).filter(FollowDB.followed_id == target.id).count()
     return {"detail": f"Now following {target.username}", "followers_count": followers}
 
 
 @router.delete("/{username}/follow", status_code=status.HTTP_200_OK)
 async def unfollow_user(
     username: str,
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Unfollow a user."""
-    target = get_user_by_username(db, username)
+    target = await db.run_sync(get_user_by_username, username)
     if not target:
         raise HTTPException(status_code=404, detail="User not found")
 
-    follow = db.query(FollowDB).filter(
-        FollowDB.follower_id == current_user.id, FollowDB.followed_id == target.id
-    ).one_or_none()
-    if follow is None:
+    followers = await db.run_sync(unfollow, current_user.id, target.id)
+    if followers is None:
         raise HTTPException(status_code=400, detail="You are not following this user")
-
-    db.delete(follow)
-    db.commit()
-    followers = db.query(FollowDB).filter(FollowDB.followed_id == target.id).count()
+    await db.commit()
+    response_cache.invalidate(f"user:{target.username}", f"user:{current_user.username}")
     return {"detail": f"Unfollowed {target.username}", "followers_count": followers}
 
 
+async def _follow_page(
+    db: AsyncSession, request: Request, response: Response, query, skip: int, limit: int,
+    after: Optional[str],
+) -> List[UserDB]:
+    """Page a ``(UserDB, FollowDB.id)`` select newest-follow first, by cursor or offset."""
+    if after:
+        query = query.where(after_cursor((FollowDB.id,), after))
+        skip = 0
+    rows = (await db.execute(query.order_by(FollowDB.id.desc()).offset(max(0, skip)).limit(limit))).all()
+    set_next_cursor(request, response, next_cursor(rows, limit, lambda row: (row[1],)))
+    return [user for user, _ in rows]
+
+
 @router.get("/{username}/followers", response_model=List[FollowUserEntry])
-async def list_followers(username: str, db: Session = Depends(get_db), skip: int = 0, limit: int = 50):
-    """Users who follow the given user."""
-    user = get_user_by_username(db, username)
+async def list_followers(
+    username: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = 50,
+    after: Optional[str] = None,
+):
+    """Users who follow the given user, most recent first."""
+    user = await db.run_sync(get_user_by_username, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     limit = min(100, max(1, limit))
-    rows = (
-        db.query(UserDB)
+    query = (
+        select(UserDB, FollowDB.id)
         .join(FollowDB, FollowDB.follower_id == UserDB.id)
-        .filter(FollowDB.followed_id == user.id)
-        .offset(max(0, skip)).limit(limit).all()
+        .where(FollowDB.followed_id == user.id)
     )
-    return rows
+    return await _follow_page(db, request, response, query, skip, limit, after)
 
 
 @router.get("/{username}/following", response_model=List[FollowUserEntry])
-async def list_following(username: str, db: Session = Depends(get_db), skip: int = 0, limit: int = 50):
-    """Users the given user follows."""
-    user = get_user_by_username(db, username)
+async def list_following(
+    username: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = 50,
+    after: Optional[str] = None,
+):
+    """Users the given user follows, most recent first."""
+    user = await db.run_sync(get_user_by_username, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     limit = min(100, max(1, limit))
-    rows = (
-        db.query(UserDB)
+    query = (
+        select(UserDB, FollowDB.id)
         .join(FollowDB, FollowDB.followed_id == UserDB.id)
-        .filter(FollowDB.follower_id == user.id)
-        .offset(max(0, skip)).limit(limit).all()
+        .where(FollowDB.follower_id == user.id)
     )
-    return rows
+    return await _follow_page(db, request, response, query, skip, limit, after)
 
 
-@router.get("/{username}/articles", response_model=List[ArticleResponse])
+@router.get("/{username}/articles", response_model=List[ArticleCard])
 async def get_user_articles(
     username: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
     limit: int = 20,
+    after: Optional[str] = None,
+    full: bool = False,
 ):
     """Return published articles for a given user (public)."""
-    user = get_user_by_username(db, username)
+    user = await db.run_sync(get_user_by_username, username)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    articles = (
-        db.query(ArticleDB)
-        .filter(ArticleDB.author_id == user.id, ArticleDB.status == ArticleStatus.PUBLISHED)
-        .order_by(ArticleDB.id.desc())
-        .offset(max(0, skip))
-        .limit(min(100, max(1, limit)))
-        .all()
+    limit = min(100, max(1, limit))
+    query = select(ArticleDB).options(*card_options(full)).where(
+        ArticleDB.author_id == user.id, ArticleDB.status == ArticleStatus.PUBLISHED
     )
-    return articles or []
+    if after:
+        query = query.where(after_cursor((ArticleDB.id,), after))
+        skip = 0
+    articles = (await db.scalars(query.order_by(ArticleDB.id.desc()).offset(max(0, skip)).limit(limit))).all()
+    set_next_cursor(request, response, next_cursor(articles, limit, lambda a: (a.id,)))
+    return article_cards(articles, full)
 
 
 @router.put("/me/pin/{article_id}", response_model=UserPublicProfile)
 async def pin_article(
     article_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDB = Depends(get_current_user),
 ):
     """Pin one of your own published stories to the top of your profile."""
-    article = db.query(ArticleDB).filter(ArticleDB.id == article_id).first()
+    article = await db.get(ArticleDB, article_id)
     if not article or article.author_id != current_user.id:
         raise HTTPException(status_code=404, detail="Article not found")
     if article.status != ArticleStatus.PUBLISHED:
         raise HTTPException(status_code=400, detail="Only published stories can be pinned")
     current_user.pinned_article_id = article_id
-    db.commit()
-    db.refresh(current_user)
-    return _build_public_profile(db, current_user, current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    response_cache.invalidate(f"user:{current_user.username}")
+    return await db.run_sync(_build_public_profile, current_user, current_user)
 
 
 @router.delete("/me/pin", response_model=UserPublicProfile)
 async def unpin_article(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDB = Depends(get_current_user),
 ):
     """Remove the pinned story from your profile."""
     current_user.pinned_article_id = None
-    db.commit()
-    db.refresh(current_user)
-    return _build_public_profile(db, current_user, current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    response_cache.invalidate(f"user:{current_user.username}")
+    return await db.run_sync(_build_public_profile, current_user, current_user)
 
 
 @router.get("/me/sessions", response_model=List[RefreshTokenResponse])
 async def list_my_sessions(
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """The caller's active sessions (live refresh tokens), newest first."""
-    return (
-        db.query(RefreshTokenDB)
-        .filter(RefreshTokenDB.user_id == current_user.id, RefreshTokenDB.is_active == True)
+    return (await db.scalars(
+        select(RefreshTokenDB)
+        .where(RefreshTokenDB.user_id == current_user.id, RefreshTokenDB.is_active == True)
         .order_by(RefreshTokenDB.created_at.desc())
-        .all()
-    )
+    )).all()
 
 
 @router.delete("/me/sessions/{session_id}")
 async def revoke_my_session(
     session_id: int,
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Revoke one of the caller's own sessions."""
-    token = db.query(RefreshTokenDB).filter(
+    token = await db.scalar(select(RefreshTokenDB).where(
         RefreshTokenDB.id == session_id, RefreshTokenDB.user_id == current_user.id
-    ).first()
+    ))
     if not token:
         raise HTTPException(status_code=404, detail="Session not found")
     token.is_active = False
     token.revoked = True
-    db.commit()
+    await db.commit()
     return {"detail": "Session revoked"}
 
 
 @router.get("/me/export")
 async def export_my_data(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDB = Depends(get_current_user),
 ):
     """Export the caller's profile, stories, and comments as JSON."""
     from app.models.comment import CommentDB
 
-    articles = db.query(ArticleDB).filter(ArticleDB.author_id == current_user.id).all()
-    comments = db.query(CommentDB).filter(CommentDB.user_id == current_user.id).all()
+    articles = (await db.scalars(select(ArticleDB).where(ArticleDB.author_id == current_user.id))).all()
+    comments = (await db.scalars(select(CommentDB).where(CommentDB.user_id == current_user.id))).all()
     return {
         "profile": {
             "username": current_user.username,
@@ -469,58 +531,68 @@ async def export_my_data(
 @router.delete("/me")
 async def delete_my_account(
     data: AccountDelete,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDB = Depends(get_current_user),
 ):
     """Delete the caller's own account (password-confirmed soft delete)."""
-    if not verify_password(data.password, current_user.hashed_password):
+    if not await run_in_threadpool(verify_password, data.password, current_user.hashed_password):
         raise HTTPException(status_code=400, detail="Password is incorrect")
-    delete_user_from_db(db, current_user.id)
+    await db.run_sync(delete_user_from_db, current_user.id)
     return {"detail": "Account deleted"}
 
 
 @router.delete("/me/avatar", response_model=UserResponse)
 async def remove_avatar(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserDB = Depends(get_current_user),
 ):
     """Remove the caller's avatar, reverting to the initials fallback."""
     current_user.avatar_url = None
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(current_user)
+    response_cache.invalidate("articles", f"user:{current_user.username}")
     return current_user
 
 
-@router.get("/me/history", response_model=List[ArticleResponse])
+@router.get("/me/history", response_model=List[ArticleCard])
 async def my_reading_history(
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
     limit: int = 30,
+    after: Optional[str] = None,
+    full: bool = False,
 ):
     """Recently viewed stories, most recent first."""
     limit = min(100, max(1, limit))
-    rows = (
-        db.query(ArticleDB)
+    key = (ViewHistoryDB.viewed_at, ViewHistoryDB.id)
+    query = (
+        select(ArticleDB, ViewHistoryDB.viewed_at, ViewHistoryDB.id)
+        .options(*card_options(full))
         .join(ViewHistoryDB, ViewHistoryDB.article_id == ArticleDB.id)
-        .filter(
+        .where(
             ViewHistoryDB.user_id == current_user.id,
             ArticleDB.status == ArticleStatus.PUBLISHED,
         )
-        .order_by(ViewHistoryDB.viewed_at.desc())
-        .limit(limit)
-        .all()
     )
-    return rows
+    if after:
+        query = query.where(after_cursor(key, after))
+    rows = (await db.execute(query.order_by(*(col.desc() for col in key)).limit(limit))).all()
+    set_next_cursor(request, response, next_cursor(rows, limit, lambda row: row[1:]))
+    return article_cards([article for article, _, _ in rows], full)
 
 
 @router.delete("/me/history")
 async def clear_reading_history(
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Clear the caller's reading history."""
-    deleted = db.query(ViewHistoryDB).filter(ViewHistoryDB.user_id == current_user.id).delete(
-        synchronize_session=False
-    )
-    db.commit()
+    deleted = (await db.execute(
+        delete(ViewHistoryDB)
+        .where(ViewHistoryDB.user_id == current_user.id)
+        .execution_options(synchronize_session=False)
+    )).rowcount
+    await db.commit()
     return {"detail": f"Cleared {deleted} entries"}
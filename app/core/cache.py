@@ -0,0 +1,325 @@
+"""Response cache for public, anonymous GET endpoints.
+
+Cacheable routes are declared as ``CacheRule`` entries (path pattern, TTL and
+invalidation tags); ``ResponseCacheMiddleware`` serves a stored copy of a
+matching 200 response to anonymous requests, keyed by the path plus its
+normalized query string. Write paths call ``response_cache.invalidate(tag)``
+after committing, so stale entries drop out without waiting for the TTL.
+
+Backends are pluggable: an in-process LRU (the default; each worker keeps and
+invalidates its own copy, with the TTL bounding cross-worker staleness) or a
+shared Redis-compatible store, which any client exposing ``get``/``set``/
+``sadd``/``smembers``/``expire``/``delete`` can stand in for.
+"""
+import base64
+import json
+import logging
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Response headers never replayed from the cache: hop-by-hop headers belong to
+# the original connection, cookies to the original client, and the length is
+# recomputed from the stored body. Everything else the route set (pagination
+# headers, links, content type) is stored; headers added by the outer
+# middleware (dates, security headers, CORS) are not seen here and are added
+# fresh on a hit.
+UNSTORED_HEADERS = frozenset({
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailer",
+    "transfer-encoding",
+    "upgrade",
+    "set-cookie",
+    "content-length",
+})
+
+
+@dataclass
+class CachedResponse:
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+
+    def to_bytes(self) -> bytes:
+        return json.dumps({
+            "status_code": self.status_code,
+            "headers": self.headers,
+            "body": base64.b64encode(self.body).decode("ascii"),
+        }).encode()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CachedResponse":
+        data = json.loads(raw)
+        return cls(data["status_code"], [tuple(h) for h in data["headers"]], base64.b64decode(data["body"]))
+
+
+class CacheBackend(ABC):
+    """Storage interface: keyed entries with a TTL and invalidation tags."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[CachedResponse]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: CachedResponse, ttl: int, tags: Sequence[str]) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate(self, tags: Sequence[str]) -> int:
+        """Drop every entry carrying any of ``tags``; returns how many were dropped."""
+
+    def size(self) -> Optional[int]:
+        return None
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-process LRU with per-entry expiry and a tag index."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, CachedResponse, Sequence[str]]]" = OrderedDict()
+        self._tags: Dict[str, Set[str]] = {}
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, _ = entry
+            if expires_at <= time.monotonic():
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: CachedResponse, ttl: int, tags: Sequence[str]) -> None:
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+
+    def invalidate(self, tags: Sequence[str]) -> int:
+        with self._lock:
+            keys = set().union(*(self._tags.pop(tag, set()) for tag in tags))
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache(CacheBackend):
+    """Shared store: entries as expiring strings, tags as sets of entry keys."""
+
+    def __init__(self, client, prefix: str = "respcache:") -> None:
+        self.client = client
+        self.prefix = prefix
+
+    @classmethod
+    def from_url(cls, url: str) -> "RedisCache":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package") from exc
+        return cls(redis.Redis.from_url(url))
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        raw = self.client.get(self.prefix + key)
+        return CachedResponse.from_bytes(raw) if raw is not None else None
+
+    def set(self, key: str, value: CachedResponse, ttl: int, tags: Sequence[str]) -> None:
+        self.client.set(self.prefix + key, value.to_bytes(), ex=ttl)
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            self.client.sadd(tag_key, key)
+            # A tag set only needs to outlive the entries it points at.
+            self.client.expire(tag_key, ttl)
+
+    def invalidate(self, tags: Sequence[str]) -> int:
+        dropped = 0
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            keys = [k.decode() if isinstance(k, bytes) else k for k in self.client.smembers(tag_key)]
+            if keys:
+                dropped += self.client.delete(*(self.prefix + k for k in keys))
+            self.client.delete(tag_key)
+        return dropped
+
+
+@dataclass
+class CacheRule:
+    """A cacheable GET route: path regex, TTL, and tag templates.
+
+    Tag templates are formatted with the pattern's named groups, e.g.
+    ``"user:{username}"`` for ``^/users/(?P<username>[^/]+)/profile$``.
+    """
+
+    pattern: str
+    ttl: int
+    tags: Tuple[str, ...]
+    _regex: "re.Pattern" = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._regex = re.compile(self.pattern)
+
+    def match(self, path: str) -> Optional[List[str]]:
+        m = self._regex.match(path)
+        if m is None:
+            return None
+        # Usernames are stored lowercase; match the tags write paths fire.
+        params = {k: v.lower() for k, v in m.groupdict().items()}
+        return [tag.format(**params) for tag in self.tags]
+
+
+def cache_key(request: Request) -> str:
+    """Path plus query params with blanks dropped and keys sorted."""
+    params = sorted(parse_qsl(request.url.query, keep_blank_values=False))
+    return f"{request.url.path}?{urlencode(params)}"
+
+
+class ResponseCache:
+    """A backend plus hit/miss accounting; the app-wide instance is ``response_cache``."""
+
+    def __init__(self, backend: Optional[CacheBackend]) -> None:
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        try:
+            value = self.backend.get(key)
+        except Exception:
+            logger.warning("Response cache read failed", exc_info=True)
+            value = None
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: CachedResponse, ttl: int, tags: Sequence[str]) -> None:
+        try:
+            self.backend.set(key, value, ttl, tags)
+        except Exception:
+            logger.warning("Response cache write failed", exc_info=True)
+
+    def invalidate(self, *tags: str) -> None:
+        """Drop cached responses carrying any of ``tags``. Call after committing."""
+        if not self.enabled or not tags:
+            return
+        try:
+            dropped = self.backend.invalidate(tags)
+        except Exception:
+            logger.warning(f"Response cache invalidation failed for {tags}", exc_info=True)
+            return
+        with self._lock:
+            self.invalidations += dropped
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__ if self.backend else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidated_entries": self.invalidations,
+                "entries": self.backend.size() if self.backend else 0,
+            }
+
+
+class ResponseCacheMiddleware(BaseHTTPMiddleware):
+    """Serve and store anonymous GET responses for the routes in ``rules``."""
+
+    def __init__(self, app, cache: ResponseCache, rules: Sequence[CacheRule]) -> None:
+        super().__init__(app)
+        self.cache = cache
+        self.rules = rules
+
+    async def dispatch(self, request: Request, call_next):
+        if (
+            not self.cache.enabled
+            or request.method != "GET"
+            or "authorization" in request.headers
+        ):
+            return await call_next(request)
+        for rule in self.rules:
+            tags = rule.match(request.url.path)
+            if tags is not None:
+                break
+        else:
+            return await call_next(request)
+
+        key = cache_key(request)
+        cached = self.cache.get(key)
+        if cached is not None:
+            response = Response(content=cached.body, status_code=cached.status_code)
+            for name, value in cached.headers:
+                response.headers.append(name, value)
+            response.headers["X-Cache"] = "HIT"
+            return response
+
+        response = await call_next(request)
+        if response.status_code != 200:
+            return response
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        headers = [(k, v) for k, v in response.headers.items() if k not in UNSTORED_HEADERS]
+        self.cache.set(key, CachedResponse(200, headers, body), rule.ttl, tags)
+        replay = Response(content=body, status_code=200)
+        for name, value in response.headers.items():
+            if name != "content-length":
+                replay.headers.append(name, value)
+        replay.headers["X-Cache"] = "MISS"
+        return replay
+
+
+def build_backend() -> Optional[CacheBackend]:
+    backend = settings.RESPONSE_CACHE_BACKEND
+    if backend == "memory":
+        return MemoryCache(settings.RESPONSE_CACHE_MAX_ENTRIES)
+    if backend == "redis":
+        return RedisCache.from_url(settings.RESPONSE_CACHE_REDIS_URL)
+    return None
+
+
+response_cache = ResponseCache(build_backend())
@@ -6,6 +6,7 @@ scattered ``os.getenv`` calls. Module-level aliases are exported for concise
 imports at call sites.
 """
 import os
+import re
 import warnings
 
 from dotenv import load_dotenv
@@ -21,6 +22,24 @@ class Settings:
         self.SECRET_KEY: str = self._require("SECRET_KEY")
         self.ALGORITHM: str = "HS256"
 
+        # Streaming replicas for read-only routes (comma-separated; empty means
+        # everything reads from the primary). A replica is skipped while it is
+        # unreachable or more than REPLICA_MAX_LAG_SECONDS behind, as measured
+        # every REPLICA_HEALTH_CHECK_SECONDS; a client's reads stay on the primary
+        # for REPLICA_STICKY_SECONDS after each of its writes.
+        self.DATABASE_REPLICA_URLS: list[str] = [
+            u.strip() for u in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if u.strip()
+        ]
+        self.REPLICA_MAX_LAG_SECONDS: int = self._bounded_int(
+            "REPLICA_MAX_LAG_SECONDS", default=5, lo=0, hi=3600
+        )
+        self.REPLICA_HEALTH_CHECK_SECONDS: int = self._bounded_int(
+            "REPLICA_HEALTH_CHECK_SECONDS", default=5, lo=1, hi=300
+        )
+        self.REPLICA_STICKY_SECONDS: int = self._bounded_int(
+            "REPLICA_STICKY_SECONDS", default=10, lo=0, hi=3600
+        )
+
         self.ACCESS_TOKEN_EXPIRE_MINUTES: int = self._bounded_int(
             "ACCESS_TOKEN_EXPIRE_MINUTES", default=30, lo=1, hi=1440
         )
@@ -34,6 +53,152 @@ class Settings:
             h.strip() for h in os.getenv("ALLOWED_HOSTS", "*").split(",") if h.strip()
         ]
 
+        # SQL instrumentation: statements slower than this are logged (0 disables),
+        # and a request running one statement shape at least this many times is
+        # flagged as a probable N+1 (0 disables).
+        self.SQL_SLOW_QUERY_MS: int = self._bounded_int(
+            "SQL_SLOW_QUERY_MS", default=200, lo=0, hi=600000
+        )
+        self.SQL_N_PLUS_ONE_THRESHOLD: int = self._bounded_int(
+            "SQL_N_PLUS_ONE_THRESHOLD", default=10, lo=0, hi=10000
+        )
+
+        # Bearer token required to scrape /metrics (empty leaves it open, e.g.
+        # behind a private network).
+        self.METRICS_TOKEN: str = os.getenv("METRICS_TOKEN", "")
+
+        # Write-behind view counting: buffered views are flushed on this
+        # interval, or sooner once this many distinct entries are pending.
+        self.VIEW_FLUSH_INTERVAL_SECONDS: int = self._bounded_int(
+            "VIEW_FLUSH_INTERVAL_SECONDS", default=5, lo=1, hi=300
+        )
+        self.VIEW_FLUSH_MAX_PENDING: int = self._bounded_int(
+            "VIEW_FLUSH_MAX_PENDING", default=1000, lo=1, hi=100000
+        )
+
+        # How often trending hot scores are decayed and recomputed.
+        self.HOT_SCORE_REFRESH_SECONDS: int = self._bounded_int(
+            "HOT_SCORE_REFRESH_SECONDS", default=300, lo=10, hi=86400
+        )
+
+        # Related articles: changed stories are recomputed on this interval, and
+        # each pass also re-scores this many of the stalest published stories.
+        self.RELATED_REFRESH_SECONDS: int = self._bounded_int(
+            "RELATED_REFRESH_SECONDS", default=60, lo=5, hi=86400
+        )
+        self.RELATED_SWEEP_BATCH: int = self._bounded_int(
+            "RELATED_SWEEP_BATCH", default=50, lo=0, hi=10000
+        )
+
+        # Home timelines: stories by authors with more followers than this are
+        # merged in at read time instead of being copied to every follower.
+        self.TIMELINE_FANOUT_MAX_FOLLOWERS: int = self._bounded_int(
+            "TIMELINE_FANOUT_MAX_FOLLOWERS", default=5000, lo=0, hi=10000000
+        )
+        # An author over that threshold is fanned out again only once back down
+        # to TIMELINE_FANOUT_RESUME_FOLLOWERS, by a background backfill pass run
+        # every TIMELINE_RESUME_SECONDS.
+        self.TIMELINE_FANOUT_RESUME_FOLLOWERS: int = self._bounded_int(
+            "TIMELINE_FANOUT_RESUME_FOLLOWERS",
+            default=self.TIMELINE_FANOUT_MAX_FOLLOWERS * 9 // 10,
+            lo=0,
+            hi=self.TIMELINE_FANOUT_MAX_FOLLOWERS,
+        )
+        self.TIMELINE_RESUME_SECONDS: int = self._bounded_int(
+            "TIMELINE_RESUME_SECONDS", default=60, lo=5, hi=86400
+        )
+
+        # Notification outbox: worker tasks draining it, and the most events one
+        # worker stores per INSERT.
+        self.NOTIFICATION_WORKERS: int = self._bounded_int(
+            "NOTIFICATION_WORKERS", default=2, lo=1, hi=32
+        )
+        self.NOTIFICATION_BATCH_SIZE: int = self._bounded_int(
+            "NOTIFICATION_BATCH_SIZE", default=200, lo=1, hi=5000
+        )
+        # Like/comment/follow notifications on the same target merge into one
+        # unread notification while its latest event is younger than this.
+        self.NOTIFICATION_COALESCE_SECONDS: int = self._bounded_int(
+            "NOTIFICATION_COALESCE_SECONDS", default=21600, lo=1, hi=604800
+        )
+
+        # Notification retention: read notifications older than the first age and
+        # unread ones older than the second are pruned, this many rows per batch,
+        # on this interval.
+        self.NOTIFICATION_READ_RETENTION_DAYS: int = self._bounded_int(
+            "NOTIFICATION_READ_RETENTION_DAYS", default=90, lo=1, hi=3650
+        )
+        self.NOTIFICATION_UNREAD_RETENTION_DAYS: int = self._bounded_int(
+            "NOTIFICATION_UNREAD_RETENTION_DAYS", default=365, lo=1, hi=3650
+        )
+        if self.NOTIFICATION_UNREAD_RETENTION_DAYS < self.NOTIFICATION_READ_RETENTION_DAYS:
+            raise ValueError(
+                "NOTIFICATION_UNREAD_RETENTION_DAYS must be at least NOTIFICATION_READ_RETENTION_DAYS."
+            )
+        self.NOTIFICATION_RETENTION_BATCH: int = self._bounded_int(
+            "NOTIFICATION_RETENTION_BATCH", default=5000, lo=1, hi=100000
+        )
+        self.NOTIFICATION_RETENTION_SECONDS: int = self._bounded_int(
+            "NOTIFICATION_RETENTION_SECONDS", default=3600, lo=60, hi=86400
+        )
+
+        # Counter reconciliation: how often denormalized engagement counters are
+        # checked against their source rows, and how many articles per pass.
+        self.COUNTER_RECONCILE_SECONDS: int = self._bounded_int(
+            "COUNTER_RECONCILE_SECONDS", default=300, lo=10, hi=86400
+        )
+        self.COUNTER_RECONCILE_BATCH: int = self._bounded_int(
+            "COUNTER_RECONCILE_BATCH", default=1000, lo=1, hi=100000
+        )
+
+        # Response cache for anonymous public GETs: "memory" (per-process LRU),
+        # "redis" (shared, needs RESPONSE_CACHE_REDIS_URL) or "off".
+        self.RESPONSE_CACHE_BACKEND: str = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+        if self.RESPONSE_CACHE_BACKEND not in {"memory", "redis", "off"}:
+            raise ValueError("RESPONSE_CACHE_BACKEND must be one of: memory, redis, off.")
+        self.RESPONSE_CACHE_REDIS_URL: str = os.getenv("RESPONSE_CACHE_REDIS_URL", "")
+        if self.RESPONSE_CACHE_BACKEND == "redis" and not self.RESPONSE_CACHE_REDIS_URL:
+            raise ValueError("RESPONSE_CACHE_REDIS_URL is required when RESPONSE_CACHE_BACKEND=redis.")
+        self.RESPONSE_CACHE_MAX_ENTRIES: int = self._bounded_int(
+            "RESPONSE_CACHE_MAX_ENTRIES", default=2000, lo=1, hi=1000000
+        )
+
+        # Authenticated-principal cache: seconds a resolved user (id, role,
+        # flags, prefs) is reused without a query (0 disables), and how many.
+        self.PRINCIPAL_CACHE_TTL_SECONDS: int = self._bounded_int(
+            "PRINCIPAL_CACHE_TTL_SECONDS", default=30, lo=0, hi=3600
+        )
+        self.PRINCIPAL_CACHE_MAX_ENTRIES: int = self._bounded_int(
+            "PRINCIPAL_CACHE_MAX_ENTRIES", default=10000, lo=1, hi=1000000
+        )
+
+        # WebSocket backplane fanning pushes out to every worker's sockets:
+        # "memory" (single worker) or "postgres" (LISTEN/NOTIFY on DATABASE_URL).
+        self.WS_BACKPLANE: str = os.getenv("WS_BACKPLANE", "memory").lower()
+        if self.WS_BACKPLANE not in {"memory", "postgres"}:
+            raise ValueError("WS_BACKPLANE must be one of: memory, postgres.")
+        # Principal-cache invalidations use "<channel>_principals", which must
+        # still fit Postgres' 63-byte identifier limit.
+        self.WS_BACKPLANE_CHANNEL: str = os.getenv("WS_BACKPLANE_CHANNEL", "quill_ws")
+        if not re.fullmatch(r"[a-z_][a-z0-9_]{0,51}", self.WS_BACKPLANE_CHANNEL):
+            raise ValueError(
+                "WS_BACKPLANE_CHANNEL must be a lowercase identifier (letters, digits, _) "
+                "of at most 52 characters."
+            )
+        # Per-connection outbound queue (a socket that falls this far behind is
+        # closed), heartbeat ping interval, and silence before a socket is reaped.
+        self.WS_SEND_QUEUE_SIZE: int = self._bounded_int(
+            "WS_SEND_QUEUE_SIZE", default=100, lo=1, hi=10000
+        )
+        self.WS_PING_INTERVAL_SECONDS: int = self._bounded_int(
+            "WS_PING_INTERVAL_SECONDS", default=25, lo=1, hi=300
+        )
+        self.WS_IDLE_TIMEOUT_SECONDS: int = self._bounded_int(
+            "WS_IDLE_TIMEOUT_SECONDS", default=60, lo=2, hi=3600
+        )
+        if self.WS_IDLE_TIMEOUT_SECONDS <= self.WS_PING_INTERVAL_SECONDS:
+            raise ValueError("WS_IDLE_TIMEOUT_SECONDS must exceed WS_PING_INTERVAL_SECONDS.")
+
         os.makedirs(self.UPLOAD_FOLDER, exist_ok=True)
 
         if len(self.SECRET_KEY) < 32:
@@ -0,0 +1,70 @@
+"""Periodic background jobs.
+
+A job wraps a synchronous callable — typically one that opens its own database
+session — and runs it in a worker thread on a fixed interval, so blocking DB
+work never stalls the event loop. Jobs can also be woken early (e.g. when a
+buffer fills) from any thread. ``app.main`` starts and stops them from the
+``lifespan`` hook.
+"""
+import asyncio
+import logging
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    """Run ``func`` every ``interval_seconds`` (or sooner when woken)."""
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable[[], object],
+        interval_seconds: float,
+        run_on_stop: bool = False,
+    ) -> None:
+        self.name = name
+        self.func = func
+        self.interval_seconds = interval_seconds
+        self.run_on_stop = run_on_stop
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Schedule the job on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run(), name=f"job:{self.name}")
+
+    def wake(self) -> None:
+        """Run the job as soon as possible. Safe to call from any thread."""
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def stop(self) -> None:
+        """Cancel the schedule; run once more when ``run_on_stop`` is set."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.run_on_stop:
+            await self._run_once()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self._run_once()
+
+    async def _run_once(self) -> None:
+        try:
+            await asyncio.to_thread(self.func)
+        except Exception:
+            logger.error(f"Background job '{self.name}' failed", exc_info=True)
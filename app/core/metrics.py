@@ -0,0 +1,194 @@
+"""Prometheus-style metrics in the text exposition format.
+
+``MetricsMiddleware`` records every HTTP request under its route template
+(``/articles/{article_id}``, never the raw path, so ids cannot blow up the
+label set): a request counter by status, latency and response-size
+histograms, and the number of requests in flight. ``/metrics``
+(``app.api.routes.metrics``) renders those together with gauges read at scrape
+time from the rest of the app.
+
+Metrics are per process; with several workers, scrape each one. No client
+library is involved: the primitives below are updated and rendered on the
+event loop only, so they need no locks.
+"""
+import bisect
+import math
+import time
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets (seconds) and response-size buckets (bytes).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+
+# Route label for requests no route matched (404s for arbitrary paths).
+UNMATCHED_ROUTE = "unmatched"
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value) -> str:
+    if value is None:
+        return "NaN"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(value)
+
+
+def family(
+    name: str, kind: str, help_text: str, samples: Iterable[Tuple[Dict[str, str], object]]
+) -> List[str]:
+    """Exposition lines for one metric: ``samples`` are ``(labels, value)`` pairs."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_labels(list(labels), list(labels.values()))} {_number(value)}")
+    return lines
+
+
+class Counter:
+    """Monotonic count per label set."""
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str]) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge:
+    """A value that goes up and down, without labels."""
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.value = 0
+
+    def render(self) -> List[str]:
+        return family(self.name, "gauge", self.help_text, [({}, self.value)])
+
+
+class Histogram:
+    """Bucketed observations per label set (cumulative ``le`` buckets on render)."""
+
+    def __init__(
+        self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float]
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts (last is +Inf), sum]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = 'le="' + _number(float(bound)) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {round(total, 6)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class HTTPMetrics:
+    """Per-route request metrics, fed by ``MetricsMiddleware``."""
+
+    def __init__(self) -> None:
+        self.requests = Counter(
+            "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+        )
+        self.latency = Histogram(
+            "http_request_duration_seconds",
+            "Time from request to last response byte, by route.",
+            ("method", "route"),
+            LATENCY_BUCKETS,
+        )
+        self.response_size = Histogram(
+            "http_response_size_bytes", "Response body size by route.", ("method", "route"), SIZE_BUCKETS
+        )
+        self.in_flight = Gauge("http_requests_in_flight", "HTTP requests being served right now.")
+
+    def render(self) -> List[str]:
+        return (
+            self.requests.render()
+            + self.latency.render()
+            + self.response_size.render()
+            + self.in_flight.render()
+        )
+
+
+class MetricsMiddleware:
+    """Record each HTTP request's route, status, latency and response size.
+
+    Plain ASGI: it only counts body bytes on their way out, never buffers them.
+    """
+
+    def __init__(self, app, metrics: HTTPMetrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_counting(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.metrics.in_flight.value += 1
+        try:
+            await self.app(scope, receive, send_counting)
+        finally:
+            self.metrics.in_flight.value -= 1
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            self.metrics.requests.inc((method, route, str(status)))
+            self.metrics.latency.observe((method, route), time.perf_counter() - started)
+            self.metrics.response_size.observe((method, route), size)
+
+
+def render(sections: Iterable[List[str]]) -> str:
+    """Join rendered metric families into one exposition document."""
+    return "\n".join(line for section in sections for line in section) + "\n"
+
+
+http_metrics = HTTPMetrics()
@@ -0,0 +1,210 @@
+"""Authenticated-principal cache: who a token belongs to, without a query.
+
+A ``Principal`` is the slice of a user that authorization needs — id,
+username, role, active/verified flags and notification preferences. Every
+authenticated request resolves one, so ``principal_cache`` keeps them in a
+bounded in-process LRU with a short TTL. Routes that only need identity depend
+on the principal (``app.api.deps.get_current_principal``) and never touch the
+database on a hit.
+
+Write paths that change any of those fields call
+``principal_cache.invalidate(user_id)`` after committing. Each worker holds its
+own copy: invalidation hooks (``add_invalidation_hook``) forward ids to the
+other workers, which call ``evict``. With ``WS_BACKPLANE=postgres``,
+``principal_relay`` registers one that publishes over Postgres
+``LISTEN``/``NOTIFY``; otherwise (a single worker) the TTL bounds how long
+another worker could act on a stale role or a deactivated account.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+from app.db.session import engine
+from app.models.enums import UserRole
+from app.models.user import UserDB
+from app.ws import Backplane, PostgresBackplane
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    username: str
+    role: UserRole
+    is_active: bool
+    is_verified: bool
+    notify_likes: bool
+    notify_comments: bool
+    notify_follows: bool
+
+    @classmethod
+    def from_user(cls, user: UserDB) -> "Principal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            role=user.role,
+            is_active=user.is_active,
+            is_verified=user.is_verified,
+            notify_likes=user.notify_likes,
+            notify_comments=user.notify_comments,
+            notify_follows=user.notify_follows,
+        )
+
+
+class PrincipalCache:
+    """Thread-safe LRU of principals by user id, each entry expiring after ``ttl`` seconds."""
+
+    def __init__(self, max_entries: int, ttl: int) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+        # Bumped by every eviction, so a principal loaded before an
+        # invalidation is not stored after it.
+        self._generation = 0
+        self._hooks: List[Callable[[Sequence[int]], None]] = []
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def generation(self) -> int:
+        """Token to pass to ``put`` for a principal about to be loaded."""
+        with self._lock:
+            return self._generation
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[user_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, principal: Principal, generation: int) -> None:
+        """Store a principal loaded after ``generation()`` returned ``generation``."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, *user_ids: int) -> None:
+        """Drop entries from this worker only (the receiving end of a hook)."""
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                if self._entries.pop(user_id, None) is not None:
+                    self.invalidations += 1
+
+    def invalidate(self, *user_ids: int) -> None:
+        """Drop entries here and pass the ids to every hook. Call after committing."""
+        if not user_ids:
+            return
+        self.evict(*user_ids)
+        for hook in self._hooks:
+            try:
+                hook(user_ids)
+            except Exception:
+                logger.warning(f"Principal invalidation hook failed for {user_ids}", exc_info=True)
+
+    def add_invalidation_hook(self, hook: Callable[[Sequence[int]], None]) -> None:
+        """Register ``hook(user_ids)``, called after each local invalidation."""
+        self._hooks.append(hook)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidated_entries": self.invalidations,
+                "entries": len(self._entries),
+            }
+
+
+class PrincipalInvalidationRelay:
+    """Carry one worker's invalidations to every worker's cache over a backplane.
+
+    Registered as an invalidation hook; the publish is scheduled on the event
+    loop, so the write path that invalidated never waits on it. Each worker
+    also receives its own ids back, which only repeats the local eviction.
+    Started and stopped from the ``lifespan`` hook alongside the periodic jobs.
+    """
+
+    def __init__(self, cache: PrincipalCache, backplane: Optional[Backplane]) -> None:
+        self.cache = cache
+        self.backplane = backplane
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Set[asyncio.Task] = set()
+        if backplane is not None:
+            cache.add_invalidation_hook(self._publish)
+
+    def start(self) -> None:
+        if self.backplane is not None:
+            self._loop = asyncio.get_running_loop()
+            self.backplane.start(self._receive)
+
+    async def stop(self) -> None:
+        if self._loop is None:
+            return
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self.backplane.stop()
+        self._loop = None
+
+    def _publish(self, user_ids: Sequence[int]) -> None:
+        """Invalidation hook; safe to call from any thread."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._schedule, list(user_ids))
+
+    def _schedule(self, user_ids: List[int]) -> None:
+        task = self._loop.create_task(self.backplane.publish([(None, json.dumps(user_ids))]))
+        self._pending.add(task)
+        task.add_done_callback(self._published)
+
+    def _published(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Failed to publish principal invalidation", exc_info=task.exception())
+
+    def _receive(self, user_id: Optional[int], message: str) -> None:
+        try:
+            user_ids = [int(i) for i in json.loads(message)]
+        except (ValueError, TypeError):
+            logger.warning(f"Ignoring malformed principal invalidation: {message[:100]}")
+            return
+        self.cache.evict(*user_ids)
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+principal_relay = PrincipalInvalidationRelay(
+    principal_cache,
+    PostgresBackplane(engine, f"{settings.WS_BACKPLANE_CHANNEL}_principals")
+    if settings.WS_BACKPLANE == "postgres"
+    else None,
+)
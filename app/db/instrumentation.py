@@ -0,0 +1,221 @@
+"""Per-request SQL instrumentation: query counts, DB time, slow queries, N+1s.
+
+Engine event hooks time every statement the process runs. ``SQLTimingMiddleware``
+opens a ``RequestQueries`` record for each HTTP request in a context variable,
+which follows the request into the threadpool (sync routes and dependencies)
+and into ``AsyncSession.run_sync``. For every request it:
+
+- adds ``Server-Timing`` entries for database time (with the query count) and
+  the whole request, which browser dev tools show next to the request;
+- flags statement shapes run ``SQL_N_PLUS_ONE_THRESHOLD`` times or more as a
+  probable N+1 (lazy loads in a loop, per-row lookups);
+- logs a one-line JSON summary (route, status, query count, DB time, slowest
+  statements, repeated shapes), at WARNING for a request with a slow statement
+  or a probable N+1 and at DEBUG otherwise.
+
+Statements slower than ``SQL_SLOW_QUERY_MS`` are logged wherever they run,
+background jobs included. The per-statement cost is two clock reads and a dict
+increment; statement text is normalized only for requests that ran enough
+statements to be suspect, once per distinct statement.
+"""
+import heapq
+import json
+import logging
+import re
+import threading
+import time
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Slowest statements kept per request.
+SLOWEST_KEPT = 3
+# Longest statement text written to a log line.
+MAX_LOGGED_SQL = 300
+
+# Statement text -> shape: bound-parameter lists of any length (expanded IN
+# lists, multi-row VALUES), literals and whitespace are folded together.
+_SHAPE_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+\b"), "?"),
+    (re.compile(r"\((?:\s*(?:%\(\w+\)s|\$\?|\?)\s*,?)+\)"), "(?)"),
+    (re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+"), "(?)"),
+    (re.compile(r"\s+"), " "),
+)
+
+_current: ContextVar[Optional["RequestQueries"]] = ContextVar("sql_request_queries", default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """``statement`` with everything that varies between N+1 repeats folded away."""
+    for pattern, replacement in _SHAPE_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def _clip(statement: str) -> str:
+    statement = " ".join(statement.split())
+    return statement if len(statement) <= MAX_LOGGED_SQL else statement[:MAX_LOGGED_SQL] + "..."
+
+
+class RequestQueries:
+    """The statements one request ran."""
+
+    __slots__ = ("count", "seconds", "slowest", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        # Min-heap of (seconds, statement), at most SLOWEST_KEPT long.
+        self.slowest: List[Tuple[float, str]] = []
+        self.statements: Dict[str, int] = {}
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] = self.statements.get(statement, 0) + 1
+        if len(self.slowest) < SLOWEST_KEPT:
+            heapq.heappush(self.slowest, (seconds, statement))
+        elif seconds > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (seconds, statement))
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statement shapes run at least ``threshold`` times, most repeated first."""
+        if not threshold or self.count < threshold:
+            return []
+        shapes: Dict[str, int] = {}
+        for statement, n in self.statements.items():
+            shape = statement_shape(statement)
+            shapes[shape] = shapes.get(shape, 0) + n
+        return sorted(
+            ((shape, n) for shape, n in shapes.items() if n >= threshold), key=lambda s: -s[1]
+        )
+
+    def server_timing(self, elapsed: float) -> str:
+        noun = "query" if self.count == 1 else "queries"
+        return (
+            f'db;dur={self.seconds * 1000:.1f};desc="{self.count} {noun}", '
+            f"app;dur={elapsed * 1000:.1f}"
+        )
+
+
+class SQLInstrumentation:
+    """Engine hooks plus process-wide totals (for metrics)."""
+
+    def __init__(self, slow_query_ms: int, n_plus_one_threshold: int) -> None:
+        self.slow_seconds = slow_query_ms / 1000
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.seconds = 0.0
+        self.slow_queries = 0
+        self.n_plus_one_requests = 0
+
+    def instrument(self, engine: Engine) -> None:
+        """Time every statement ``engine`` runs (for an ``AsyncEngine``, pass ``.sync_engine``)."""
+        if not event.contains(engine, "before_cursor_execute", self._before):
+            event.listen(engine, "before_cursor_execute", self._before)
+            event.listen(engine, "after_cursor_execute", self._after)
+
+    @staticmethod
+    def _before(conn, cursor, statement, parameters, context, executemany) -> None:
+        context._sql_started = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany) -> None:
+        seconds = time.perf_counter() - context._sql_started
+        slow = bool(self.slow_seconds) and seconds >= self.slow_seconds
+        with self._lock:
+            self.queries += 1
+            self.seconds += seconds
+            if slow:
+                self.slow_queries += 1
+        if slow:
+            logger.warning(f"Slow query ({seconds * 1000:.1f} ms): {_clip(statement)}")
+        queries = _current.get()
+        if queries is not None:
+            queries.record(statement, seconds)
+
+    def report(self, scope, status: Optional[int], queries: RequestQueries, elapsed: float) -> None:
+        """Log one request's summary; WARNING if it ran a slow statement or a probable N+1."""
+        repeated = queries.repeated(self.n_plus_one_threshold)
+        if repeated:
+            with self._lock:
+                self.n_plus_one_requests += 1
+        slow = bool(self.slow_seconds and queries.slowest) and max(queries.slowest)[0] >= self.slow_seconds
+        level = logging.WARNING if repeated or slow else logging.DEBUG
+        if not logger.isEnabledFor(level):
+            return
+        route = scope.get("route")
+        summary = {
+            "method": scope["method"],
+            "route": getattr(route, "path", scope["path"]),
+            "status": status,
+            "queries": queries.count,
+            "db_ms": round(queries.seconds * 1000, 1),
+            "total_ms": round(elapsed * 1000, 1),
+            "slowest": [
+                {"ms": round(seconds * 1000, 1), "sql": _clip(statement)}
+                for seconds, statement in sorted(queries.slowest, reverse=True)
+            ],
+        }
+        if repeated:
+            summary["n_plus_one"] = [{"count": n, "sql": _clip(shape)} for shape, n in repeated]
+        logger.log(level, f"SQL {json.dumps(summary)}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "seconds": round(self.seconds, 6),
+                "slow_queries": self.slow_queries,
+                "n_plus_one_requests": self.n_plus_one_requests,
+            }
+
+
+class SQLTimingMiddleware:
+    """Collect each HTTP request's statements; add ``Server-Timing`` and log a summary.
+
+    Plain ASGI rather than ``BaseHTTPMiddleware``: it runs on every request, so
+    it adds no extra task and never buffers the body.
+    """
+
+    def __init__(self, app, instrumentation: SQLInstrumentation) -> None:
+        self.app = app
+        self.instrumentation = instrumentation
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        queries = RequestQueries()
+        token = _current.set(queries)
+        started = time.perf_counter()
+        status = None
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append(
+                    "Server-Timing", queries.server_timing(time.perf_counter() - started)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.instrumentation.report(scope, status, queries, time.perf_counter() - started)
+
+
+sql_instrumentation = SQLInstrumentation(
+    slow_query_ms=settings.SQL_SLOW_QUERY_MS,
+    n_plus_one_threshold=settings.SQL_N_PLUS_ONE_THRESHOLD,
+)
@@ -0,0 +1,278 @@
+"""Read replicas for read-only routes.
+
+``DATABASE_REPLICA_URLS`` lists streaming standbys of the primary. Read-only
+routes take their session from ``app.api.deps.get_read_db`` (or
+``get_async_read_db``), which asks ``replica_router`` where to read:
+
+- usable replicas take turns (round-robin). A replica is usable once its last
+  health check reached it and found it at most ``REPLICA_MAX_LAG_SECONDS``
+  behind; with none usable, the read goes to the primary;
+- a replica that cannot hand out a connection is taken out of rotation on the
+  spot and the request reads from the primary instead, without waiting for
+  the next health check;
+- a client's reads stay on the primary for ``REPLICA_STICKY_SECONDS`` after its
+  own write (read-your-writes), so an author sees an edit at once.
+
+``ReadYourWritesMiddleware`` tracks those writes two ways: a short-lived cookie,
+honoured by every worker, and the writer's user id in this worker, for API
+clients that do not keep cookies.
+
+Writes, background jobs and everything not routed here use the primary.
+"""
+import itertools
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+from jose import JWTError, jwt
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.jobs import PeriodicJob
+from app.db.session import (
+    AsyncMeteredQueuePool, AsyncSessionLocal, MeteredQueuePool, SessionLocal, async_database_url,
+)
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+STICKY_COOKIE = "quill_rw"
+# Seconds to wait for a replica connection before treating it as down.
+CONNECT_TIMEOUT = 3
+
+# Replay lag in seconds. Zero once every received WAL record is applied: the
+# last replayed commit only ages because the primary is idle. Zero on a server
+# that is not in recovery at all.
+LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class Replica:
+    """One standby: its engines and what its last health check found."""
+
+    def __init__(self, url: str) -> None:
+        self.name = make_url(url).render_as_string(hide_password=True)
+        self.engine = create_engine(
+            url,
+            poolclass=MeteredQueuePool,
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            connect_args={"connect_timeout": CONNECT_TIMEOUT},
+        )
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.async_engine = create_async_engine(
+            async_database_url(url),
+            poolclass=AsyncMeteredQueuePool,
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20,
+            connect_args={"timeout": CONNECT_TIMEOUT},
+        )
+        self.AsyncSessionLocal = async_sessionmaker(
+            self.async_engine, autoflush=False, expire_on_commit=False
+        )
+        # Out of rotation until the first health check passes.
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.reads = 0
+
+
+class ReplicaRouter:
+    """Pick the database each read-only request is served from."""
+
+    def __init__(
+        self, urls: Sequence[str], max_lag: float, sticky_seconds: float, check_interval: float
+    ) -> None:
+        self.replicas = [Replica(url) for url in urls]
+        self.max_lag = max_lag
+        self.sticky_seconds = sticky_seconds
+        self._lock = threading.Lock()
+        self._turn = itertools.count()
+        # user id -> monotonic deadline, oldest first (each write moves its
+        # user to the end), so expired entries are always at the front.
+        self._sticky: "OrderedDict[int, float]" = OrderedDict()
+        self.primary_reads = 0
+        self.sticky_reads = 0
+        self.failovers = 0
+        self.job = PeriodicJob("replica-health", self.check, check_interval)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def start(self) -> None:
+        if self.enabled:
+            self.job.start()
+            # Check at once, so replicas join the rotation right after startup.
+            self.job.wake()
+
+    async def stop(self) -> None:
+        await self.job.stop()
+        for replica in self.replicas:
+            replica.engine.dispose()
+            await replica.async_engine.dispose()
+
+    def engines(self) -> List[Engine]:
+        """Every replica engine; the asyncpg ones as their ``sync_engine``."""
+        return [e for r in self.replicas for e in (r.engine, r.async_engine.sync_engine)]
+
+    def check(self) -> None:
+        """Measure every replica's lag and update the rotation."""
+        for replica in self.replicas:
+            try:
+                with replica.engine.connect() as conn:
+                    lag = float(conn.execute(LAG_QUERY).scalar() or 0)
+            except DBAPIError as e:
+                self._set_health(replica, False, None, f"unreachable ({e.orig.__class__.__name__})")
+                continue
+            self._set_health(replica, lag <= self.max_lag, lag, f"{lag:.1f}s behind")
+
+    def _set_health(self, replica: Replica, healthy: bool, lag: Optional[float], detail: str) -> None:
+        replica.lag = lag
+        if healthy != replica.healthy:
+            if healthy:
+                logger.info(f"Replica {replica.name} back in rotation ({detail})")
+            else:
+                logger.warning(f"Replica {replica.name} out of rotation: {detail}")
+        replica.healthy = healthy
+
+    def mark_down(self, replica: Replica) -> None:
+        """Take a replica out of rotation until a health check passes again."""
+        with self._lock:
+            self.failovers += 1
+        self._set_health(replica, False, replica.lag, "connection failed")
+        self.job.wake()
+
+    def record_write(self, user_id: int) -> None:
+        """Keep ``user_id``'s reads on the primary for the sticky window."""
+        if not self.sticky_seconds:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._sticky[user_id] = now + self.sticky_seconds
+            self._sticky.move_to_end(user_id)
+            while next(iter(self._sticky.values())) <= now:
+                self._sticky.popitem(last=False)
+
+    def _is_sticky(self, user_id: int) -> bool:
+        with self._lock:
+            deadline = self._sticky.get(user_id)
+        return deadline is not None and deadline > time.monotonic()
+
+    def choose(self, request: Request, user_id: Optional[int]) -> Optional[Replica]:
+        """The replica to serve this read from, or None for the primary."""
+        if not self.enabled:
+            return None
+        if STICKY_COOKIE in request.cookies or (user_id is not None and self._is_sticky(user_id)):
+            with self._lock:
+                self.sticky_reads += 1
+            return None
+        usable = [replica for replica in self.replicas if replica.healthy]
+        with self._lock:
+            if not usable:
+                self.primary_reads += 1
+                return None
+            replica = usable[next(self._turn) % len(usable)]
+            replica.reads += 1
+        return replica
+
+    def read_session(self, request: Request, user_id: Optional[int]) -> Session:
+        """A session on the chosen replica, or on the primary."""
+        replica = self.choose(request, user_id)
+        if replica is not None:
+            db = replica.SessionLocal()
+            try:
+                db.connection()
+                return db
+            except DBAPIError:
+                db.close()
+                self.mark_down(replica)
+        return SessionLocal()
+
+    async def async_read_session(self, request: Request, user_id: Optional[int]) -> AsyncSession:
+        """``read_session`` for ``async def`` routes."""
+        replica = self.choose(request, user_id)
+        if replica is not None:
+            db = replica.AsyncSessionLocal()
+            try:
+                await db.connection()
+                return db
+            except (DBAPIError, OSError):
+                await db.close()
+                self.mark_down(replica)
+        return AsyncSessionLocal()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "replicas": [
+                    {
+                        "name": replica.name,
+                        "healthy": replica.healthy,
+                        "lag_seconds": replica.lag,
+                        "reads": replica.reads,
+                    }
+                    for replica in self.replicas
+                ],
+                "primary_reads": self.primary_reads,
+                "sticky_reads": self.sticky_reads,
+                "failovers": self.failovers,
+            }
+
+
+def _token_user_id(request: Request) -> Optional[int]:
+    """The user id in the request's bearer access token, if it carries a valid one."""
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        if payload.get("token_type") != "access":
+            return None
+        return int(payload.get("sub") or 0) or None
+    except (JWTError, ValueError):
+        return None
+
+
+class ReadYourWritesMiddleware(BaseHTTPMiddleware):
+    """After a successful write, keep the caller's reads on the primary for a while."""
+
+    def __init__(self, app, router: ReplicaRouter) -> None:
+        super().__init__(app)
+        self.router = router
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if (
+            request.method in SAFE_METHODS
+            or response.status_code >= 400
+            or not self.router.sticky_seconds
+        ):
+            return response
+        user_id = _token_user_id(request)
+        if user_id is not None:
+            self.router.record_write(user_id)
+        response.set_cookie(
+            STICKY_COOKIE, "1", max_age=self.router.sticky_seconds, httponly=True, samesite="lax"
+        )
+        return response
+
+
+replica_router = ReplicaRouter(
+    settings.DATABASE_REPLICA_URLS,
+    max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+    sticky_seconds=settings.REPLICA_STICKY_SECONDS,
+    check_interval=settings.REPLICA_HEALTH_CHECK_SECONDS,
+)
@@ -1,16 +1,81 @@
-"""Database engine and session management."""
+"""Database engines and session management.
+
+Two engines share ``DATABASE_URL``: the synchronous psycopg2 one behind
+``get_db`` (plain ``def`` routes, which FastAPI runs in its threadpool, plus
+background jobs and migrations) and an asyncpg one behind ``get_async_db`` for
+``async def`` routes and the WebSocket/notification path, whose queries must
+not block the event loop.
+
+Services are written against the sync ``Session``; async callers run them with
+``await db.run_sync(service, *args)``, which drives the same ORM code over the
+async connection without a thread. Read-only routes may be served from a
+replica instead (``app.db.replicas``).
+"""
 import logging
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator
 
 from fastapi import HTTPException
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.engine import URL, Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
 
+
+class _WaitCountingPool:
+    """Pool mixin counting checkouts that found every connection busy, and their wait."""
+
+    waits = 0
+    wait_seconds = 0.0
+
+    def _do_get(self):
+        if self.checkedout() < self.size() + self._max_overflow:
+            return super()._do_get()
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.waits += 1
+            self.wait_seconds += time.perf_counter() - started
+
+
+class MeteredQueuePool(_WaitCountingPool, QueuePool):
+    pass
+
+
+class AsyncMeteredQueuePool(_WaitCountingPool, AsyncAdaptedQueuePool):
+    pass
+
+
+# Pools log under their class's module; keep these as quiet as SQLAlchemy
+# keeps its own "sqlalchemy.pool" loggers.
+for _pool_class in (MeteredQueuePool, AsyncMeteredQueuePool):
+    logging.getLogger(f"{__name__}.{_pool_class.__name__}").setLevel(logging.WARNING)
+
+
+def pool_stats(engine: Engine) -> dict:
+    """Connection pool occupancy (pass ``.sync_engine`` for an ``AsyncEngine``)."""
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # Negative until the pool has opened pool_size connections.
+        "overflow": max(pool.overflow(), 0),
+        "waits": getattr(pool, "waits", 0),
+        "wait_seconds": round(getattr(pool, "wait_seconds", 0.0), 6),
+    }
+
+
 engine = create_engine(
     settings.DATABASE_URL,
+    poolclass=MeteredQueuePool,
     pool_pre_ping=True,
     pool_size=10,
     max_overflow=20,
@@ -19,9 +84,31 @@ engine = create_engine(
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
-def get_db():
-    """FastAPI dependency yielding a request-scoped database session."""
-    db = SessionLocal()
+def async_database_url(url: str) -> URL:
+    """``url`` with the asyncpg driver; libpq's ``sslmode`` becomes asyncpg's ``ssl``."""
+    async_url = make_url(url).set(drivername="postgresql+asyncpg")
+    query = dict(async_url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return async_url.set(query=query)
+
+
+async_engine = create_async_engine(
+    async_database_url(settings.DATABASE_URL),
+    poolclass=AsyncMeteredQueuePool,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+)
+
+# Objects stay loaded after commit: an expired attribute would need a lazy
+# load, which an AsyncSession cannot do implicitly.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+@contextmanager
+def session_scope(db: Session) -> Iterator[Session]:
+    """Hand out ``db`` for one request: roll back on error, always close."""
     try:
         yield db
     except HTTPException:
@@ -33,3 +120,31 @@ def get_db():
         raise
     finally:
         db.close()
+
+
+@asynccontextmanager
+async def async_session_scope(db: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """``session_scope`` for an ``AsyncSession``."""
+    try:
+        yield db
+    except HTTPException:
+        await db.rollback()
+        raise
+    except Exception as e:
+        logger.error(f"Error during database session: {e}", exc_info=True)
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+
+def get_db():
+    """FastAPI dependency yielding a request-scoped database session."""
+    with session_scope(SessionLocal()) as db:
+        yield db
+
+
+async def get_async_db():
+    """FastAPI dependency yielding a request-scoped ``AsyncSession``."""
+    async with async_session_scope(AsyncSessionLocal()) as db:
+        yield db
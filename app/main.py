@@ -17,9 +17,22 @@ from starlette.middleware.trustedhost import TrustedHostMiddleware
 from starlette.requests import Request as StarletteRequest
 from starlette.responses import JSONResponse
 
+from app.core.cache import CacheRule, ResponseCacheMiddleware, response_cache
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, http_metrics
+from app.core.principals import principal_relay
 from app.db.base import Base
-from app.db.session import engine
+from app.db.instrumentation import SQLTimingMiddleware, sql_instrumentation
+from app.db.replicas import ReadYourWritesMiddleware, replica_router
+from app.db.session import async_engine, engine
+from app.services.counters import counter_reconciler
+from app.services.notifications import notification_outbox
+from app.services.related import related_index
+from app.services.retention import ensure_partitions, notification_retention
+from app.services.timeline import timeline_resumer
+from app.services.trending import hot_score_job
+from app.services.views import view_counter
+from app.ws import websocket_hub
 from app.api.routes import (
     admin,
     articles,
@@ -29,6 +42,7 @@ from app.api.routes import (
     feeds,
     likes,
     media,
+    metrics,
     notifications,
     reports,
     users,
@@ -49,6 +63,34 @@ ROUTERS = (
     (dashboard.router, "/dashboard", "Dashboard"),
     (reports.router, "/reports", "Reports"),
     (feeds.router, "", "Feeds"),
+    (metrics.router, "", "Metrics"),
+)
+
+# Public GETs served from the response cache for anonymous callers:
+# (path pattern, TTL seconds, invalidation tags). Write paths fire the tags.
+CACHE_RULES = (
+    CacheRule(r"^/articles$", 30, ("articles", "engagement")),
+    CacheRule(r"^/articles/featured$", 60, ("articles", "engagement")),
+    CacheRule(r"^/articles/tags$", 300, ("articles",)),
+    CacheRule(r"^/articles/\d+/related$", 300, ("articles", "engagement")),
+    CacheRule(r"^/users/(?P<username>[^/]+)/profile$", 60, ("user:{username}",)),
+    CacheRule(r"^/rss\.xml$", 300, ("articles",)),
+    CacheRule(r"^/rss/(?P<username>[^/]+)\.xml$", 300, ("articles", "user:{username}")),
+    CacheRule(r"^/sitemap\.xml$", 600, ("articles",)),
+)
+
+# Started in order at startup and stopped in reverse at shutdown.
+BACKGROUND_JOBS = (
+    replica_router,
+    websocket_hub,
+    principal_relay,
+    notification_outbox,
+    view_counter.job,
+    hot_score_job,
+    related_index.job,
+    counter_reconciler.job,
+    timeline_resumer.job,
+    notification_retention.job,
 )
 
 
@@ -64,16 +106,24 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
 
 
 def init_db() -> None:
-    """Ensure database tables exist before serving requests."""
+    """Ensure database tables (and this month's partitions) exist before serving requests."""
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        ensure_partitions(conn)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup/shutdown hooks."""
     init_db()
+    for job in BACKGROUND_JOBS:
+        job.start()
     yield
     logger.info("Shutting down server...")
+    # Stopping flushes write-behind buffers (e.g. pending views) before exit.
+    for job in reversed(BACKGROUND_JOBS):
+        await job.stop()
+    await async_engine.dispose()
 
 
 def create_app() -> FastAPI:
@@ -83,7 +133,12 @@ def create_app() -> FastAPI:
     limiter = Limiter(key_func=client_ip_key, default_limits=["100/minute"])
     app.state.limiter = limiter
 
-    # Starlette applies middleware LIFO: last registered runs first.
+    # Starlette applies middleware LIFO: last registered runs first. The
+    # response cache sits innermost so cached hits still pass host checks,
+    # rate limits, and get security/CORS headers.
+    if replica_router.enabled:
+        app.add_middleware(ReadYourWritesMiddleware, router=replica_router)
+    app.add_middleware(ResponseCacheMiddleware, cache=response_cache, rules=CACHE_RULES)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=[settings.FRONTEND_URL],
@@ -94,6 +149,11 @@ def create_app() -> FastAPI:
     app.add_middleware(SecurityHeadersMiddleware)
     app.add_middleware(SlowAPIMiddleware)
     app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.ALLOWED_HOSTS)
+    # Outermost, so request metrics and Server-Timing cover the whole stack.
+    app.add_middleware(SQLTimingMiddleware, instrumentation=sql_instrumentation)
+    app.add_middleware(MetricsMiddleware, metrics=http_metrics)
+    for db_engine in (engine, async_engine.sync_engine, *replica_router.engines()):
+        sql_instrumentation.instrument(db_engine)
 
     for router, prefix, tag in ROUTERS:
         app.include_router(router, prefix=prefix, tags=[tag])
@@ -9,4 +9,7 @@ from .bookmark import BookmarkDB
 from .comment_like import CommentLikeDB
 from .view_history import ViewHistoryDB
 from .report import ReportDB
+from .tag import TagDB, ArticleTagDB
+from .related_article import RelatedArticleDB
+from .timeline import TimelineEntryDB
 from .enums import UserRole, ArticleStatus, NotificationType
@@ -1,11 +1,20 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, func, Boolean
-from sqlalchemy.orm import relationship, column_property
-from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.sql import select
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Text, func, Boolean, Computed, Index, Float, text
+from sqlalchemy.orm import relationship, deferred
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from app.db.base_class import Base
 from app.models.enums import ArticleStatus
 from app.models.like import LikeDB
-from app.models.comment import CommentDB
+
+# Text-search configuration shared by the stored document and every query
+# against it; the two must agree for the GIN index to be usable.
+SEARCH_CONFIG = "english"
+
+# Weighted search document: title ranks above subtitle, which ranks above body.
+SEARCH_DOCUMENT = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(subtitle, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(content, '')), 'C')"
+)
 
 class ArticleDB(Base):
     __tablename__ = "articles"
@@ -15,6 +24,9 @@ class ArticleDB(Base):
     subtitle = Column(String(300), nullable=True)
     slug = Column(String(250), unique=True, nullable=True, index=True)
     content = Column(Text, nullable=False)
+    # Plain-text preview for cards, derived from content on every write, so list
+    # queries can skip loading the body.
+    excerpt = Column(String(300), nullable=True)
     tags = Column(JSONB, nullable=False, default=lambda: [])
     category = Column(String, nullable=True)
     cover_image_url = Column(String(500), nullable=True)
@@ -32,18 +44,49 @@ class ArticleDB(Base):
     comments = relationship("CommentDB", back_populates="article", cascade="all, delete-orphan", passive_deletes=True)
 
     likes_count = Column(Integer, default=0, nullable=False)
+    # Visible (not soft-deleted) comments, maintained by the comment write paths
+    # and repaired by app.services.counters.
+    comments_count = Column(Integer, default=0, nullable=False, server_default="0")
     views_count = Column(Integer, default=0, nullable=False, server_default="0")
     reading_time_minutes = Column(Integer, default=1, nullable=False, server_default="1")
     word_count = Column(Integer, default=0, nullable=False, server_default="0")
 
+    # Trending: decayed recent views and the materialized hot score derived from
+    # them (see app.services.trending).
+    recent_views = Column(Float, default=0.0, nullable=False, server_default="0")
+    hot_score = Column(Float, default=0.0, nullable=False, server_default="0")
+    hot_refreshed_at = Column(DateTime, nullable=True)
+
+    # When this story's related-articles neighbours were last recomputed (see
+    # app.services.related); NULL means never.
+    related_refreshed_at = Column(DateTime, nullable=True)
+
     # Visibility & curation: unlisted stories are link-only; featured stories
     # appear in the editors' picks rail.
     is_unlisted = Column(Boolean, default=False, nullable=False, server_default="false")
     is_featured = Column(Boolean, default=False, nullable=False, server_default="false")
 
-    comments_count = column_property(
-        select(func.count(CommentDB.id))
-        .where(CommentDB.article_id == id, CommentDB.is_deleted == False)
-        .correlate_except(CommentDB)
-        .scalar_subquery()
+    # Maintained by Postgres (stored generated column), so create/update paths
+    # never touch it. Deferred: it is only ever used inside search predicates.
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_DOCUMENT, persisted=True)))
+
+    __table_args__ = (
+        Index("ix_articles_search_vector", "search_vector", postgresql_using="gin"),
+        # Keyset pagination: one index per (sort key, id) ordering. Trending reads
+        # only listed, published stories, so its index covers just those.
+        Index(
+            "ix_articles_trending", "hot_score", "id",
+            postgresql_where=text("status = 'PUBLISHED' AND NOT is_unlisted"),
+        ),
+        Index("ix_articles_likes_count_id", "likes_count", "id"),
+        Index("ix_articles_published_date_id", "published_date", "id"),
+        Index("ix_articles_author_id_id", "author_id", "id"),
     )
+
+
+# Related-articles sweep: listed stories whose neighbours are oldest (or missing).
+Index(
+    "ix_articles_related_refresh",
+    ArticleDB.related_refreshed_at.asc().nulls_first(),
+    postgresql_where=text("status = 'PUBLISHED' AND NOT is_unlisted"),
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
@@ -12,9 +12,10 @@ class BookmarkDB(Base):
     article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
-    # A user can bookmark an article at most once
+    # A user can bookmark an article at most once; the index serves keyset paging.
     __table_args__ = (
         UniqueConstraint("user_id", "article_id", name="unique_bookmark"),
+        Index("ix_bookmarks_user_created_id", "user_id", "created_at", "id"),
     )
 
     user = relationship("UserDB", passive_deletes=True)
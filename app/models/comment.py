@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, func, Boolean
+from sqlalchemy import Column, Integer, Text, DateTime, ForeignKey, func, Boolean, Index, text
 from sqlalchemy.orm import relationship, backref
 from app.db.base_class import Base
 
@@ -17,6 +17,21 @@ class CommentDB(Base):
     # Threading: a reply points at its parent comment. Top-level comments have NULL.
     parent_id = Column(Integer, ForeignKey("comments.id", ondelete="CASCADE"), nullable=True, index=True)
     likes_count = Column(Integer, default=0, nullable=False, server_default="0")
+    # Visible (not soft-deleted) direct replies, maintained by the comment write
+    # paths and repaired by app.services.counters.
+    replies_count = Column(Integer, default=0, nullable=False, server_default="0")
+
+    # Keyset pagination of an article's comments by recency and by likes, of its
+    # top-level comments (threaded view), and of one comment's replies.
+    __table_args__ = (
+        Index("ix_comments_article_created_id", "article_id", "created_date", "id"),
+        Index("ix_comments_article_likes_created_id", "article_id", "likes_count", "created_date", "id"),
+        Index(
+            "ix_comments_article_roots_created_id", "article_id", "created_date", "id",
+            postgresql_where=text("parent_id IS NULL"),
+        ),
+        Index("ix_comments_parent_created_id", "parent_id", "created_date", "id"),
+    )
 
     user = relationship("UserDB", back_populates="comments", passive_deletes=True)
     article = relationship("ArticleDB", back_populates="comments", passive_deletes=True)
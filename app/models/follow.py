@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.db.base_class import Base
@@ -12,9 +12,12 @@ class FollowDB(Base):
     followed_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
-    # A user can follow another user at most once
+    # A user can follow another user at most once; the indexes serve keyset
+    # paging of follower and following lists.
     __table_args__ = (
         UniqueConstraint("follower_id", "followed_id", name="unique_follow"),
+        Index("ix_follows_followed_id_id", "followed_id", "id"),
+        Index("ix_follows_follower_id_id", "follower_id", "id"),
     )
 
     follower = relationship("UserDB", foreign_keys=[follower_id], passive_deletes=True)
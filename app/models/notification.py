@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, JSON
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Enum, JSON, Index, text
 from sqlalchemy.orm import relationship
 from .enums import NotificationType
 from datetime import datetime
@@ -7,14 +7,30 @@ from app.db.base_class import Base
 class NotificationDB(Base):
     __tablename__ = "notifications"
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     message = Column(String, nullable=False)
     # One of NotificationType values: like / comment / follow / mention / system
     type = Column(String(20), default="system", nullable=False, server_default="system")
-    is_read = Column(Boolean, default=False, index=True)
+    is_read = Column(Boolean, default=False)
     extra_data = Column(JSON, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    # Set on coalesced notifications (e.g. "like:article:42"): further events on
+    # the same target update this row while it is unread and recent.
+    group_key = Column(String(100), nullable=True)
+    # Part of the primary key: the table is range-partitioned by month on it
+    # (partitions are managed by app.services.retention).
+    created_at = Column(DateTime, default=datetime.utcnow, primary_key=True, index=True)
+
+    # Keyset pagination of a user's notifications (all, and unread only), newest first.
+    __table_args__ = (
+        Index("ix_notifications_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_notifications_user_read_created_id", "user_id", "is_read", "created_at", "id"),
+        Index(
+            "ix_notifications_user_group_open", "user_id", "group_key",
+            postgresql_where=text("group_key IS NOT NULL AND NOT is_read"),
+        ),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
     user = relationship("UserDB", back_populates="notifications", passive_deletes=True)
 
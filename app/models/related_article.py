@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index
+from app.db.base_class import Base
+
+
+class RelatedArticleDB(Base):
+    """One precomputed neighbour of an article, maintained by app.services.related."""
+
+    __tablename__ = "related_articles"
+
+    article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    related_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    score = Column(Float, nullable=False)
+
+    __table_args__ = (
+        # Serves /articles/{id}/related: an article's neighbours, best first.
+        Index("ix_related_articles_article_score", "article_id", "score", "related_id"),
+        # Finds the lists an article appears in when it changes.
+        Index("ix_related_articles_related_id", "related_id"),
+    )
+
+    def __repr__(self):
+        return f"<RelatedArticleDB article_id={self.article_id} related_id={self.related_id} score={self.score}>"
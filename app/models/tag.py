@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
+from app.db.base_class import Base
+
+
+class TagDB(Base):
+    """A distinct tag name with its count of listed, published articles."""
+
+    __tablename__ = "tags"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, nullable=False)
+    # Maintained by app.services.tags whenever an article's tags or visibility change.
+    published_count = Column(Integer, default=0, nullable=False, server_default="0")
+
+    def __repr__(self):
+        return f"<TagDB name={self.name} published_count={self.published_count}>"
+
+
+class ArticleTagDB(Base):
+    """Normalized article <-> tag membership, mirroring ``ArticleDB.tags``."""
+
+    __tablename__ = "article_tags"
+
+    article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    tag_id = Column(Integer, ForeignKey("tags.id", ondelete="CASCADE"), primary_key=True)
+
+    # Tag -> articles lookups (tag filters, related stories).
+    __table_args__ = (
+        Index("ix_article_tags_tag_article", "tag_id", "article_id"),
+    )
+
+
+# Serves the /articles/tags top-N read: most used first, then alphabetical.
+Index("ix_tags_published_count_name", TagDB.published_count.desc(), TagDB.name)
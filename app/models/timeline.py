@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Index
+from app.db.base_class import Base
+
+
+class TimelineEntryDB(Base):
+    """A published story delivered to a follower's home timeline (fan-out on write)."""
+
+    __tablename__ = "timeline_entries"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    article_id = Column(Integer, ForeignKey("articles.id", ondelete="CASCADE"), primary_key=True)
+    # Copied from the article so unfollow trims and feed ordering need no join.
+    author_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    published_date = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        # The feed read: one range scan per page, newest first.
+        Index("ix_timeline_user_published_article", "user_id", "published_date", "article_id"),
+        # Unfollow trims and retracting an author's stories.
+        Index("ix_timeline_author_user", "author_id", "user_id"),
+        # Retracting one story (unpublish / unlist) and the delete cascade.
+        Index("ix_timeline_article_id", "article_id"),
+    )
+
+    def __repr__(self):
+        return f"<TimelineEntryDB user_id={self.user_id} article_id={self.article_id}>"
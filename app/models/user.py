@@ -40,6 +40,17 @@ class UserDB(Base):
         nullable=True,
     )
 
+    # Maintained on follow / unfollow; also decides whether the author's stories
+    # are fanned out to follower timelines (see app.services.timeline).
+    followers_count = Column(Integer, default=0, nullable=False, server_default="0")
+    # False while the author's stories are merged into feeds at read time
+    # rather than copied to follower timelines (see app.services.timeline).
+    timeline_fanout = Column(Boolean, default=True, nullable=False, server_default="true")
+
+    # Maintained by the notification outbox and the read / read-all / delete
+    # paths, so unread badges never query the notifications table.
+    unread_notifications = Column(Integer, default=0, nullable=False, server_default="0")
+
     # Composite index for faster lookups
     __table_args__ = (
         Index("idx_email_username", "email", "username"),
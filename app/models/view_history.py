@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -18,6 +18,7 @@ class ViewHistoryDB(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "article_id", name="unique_view_history"),
+        Index("ix_view_history_user_viewed_id", "user_id", "viewed_at", "id"),
     )
 
     article = relationship("ArticleDB", passive_deletes=True)
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional
+from typing import List, Optional, Union
 from datetime import datetime
 from app.models.enums import ArticleStatus
 
@@ -35,12 +35,14 @@ class ArticleUpdate(BaseModel):
     is_unlisted: Optional[bool] = None
 
 
-class ArticleResponse(BaseModel):
+class ArticleSummary(BaseModel):
+    """Card projection for list endpoints: everything but the story body."""
+
     id: int
     title: str
     subtitle: Optional[str] = None
     slug: Optional[str] = None
-    content: str
+    excerpt: Optional[str] = None
     tags: List[str] = Field(default_factory=list)
     category: Optional[str] = None
     cover_image_url: Optional[str] = None
@@ -60,13 +62,27 @@ class ArticleResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ArticleResponse(ArticleSummary):
+    content: str
+
+
+# List endpoints return summaries unless the caller opts in with ``full=true``.
+ArticleCard = Union[ArticleResponse, ArticleSummary]
+
+
+def article_cards(articles, full: bool = False) -> list:
+    """Serialize list results as full articles or as summaries (body never read)."""
+    model = ArticleResponse if full else ArticleSummary
+    return [model.model_validate(article) for article in articles]
+
+
 class TagCount(BaseModel):
     tag: str
     count: int
 
 
 class SearchResults(BaseModel):
-    articles: List[ArticleResponse]
+    articles: List[ArticleCard]
     authors: List["SearchAuthor"]
 
 
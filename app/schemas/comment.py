@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 
 class CommentCreate(BaseModel):
@@ -32,9 +32,16 @@ class CommentResponse(BaseModel):
     article_id: int = Field(..., gt=0, description="ID of the associated article")
     parent_id: Optional[int] = Field(None, description="Parent comment ID for replies")
     likes_count: int = Field(0, ge=0, description="Number of likes on the comment")
+    replies_count: int = Field(0, ge=0, description="Number of visible direct replies")
     liked_by_me: bool = Field(False, description="Whether the requesting user liked this comment")
     created_date: datetime = Field(..., description="Timestamp when the comment was created")
     updated_date: Optional[datetime] = Field(None, description="Timestamp when the comment was last edited")
     user: Optional[CommentAuthor] = Field(None, description="Author of the comment")
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class CommentThread(CommentResponse):
+    replies: List[CommentResponse] = Field(
+        default_factory=list, description="The first direct replies, oldest first"
+    )
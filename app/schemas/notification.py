@@ -10,6 +10,11 @@ class NotificationResponse(BaseModel):
     type: str = "system"
     is_read: bool = False
     extra_data: Optional[Dict[str, Any]] = None
+    group_key: Optional[str] = None
     created_at: Optional[datetime] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class UnreadCount(BaseModel):
+    unread_count: int
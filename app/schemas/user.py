@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import Dict, Optional
 from datetime import datetime
 from pydantic import BaseModel, SecretStr, EmailStr, Field, ConfigDict, field_validator
 from app.models.enums import UserRole
@@ -114,6 +114,22 @@ class NotificationPrefs(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class ArticleViewerState(BaseModel):
+    liked: bool = False
+    bookmarked: bool = False
+
+
+class AuthorViewerState(BaseModel):
+    following: bool = False
+
+
+class ViewerState(BaseModel):
+    """The caller's relationship to a page of articles and authors, keyed by id."""
+
+    articles: Dict[int, ArticleViewerState] = {}
+    authors: Dict[int, AuthorViewerState] = {}
+
+
 class FollowUserEntry(BaseModel):
     id: int
     username: str
@@ -21,6 +21,8 @@ from app.services.comments import (  # noqa: F401
     get_all_comments,
     get_comment_by_id,
     get_comments_by_article,
+    get_first_replies,
+    get_replies,
 )
 from app.services.users import (  # noqa: F401
     create_new_user,
@@ -28,6 +30,7 @@ from app.services.users import (  # noqa: F401
     get_all_users,
     get_user_by_id,
     get_user_by_username,
+    get_viewer_state,
     promote_user,
     update_user_profile,
     update_user_role,
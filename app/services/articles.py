@@ -1,29 +1,65 @@
 """Article domain: creation, querying, visibility, and lifecycle."""
 import logging
-from datetime import datetime, timezone
+from datetime import datetime
 from typing import List, Optional
 
 from fastapi import HTTPException, status
-from sqlalchemy import or_, func
+from sqlalchemy import func
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, defer, selectinload
 
-from app.models.article import ArticleDB
+from app.core.cache import response_cache
+from app.models.article import ArticleDB, SEARCH_CONFIG
 from app.models.comment import CommentDB
 from app.models.enums import ArticleStatus
 from app.schemas.article import ArticleCreate, ArticleUpdate
+from app.services.related import related_index
+from app.services.timeline import sync_article_timelines
+from app.services.tags import is_listed, release_article_tags, sync_article_tags, tagged_article_ids
+from app.utils.pagination import after_cursor
 from app.utils.sanitize import sanitize_html
-from app.utils.text import unique_slug, reading_time_minutes, word_count
+from app.utils.text import unique_slug, make_excerpt, reading_time_minutes, word_count
 
 logger = logging.getLogger(__name__)
 
-VALID_SORTS = {"latest", "trending", "top"}
+VALID_SORTS = {"latest", "trending", "top", "relevance"}
+
+# Fields whose change re-scores the article's related-articles neighbours.
+RELATED_FIELDS = {"tags", "category", "status", "is_unlisted"}
+
+# ORDER BY key (all descending) behind each keyset-paginable sort. The trailing
+# id makes every key unique, so cursors never skip or repeat a row.
+SORT_KEYS = {
+    "latest": (ArticleDB.id,),
+    "trending": (ArticleDB.hot_score, ArticleDB.id),
+    "top": (ArticleDB.likes_count, ArticleDB.id),
+}
+
+
+def search_query(text: str):
+    """Parse free text (quoted phrases, ``or``, ``-term``) into a tsquery."""
+    return func.websearch_to_tsquery(SEARCH_CONFIG, text)
+
+
+def card_options(full: bool = False) -> tuple:
+    """Loader options for list queries.
+
+    Authors for the whole page arrive in one batched SELECT instead of one lazy
+    load per row, and the body stays unloaded unless asked for.
+    """
+    author = selectinload(ArticleDB.author)
+    return (author,) if full else (author, defer(ArticleDB.content))
+
+
+def invalidate_article_caches(author_username: str) -> None:
+    """Drop cached public listings and the author's profile after an article write."""
+    response_cache.invalidate("articles", f"user:{author_username}")
 
 
 def create_new_article(db: Session, article_data: ArticleCreate, author_id: int) -> ArticleDB:
     """Create an article: sanitize content, derive slug/reading-time/word-count."""
     published_date = (
-        datetime.now(timezone.utc) if article_data.status == ArticleStatus.PUBLISHED else None
+        datetime.utcnow() if article_data.status == ArticleStatus.PUBLISHED else None
     )
     content = sanitize_html(article_data.content)
     new_article = ArticleDB(
@@ -31,6 +67,7 @@ def create_new_article(db: Session, article_data: ArticleCreate, author_id: int)
         subtitle=article_data.subtitle,
         slug=unique_slug(db, article_data.title),
         content=content,
+        excerpt=make_excerpt(content),
         category=article_data.category,
         cover_image_url=article_data.cover_image_url,
         tags=article_data.tags or [],
@@ -42,11 +79,22 @@ def create_new_article(db: Session, article_data: ArticleCreate, author_id: int)
         word_count=word_count(content),
     )
     db.add(new_article)
+    db.flush()
+    sync_article_tags(db, new_article, old_tags=[], was_listed=False)
+    sync_article_timelines(db, new_article, was_listed=False)
     db.commit()
     db.refresh(new_article)
+    if is_listed(new_article):
+        related_index.mark(new_article.id)
+    invalidate_article_caches(new_article.author.username)
     return new_article
 
 
+def article_sort_key(article: ArticleDB, sort: str = "latest") -> list:
+    """``article``'s values for the sort's keyset columns (the cursor payload)."""
+    return [getattr(article, col.key) for col in SORT_KEYS.get(sort, SORT_KEYS["latest"])]
+
+
 def get_articles(
     db: Session,
     search: Optional[str] = None,
@@ -55,20 +103,29 @@ def get_articles(
     author_username: Optional[str] = None,
     skip: int = 0,
     limit: int = 10,
+    after: Optional[str] = None,
     status: Optional[ArticleStatus] = ArticleStatus.PUBLISHED,
     sort: str = "latest",
     include_unlisted: bool = False,
     featured_only: bool = False,
     with_total: bool = False,
+    full: bool = False,
 ):
     """Query articles with filtering and sorting.
 
     Unlisted stories never appear in list contexts unless explicitly included
-    (they remain reachable by direct link). Returns a list, or a
-    ``(list, total)`` pair when ``with_total`` is set.
+    (they remain reachable by direct link). ``search`` matches the weighted
+    full-text document through its GIN index; ``sort="relevance"`` orders the
+    matches by ``ts_rank`` and falls back to latest when there is no search.
+
+    ``after`` (a cursor over ``article_sort_key``) switches from OFFSET to keyset
+    paging; relevance ordering only pages by offset. Bodies are only loaded
+    when ``full`` is set. Returns a list, or a ``(list, total)`` pair when
+    ``with_total`` is set.
     """
     skip = max(0, skip)
-    query = db.query(ArticleDB)
+    query = db.query(ArticleDB).options(*card_options(full))
+    ts_query = search_query(search) if search else None
 
     if status is not None:
         query = query.filter(ArticleDB.status == status)
@@ -77,39 +134,44 @@ def get_articles(
     if featured_only:
         query = query.filter(ArticleDB.is_featured == True)
 
-    if search:
-        query = query.filter(or_(
-            ArticleDB.title.icontains(search, autoescape=True),
-            ArticleDB.subtitle.icontains(search, autoescape=True),
-            ArticleDB.content.icontains(search, autoescape=True),
-        ))
+    if ts_query is not None:
+        query = query.filter(ArticleDB.search_vector.bool_op("@@")(ts_query))
     if category:
         query = query.filter(func.lower(ArticleDB.category) == func.lower(category))
     if tag:
-        query = query.filter(ArticleDB.tags.contains([tag]))
+        query = query.filter(ArticleDB.id.in_(tagged_article_ids(tag)))
     if author_username:
         from app.models.user import UserDB
         query = query.join(UserDB, UserDB.id == ArticleDB.author_id).filter(
             func.lower(UserDB.username) == author_username.lower()
         )
 
-    total = query.count() if with_total else None
+    total = query.with_entities(func.count(ArticleDB.id)).scalar() if with_total else None
 
-    if sort == "trending":
-        order = (ArticleDB.views_count.desc(), ArticleDB.id.desc())
-    elif sort == "top":
-        order = (ArticleDB.likes_count.desc(), ArticleDB.id.desc())
+    if sort == "relevance" and ts_query is not None:
+        if after:
+            raise HTTPException(
+                status_code=400, detail="Cursor pagination is not available for relevance ordering"
+            )
+        order = (func.ts_rank(ArticleDB.search_vector, ts_query).desc(), ArticleDB.id.desc())
     else:
-        order = (ArticleDB.id.desc(),)
+        key = SORT_KEYS.get(sort, SORT_KEYS["latest"])
+        order = tuple(col.desc() for col in key)
+        if after:
+            query = query.filter(after_cursor(key, after))
+            skip = 0
 
     rows = query.order_by(*order).offset(skip).limit(limit).all()
     return (rows, total) if with_total else rows
 
 
-def get_user_drafts(db: Session, author_id: int, skip: int = 0, limit: int = 50) -> List[ArticleDB]:
+def get_user_drafts(
+    db: Session, author_id: int, skip: int = 0, limit: int = 50, full: bool = False
+) -> List[ArticleDB]:
     """The author's own drafts, newest first."""
     return (
         db.query(ArticleDB)
+        .options(*card_options(full))
         .filter(ArticleDB.author_id == author_id, ArticleDB.status == ArticleStatus.DRAFT)
         .order_by(ArticleDB.id.desc())
         .offset(max(0, skip))
@@ -138,9 +200,11 @@ def update_article(db: Session, article_id: int, article_data: ArticleUpdate) ->
             detail=f"Article with ID {article_id} not found",
         )
 
+    old_tags, was_listed = list(article.tags or []), is_listed(article)
     data = article_data.model_dump(exclude_unset=True)
     if data.get("content") is not None:
         data["content"] = sanitize_html(data["content"])
+        article.excerpt = make_excerpt(data["content"])
         article.reading_time_minutes = reading_time_minutes(data["content"])
         article.word_count = word_count(data["content"])
 
@@ -155,13 +219,18 @@ def update_article(db: Session, article_id: int, article_data: ArticleUpdate) ->
 
     if "status" in data:
         if data["status"] == ArticleStatus.PUBLISHED and article.published_date is None:
-            article.published_date = datetime.now(timezone.utc)
+            article.published_date = datetime.utcnow()
         elif data["status"] == ArticleStatus.DRAFT:
             article.published_date = None
 
     try:
+        sync_article_tags(db, article, old_tags, was_listed)
+        sync_article_timelines(db, article, was_listed)
         db.commit()
         db.refresh(article)
+        if RELATED_FIELDS & data.keys():
+            related_index.mark(article.id)
+        invalidate_article_caches(article.author.username)
         return article
     except SQLAlchemyError as commit_error:
         db.rollback()
@@ -178,9 +247,13 @@ def delete_article(db: Session, article_id: int) -> None:
     if not article:
         raise HTTPException(status_code=404, detail="Article not found")
 
+    release_article_tags(db, article)
+    related_index.mark_listing(db, article.id)
+    author_username = article.author.username
     db.query(CommentDB).filter(CommentDB.article_id == article_id).delete(synchronize_session=False)
     db.delete(article)
     db.commit()
+    invalidate_article_caches(author_username)
 
 
 def get_article_with_likes(db: Session, article_id: int) -> ArticleDB:
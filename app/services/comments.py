@@ -1,19 +1,38 @@
-"""Comment domain: threads, editing, and moderation-aware queries."""
+"""Comment domain: threads, editing, and moderation-aware queries.
+
+Threads are read a level at a time: a page of top-level comments, each with
+its first few direct replies, and a cursor endpoint for the rest of any one
+comment's replies. ``replies_count`` tells clients which comments have more,
+so an article with thousands of comments never ships them all at once.
+"""
 import logging
 import re
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence
 
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session, selectinload
 
+from app.core.cache import response_cache
 from app.models.comment import CommentDB
 from app.models.user import UserDB
 from app.schemas.comment import CommentCreate
+from app.services.counters import adjust_comments_count, adjust_replies_count
+from app.utils.pagination import after_cursor
 
 logger = logging.getLogger(__name__)
 
 MENTION_RE = re.compile(r"@([a-zA-Z0-9_]{3,30})")
 
+# ORDER BY key (all descending) per comment sort; the trailing id keeps keys unique.
+COMMENT_SORT_KEYS = {
+    "new": (CommentDB.created_date, CommentDB.id),
+    "top": (CommentDB.likes_count, CommentDB.created_date, CommentDB.id),
+}
+
+# Replies read oldest first, in conversation order (ascending keyset).
+REPLY_KEY = (CommentDB.created_date, CommentDB.id)
+
 
 def create_new_comment(db: Session, comment_data: CommentCreate, author_id: int) -> CommentDB:
     """Create a comment or threaded reply."""
@@ -24,8 +43,11 @@ def create_new_comment(db: Session, comment_data: CommentCreate, author_id: int)
         parent_id=comment_data.parent_id,
     )
     db.add(new_comment)
+    adjust_comments_count(db, comment_data.article_id, +1)
+    adjust_replies_count(db, comment_data.parent_id, +1)
     db.commit()
     db.refresh(new_comment)
+    response_cache.invalidate("engagement")
     return new_comment
 
 
@@ -45,20 +67,78 @@ def extract_mentions(db: Session, content: str, exclude_user_id: int) -> List[Us
     return [u for u in users if u.id != exclude_user_id]
 
 
+def comment_sort_key(comment: CommentDB, sort: str = "new") -> list:
+    """``comment``'s values for the sort's keyset columns (the cursor payload)."""
+    return [getattr(comment, col.key) for col in COMMENT_SORT_KEYS.get(sort, COMMENT_SORT_KEYS["new"])]
+
+
 def get_comments_by_article(
-    db: Session, article_id: int, skip: int = 0, limit: int = 100, sort: str = "new"
+    db: Session,
+    article_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    sort: str = "new",
+    after: Optional[str] = None,
+    top_level_only: bool = False,
 ) -> List[CommentDB]:
-    """Comments for an article, excluding deleted; sort by recency or likes."""
-    query = db.query(CommentDB).filter(
+    """Comments for an article, excluding deleted; sort by recency or likes.
+
+    ``after`` (a cursor over ``comment_sort_key``) pages by keyset instead of
+    offset. ``top_level_only`` leaves out replies (the threaded view's roots).
+    """
+    query = db.query(CommentDB).options(selectinload(CommentDB.user)).filter(
         CommentDB.article_id == article_id, CommentDB.is_deleted == False
     )
-    if sort == "top":
-        query = query.order_by(CommentDB.likes_count.desc(), CommentDB.created_date.desc())
-    else:
-        query = query.order_by(CommentDB.created_date.desc())
+    if top_level_only:
+        query = query.filter(CommentDB.parent_id.is_(None))
+    key = COMMENT_SORT_KEYS.get(sort, COMMENT_SORT_KEYS["new"])
+    if after:
+        query = query.filter(after_cursor(key, after))
+        skip = 0
+    query = query.order_by(*(col.desc() for col in key))
     return query.offset(max(0, skip)).limit(limit).all()
 
 
+def get_replies(
+    db: Session, parent_id: int, limit: int = 20, after: Optional[str] = None
+) -> List[CommentDB]:
+    """A comment's direct replies, oldest first; ``after`` is a cursor over ``REPLY_KEY``."""
+    query = db.query(CommentDB).options(selectinload(CommentDB.user)).filter(
+        CommentDB.parent_id == parent_id, CommentDB.is_deleted == False
+    )
+    if after:
+        query = query.filter(after_cursor(REPLY_KEY, after, descending=False))
+    return query.order_by(*REPLY_KEY).limit(limit).all()
+
+
+def get_first_replies(db: Session, parent_ids: Sequence[int], per_parent: int) -> Dict[int, List[CommentDB]]:
+    """The first ``per_parent`` replies of each comment, in one windowed query."""
+    if not parent_ids or per_parent <= 0:
+        return {}
+    ranked = (
+        select(
+            CommentDB.id,
+            func.row_number()
+            .over(partition_by=CommentDB.parent_id, order_by=REPLY_KEY)
+            .label("rank"),
+        )
+        .where(CommentDB.parent_id.in_(parent_ids), CommentDB.is_deleted == False)
+        .subquery()
+    )
+    replies = (
+        db.query(CommentDB)
+        .options(selectinload(CommentDB.user))
+        .join(ranked, ranked.c.id == CommentDB.id)
+        .filter(ranked.c.rank <= per_parent)
+        .order_by(*REPLY_KEY)
+        .all()
+    )
+    by_parent: Dict[int, List[CommentDB]] = {}
+    for reply in replies:
+        by_parent.setdefault(reply.parent_id, []).append(reply)
+    return by_parent
+
+
 def get_comment_by_id(db: Session, comment_id: int) -> CommentDB:
     """Fetch a comment by id, raising 404 when absent."""
     comment = db.query(CommentDB).filter(CommentDB.id == comment_id).first()
@@ -70,15 +150,33 @@ def get_comment_by_id(db: Session, comment_id: int) -> CommentDB:
     return comment
 
 
+def _visible_in_thread(db: Session, comment_id: int) -> int:
+    """Non-deleted comments in the thread rooted at ``comment_id``, itself included."""
+    thread = select(CommentDB.id, CommentDB.is_deleted).where(CommentDB.id == comment_id).cte(
+        "thread", recursive=True
+    )
+    thread = thread.union_all(
+        select(CommentDB.id, CommentDB.is_deleted).where(CommentDB.parent_id == thread.c.id)
+    )
+    return db.execute(
+        select(func.count()).select_from(thread).where(thread.c.is_deleted == False)
+    ).scalar()
+
+
 def delete_comment(db: Session, comment_id: int) -> None:
     """Delete a comment by id. Authorization is the caller's responsibility."""
     comment = db.query(CommentDB).filter(CommentDB.id == comment_id).first()
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
+    # Replies go with it through the foreign key cascade.
+    adjust_comments_count(db, comment.article_id, -_visible_in_thread(db, comment.id))
+    if not comment.is_deleted:
+        adjust_replies_count(db, comment.parent_id, -1)
     db.delete(comment)
     db.commit()
+    response_cache.invalidate("engagement")
 
 
 def get_all_comments(db: Session) -> List[CommentDB]:
     """All comments, newest first (admin listing)."""
-    return db.query(CommentDB).order_by(CommentDB.id.desc()).all()
+    return db.query(CommentDB).options(selectinload(CommentDB.user)).order_by(CommentDB.id.desc()).all()
@@ -0,0 +1,276 @@
+"""Denormalized engagement counters and their reconciliation.
+
+``articles.comments_count``, ``articles.likes_count``, ``comments.likes_count``,
+``comments.replies_count`` and ``users.unread_notifications`` are kept in step
+by their write paths, each adjusting the counter in the same transaction as the
+rows it adds or removes.
+Likes go further: the INSERT/DELETE of the like and the ``+1``/``-1`` on its
+target run as one statement (a data-modifying CTE), so a click is a single
+round trip and never counts the target's likes.
+
+The reconciler job walks each counted table in id order, a batch per pass,
+recounting from the source rows and repairing any counter that has drifted (a
+write path that bypassed the service layer, a manual fix in the database, a
+race between a recount and a concurrent write).
+"""
+import logging
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import Integer, column, delete, func, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session, aliased
+
+from app.core.config import settings
+from app.core.jobs import PeriodicJob
+from app.db.session import SessionLocal
+from app.models.article import ArticleDB
+from app.models.comment import CommentDB
+from app.models.comment_like import CommentLikeDB
+from app.models.like import LikeDB
+from app.models.notification import NotificationDB
+from app.models.user import UserDB
+
+logger = logging.getLogger(__name__)
+
+
+def _update(model):
+    """``update(model)`` that keeps the row's ``updated_date`` as it was.
+
+    A counter moving is not an edit, but a core UPDATE would otherwise fire
+    the column's ``onupdate=now()``.
+    """
+    statement = update(model)
+    if "updated_date" in model.__table__.c:
+        statement = statement.values(updated_date=model.updated_date)
+    return statement
+
+
+def _apply_deltas(db: Session, counter, deltas: Dict[int, int]) -> None:
+    """Add per-row deltas to ``counter`` in one UPDATE ... FROM (VALUES ...)."""
+    deltas = {row_id: d for row_id, d in deltas.items() if d}
+    if not deltas:
+        return
+    model = counter.class_
+    batch = values(
+        column("id", Integer), column("delta", Integer), name="counter_deltas"
+    ).data(list(deltas.items()))
+    db.execute(
+        _update(model)
+        .where(model.id == batch.c.id)
+        .values({counter: counter + batch.c.delta})
+        .execution_options(synchronize_session=False)
+    )
+
+
+def adjust_comments_count(db: Session, article_id: int, delta: int) -> None:
+    """Add ``delta`` to one article's comment count. Does not commit."""
+    _apply_deltas(db, ArticleDB.comments_count, {article_id: delta})
+
+
+def apply_comment_deltas(db: Session, deltas: Dict[int, int]) -> None:
+    """Adjust many articles' comment counts in one statement. Does not commit."""
+    _apply_deltas(db, ArticleDB.comments_count, deltas)
+
+
+def adjust_replies_count(db: Session, comment_id: Optional[int], delta: int) -> None:
+    """Add ``delta`` to one comment's reply count (no-op for ``None``). Does not commit."""
+    if comment_id is not None:
+        _apply_deltas(db, CommentDB.replies_count, {comment_id: delta})
+
+
+def apply_reply_deltas(db: Session, deltas: Dict[int, int]) -> None:
+    """Adjust many comments' reply counts in one statement. Does not commit."""
+    _apply_deltas(db, CommentDB.replies_count, deltas)
+
+
+def adjust_unread_notifications(db: Session, user_id: int, delta: int) -> Optional[int]:
+    """Add ``delta`` to one user's unread count; returns the new count. Does not commit."""
+    return db.execute(
+        update(UserDB)
+        .where(UserDB.id == user_id)
+        .values(unread_notifications=UserDB.unread_notifications + delta)
+        .returning(UserDB.unread_notifications)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+
+
+def apply_unread_deltas(db: Session, deltas: Dict[int, int]) -> None:
+    """Adjust many users' unread counts in one statement. Does not commit."""
+    _apply_deltas(db, UserDB.unread_notifications, deltas)
+
+
+def _count_change(db: Session, change, model, delta: int, *returning) -> Optional[Row]:
+    """Run ``change`` (a like INSERT/DELETE returning ``target_id``) and move the
+    target's ``likes_count`` by ``delta`` in the same statement.
+
+    Returns the target's new count (plus any ``returning`` columns), or None
+    when ``change`` touched no row. Does not commit.
+    """
+    changed = change.cte("changed")
+    return db.execute(
+        _update(model)
+        .where(model.id == changed.c.target_id)
+        .values(likes_count=model.likes_count + delta)
+        .returning(model.likes_count, *returning)
+        .execution_options(synchronize_session=False)
+    ).one_or_none()
+
+
+def add_article_like(db: Session, user_id: int, article_id: int) -> Optional[Row]:
+    """Like an article: ``(likes_count, author_id, title)``, or None if already liked.
+
+    Raises ``IntegrityError`` when the article does not exist. Does not commit.
+    """
+    change = (
+        insert(LikeDB)
+        .values(user_id=user_id, article_id=article_id)
+        .on_conflict_do_nothing(constraint="unique_like")
+        .returning(LikeDB.article_id.label("target_id"))
+    )
+    return _count_change(db, change, ArticleDB, +1, ArticleDB.author_id, ArticleDB.title)
+
+
+def remove_article_like(db: Session, user_id: int, article_id: int) -> Optional[int]:
+    """Unlike an article: the new count, or None if it was not liked. Does not commit."""
+    change = (
+        delete(LikeDB)
+        .where(LikeDB.user_id == user_id, LikeDB.article_id == article_id)
+        .returning(LikeDB.article_id.label("target_id"))
+    )
+    row = _count_change(db, change, ArticleDB, -1)
+    return row.likes_count if row is not None else None
+
+
+def add_comment_like(db: Session, user_id: int, comment_id: int) -> Optional[int]:
+    """Like a comment: the new count, or None if already liked. Does not commit."""
+    change = (
+        insert(CommentLikeDB)
+        .values(user_id=user_id, comment_id=comment_id)
+        .on_conflict_do_nothing(constraint="unique_comment_like")
+        .returning(CommentLikeDB.comment_id.label("target_id"))
+    )
+    row = _count_change(db, change, CommentDB, +1)
+    return row.likes_count if row is not None else None
+
+
+def remove_comment_like(db: Session, user_id: int, comment_id: int) -> Optional[int]:
+    """Unlike a comment: the new count, or None if it was not liked. Does not commit."""
+    change = (
+        delete(CommentLikeDB)
+        .where(CommentLikeDB.user_id == user_id, CommentLikeDB.comment_id == comment_id)
+        .returning(CommentLikeDB.comment_id.label("target_id"))
+    )
+    row = _count_change(db, change, CommentDB, -1)
+    return row.likes_count if row is not None else None
+
+
+Reply = aliased(CommentDB, name="reply")
+
+
+class CounterSpec(NamedTuple):
+    """A denormalized counter column and the correlated recount it must equal."""
+
+    name: str
+    model: type
+    column: object
+    actual: object
+
+
+COUNTERS = (
+    CounterSpec(
+        "article comments",
+        ArticleDB,
+        ArticleDB.comments_count,
+        select(func.count(CommentDB.id))
+        .where(CommentDB.article_id == ArticleDB.id, CommentDB.is_deleted == False)
+        .scalar_subquery(),
+    ),
+    CounterSpec(
+        "article likes",
+        ArticleDB,
+        ArticleDB.likes_count,
+        select(func.count(LikeDB.id)).where(LikeDB.article_id == ArticleDB.id).scalar_subquery(),
+    ),
+    CounterSpec(
+        "comment replies",
+        CommentDB,
+        CommentDB.replies_count,
+        select(func.count(Reply.id))
+        .where(Reply.parent_id == CommentDB.id, Reply.is_deleted == False)
+        .scalar_subquery(),
+    ),
+    CounterSpec(
+        "comment likes",
+        CommentDB,
+        CommentDB.likes_count,
+        select(func.count(CommentLikeDB.id))
+        .where(CommentLikeDB.comment_id == CommentDB.id)
+        .scalar_subquery(),
+    ),
+    CounterSpec(
+        "unread notifications",
+        UserDB,
+        UserDB.unread_notifications,
+        select(func.count(NotificationDB.id))
+        .where(NotificationDB.user_id == UserDB.id, NotificationDB.is_read == False)
+        .scalar_subquery(),
+    ),
+)
+
+
+class CounterReconciler:
+    """Recount one batch of rows per counter per pass, resuming where the last left off."""
+
+    def __init__(self, interval_seconds: float, batch_size: int) -> None:
+        self.batch_size = batch_size
+        self._cursors: Dict[str, int] = {}
+        self.job = PeriodicJob("counter-reconcile", self.reconcile, interval_seconds)
+
+    def reconcile_batch(
+        self, db: Session, spec: CounterSpec, after_id: int
+    ) -> Tuple[Optional[int], int]:
+        """Repair ``spec``'s counter for the next batch of rows after ``after_id``. Commits.
+
+        Returns ``(last id checked or None when past the end, rows repaired)``.
+        """
+        model = spec.model
+        batch = (
+            select(model.id)
+            .where(model.id > after_id)
+            .order_by(model.id)
+            .limit(self.batch_size)
+            .subquery()
+        )
+        last_id = db.execute(select(func.max(batch.c.id))).scalar()
+        if last_id is None:
+            return None, 0
+        repaired = db.execute(
+            _update(model)
+            .where(model.id > after_id, model.id <= last_id, spec.column != spec.actual)
+            .values({spec.column: spec.actual})
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        return last_id, repaired
+
+    def reconcile(self) -> int:
+        """Check the next batch of every counter, wrapping to the start after the last row."""
+        db = SessionLocal()
+        total = 0
+        try:
+            for spec in COUNTERS:
+                last_id, repaired = self.reconcile_batch(db, spec, self._cursors.get(spec.name, 0))
+                self._cursors[spec.name] = last_id or 0
+                if repaired:
+                    logger.warning(f"Repaired {repaired} drifted {spec.name} counts")
+                total += repaired
+        finally:
+            db.close()
+        return total
+
+
+counter_reconciler = CounterReconciler(
+    interval_seconds=settings.COUNTER_RECONCILE_SECONDS,
+    batch_size=settings.COUNTER_RECONCILE_BATCH,
+)
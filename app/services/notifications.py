@@ -1,13 +1,46 @@
-"""Notification domain: persistence, preference gating, real-time delivery."""
+"""Notification domain: persistence, preference gating, real-time delivery.
+
+Write paths never wait on notification I/O: they ``enqueue`` an event on the
+in-process ``notification_outbox`` and return. A small pool of event-loop
+workers drains the outbox in batches over the async engine — one SELECT for
+the recipients' preferences, one multi-row INSERT for the notifications that
+pass, one commit — then pushes each stored notification to its recipient's
+socket. Events enqueued but not
+yet stored are lost if the process dies; the outbox drains on shutdown.
+
+Likes, comments, replies and follows are coalesced: events carrying the same
+``group_key`` for a recipient update that recipient's open (unread, recently
+active) notification in place — "alice and 41 others liked ..." — with its
+distinct actors (newest first) and their count kept in ``extra_data``. A group
+holds at most ``MAX_GROUP_ACTORS`` actors; the next new actor opens a fresh
+notification, so the count stays exact while rows stay small. Storage and
+pushes then grow with the number of distinct targets rather than raw events.
+
+Each user's unread count is kept on ``users.unread_notifications`` by the
+outbox and the read / read-all / delete paths below, and every change is
+pushed to the user's sockets as ``{"type": "unread_count", "unread_count": n}``
+(notification types never take that name, so clients can tell the two apart).
+"""
+import asyncio
 import json
 import logging
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Deque, Dict, List, Optional, Tuple
 
+from sqlalchemy import Integer, column, delete, func, insert, select, update, values
 from sqlalchemy.orm import Session
-from fastapi import WebSocket
 
+from app.core.config import settings
+from app.db.session import AsyncSessionLocal
 from app.models.notification import NotificationDB
 from app.models.user import UserDB
-from app.ws import websocket_manager
+from app.services.counters import adjust_unread_notifications, apply_unread_deltas
+from app.utils.pagination import after_cursor
+from app.ws import Envelope, websocket_hub
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +51,15 @@ _PREF_FOR_TYPE = {
     "follow": "notify_follows",
 }
 
+# Distinct actors one coalesced notification can hold; ``actor_count`` is
+# always the length of its ``actors`` list.
+MAX_GROUP_ACTORS = 100
+# First key of the two-key advisory lock serializing group merges per recipient.
+GROUP_LOCK_NAMESPACE = 0x6E6F
+
+# Keyset ORDER BY (descending) shared by the notification lists.
+NOTIFICATION_SORT_KEY = (NotificationDB.created_at, NotificationDB.id)
+
 
 def serialize_notification(notification: NotificationDB) -> dict:
     """JSON-safe representation used for WebSocket delivery."""
@@ -28,69 +70,424 @@ def serialize_notification(notification: NotificationDB) -> dict:
         "type": notification.type,
         "is_read": notification.is_read,
         "extra_data": notification.extra_data,
+        "group_key": notification.group_key,
         "created_at": notification.created_at.isoformat() if notification.created_at else None,
     }
 
 
-def _recipient_allows(db: Session, user_id: int, notif_type: str) -> bool:
-    """Check the recipient's preferences for this event type.
+def _recipient_allows(prefs, notif_type: str) -> bool:
+    """Check the recipient's preferences row for this event type.
 
-    Mention and system notifications are always delivered.
+    Mention and system notifications are always delivered (to existing users).
     """
+    if prefs is None:
+        return False
     pref_field = _PREF_FOR_TYPE.get(notif_type)
-    if pref_field is None:
-        return True
-    user = db.query(UserDB).filter(UserDB.id == user_id).first()
-    return bool(user and getattr(user, pref_field, True))
+    return pref_field is None or bool(getattr(prefs, pref_field, True))
 
 
-def fetch_unread_notifications(db: Session, user_id: int, skip: int = 0, limit: int = 10):
-    """Unread notifications, newest first (empty list when none)."""
+def _actors_text(actors: List[str], count: int) -> str:
+    """``alice``, ``alice and bob``, or ``alice and 41 others`` (newest first)."""
+    if count <= 1:
+        return actors[0]
+    if count == 2 and len(actors) == 2:
+        return f"{actors[0]} and {actors[1]}"
+    return f"{actors[0]} and {count - 1} others"
+
+
+def fetch_notifications(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 30,
+    after: Optional[str] = None,
+    unread_only: bool = False,
+):
+    """A user's notifications, newest first, paged by cursor (``after``) or offset."""
+    query = db.query(NotificationDB).filter(NotificationDB.user_id == user_id)
+    if unread_only:
+        query = query.filter(NotificationDB.is_read == False)
+    if after:
+        query = query.filter(after_cursor(NOTIFICATION_SORT_KEY, after))
+        skip = 0
     return (
-        db.query(NotificationDB)
-        .filter(NotificationDB.user_id == user_id, NotificationDB.is_read == False)
-        .order_by(NotificationDB.created_at.desc())
+        query.order_by(*(col.desc() for col in NOTIFICATION_SORT_KEY))
         .offset(max(0, skip))
         .limit(limit)
         .all()
     )
 
 
-async def send_notification_to_user(
-    db: Session,
-    user_id: int,
-    message: str,
-    websocket: WebSocket = None,
-    notif_type: str = "system",
-    extra_data: dict = None,
+def fetch_unread_notifications(
+    db: Session, user_id: int, skip: int = 0, limit: int = 10, after: Optional[str] = None
 ):
-    """Persist a notification and push it in real time when the user is connected.
+    """Unread notifications, newest first (empty list when none)."""
+    return fetch_notifications(db, user_id, skip, limit, after=after, unread_only=True)
+
 
-    Respects the recipient's notification preferences; failures in real-time
-    delivery are swallowed — the stored notification is the source of truth.
+def unread_count(db: Session, user_id: int) -> int:
+    """The user's maintained unread count (one primary-key read)."""
+    return db.execute(
+        select(UserDB.unread_notifications).where(UserDB.id == user_id)
+    ).scalar_one_or_none() or 0
+
+
+def mark_notification_read(db: Session, user_id: int, notification_id: int) -> Optional[int]:
+    """Mark one of the user's notifications read. Commits.
+
+    Returns the user's unread count afterwards, or None when the notification
+    does not exist (or is not theirs).
     """
-    try:
-        if not _recipient_allows(db, user_id, notif_type):
+    changed = db.execute(
+        update(NotificationDB)
+        .where(
+            NotificationDB.id == notification_id,
+            NotificationDB.user_id == user_id,
+            NotificationDB.is_read == False,
+        )
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if changed:
+        count = adjust_unread_notifications(db, user_id, -1)
+    else:
+        exists = db.execute(
+            select(NotificationDB.id).where(
+                NotificationDB.id == notification_id, NotificationDB.user_id == user_id
+            )
+        ).first()
+        if exists is None:
             return None
+        count = unread_count(db, user_id)
+    db.commit()
+    return count
+
+
+def mark_all_notifications_read(db: Session, user_id: int) -> int:
+    """Mark every unread notification of the user read. Commits; returns the new count."""
+    changed = db.execute(
+        update(NotificationDB)
+        .where(NotificationDB.user_id == user_id, NotificationDB.is_read == False)
+        .values(is_read=True)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    count = adjust_unread_notifications(db, user_id, -changed) if changed else unread_count(db, user_id)
+    db.commit()
+    return count
+
+
+def delete_user_notification(db: Session, user_id: int, notification_id: int) -> Optional[int]:
+    """Delete one of the user's notifications. Commits.
+
+    Returns the user's unread count afterwards, or None when there was no such
+    notification.
+    """
+    was_read = db.execute(
+        delete(NotificationDB)
+        .where(NotificationDB.id == notification_id, NotificationDB.user_id == user_id)
+        .returning(NotificationDB.is_read)
+        .execution_options(synchronize_session=False)
+    ).scalar_one_or_none()
+    if was_read is None:
+        return None
+    count = adjust_unread_notifications(db, user_id, -1) if not was_read else unread_count(db, user_id)
+    db.commit()
+    return count
+
+
+def unread_count_message(count: int) -> str:
+    """WebSocket payload announcing a new unread count."""
+    return json.dumps({"type": "unread_count", "unread_count": count})
 
-        new_notification = NotificationDB(
-            user_id=user_id, message=message, is_read=False,
-            type=notif_type, extra_data=extra_data,
-        )
-        db.add(new_notification)
-        db.commit()
-        db.refresh(new_notification)
 
-        payload = serialize_notification(new_notification)
+async def push_unread_count(user_id: int, count: int) -> None:
+    """Push the user's unread count to their sockets; failures are logged only."""
+    try:
+        await websocket_hub.send_message(user_id, unread_count_message(count))
+    except Exception:
+        logger.warning(f"Failed to push unread count to user {user_id}", exc_info=True)
+
+
+@dataclass
+class OutboxEvent:
+    user_id: int
+    message: str
+    type: str
+    extra_data: Optional[dict]
+    group_key: Optional[str] = None
+    actor: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class NotificationOutbox:
+    """Thread-safe queue of pending notifications, drained by a worker pool.
+
+    Started and stopped from the ``lifespan`` hook alongside the periodic jobs.
+    """
+
+    # A failed batch is retried this many times before its events are dropped.
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY_SECONDS = 1.0
+
+    def __init__(self, workers: int, batch_size: int, coalesce_seconds: int) -> None:
+        self.workers = workers
+        self.batch_size = batch_size
+        self.coalesce_seconds = coalesce_seconds
+        self._lock = threading.Lock()
+        self._events: Deque[OutboxEvent] = deque()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._stopping = False
+        self.stored = 0
+        self.skipped = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.last_lag_seconds = 0.0
+
+    def enqueue(
+        self,
+        user_id: int,
+        message: str,
+        notif_type: str = "system",
+        extra_data: dict = None,
+        group_key: Optional[str] = None,
+        actor: Optional[str] = None,
+    ) -> None:
+        """Queue a notification for ``user_id``. Safe to call from any thread.
+
+        With a ``group_key`` the event merges into the recipient's open
+        notification for that key; ``message`` is then a template whose
+        ``{actors}`` is replaced by the rendered actor list, and ``actor`` names
+        who caused this event.
+        """
+        event = OutboxEvent(user_id, message, notif_type, extra_data, group_key, actor)
+        with self._lock:
+            self._events.append(event)
+        if self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def stats(self) -> dict:
+        """Queue depth, age of the oldest pending event, and delivery counters."""
+        with self._lock:
+            depth = len(self._events)
+            oldest = self._events[0].enqueued_at if self._events else None
+        return {
+            "queue_depth": depth,
+            "oldest_pending_seconds": round(time.monotonic() - oldest, 3) if oldest else 0.0,
+            "last_batch_lag_seconds": round(self.last_lag_seconds, 3),
+            "stored": self.stored,
+            "skipped_by_preference": self.skipped,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "workers": len(self._tasks),
+        }
+
+    def start(self) -> None:
+        """Start the worker pool on the running event loop."""
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._tasks = [
+            self._loop.create_task(self._work(), name=f"notification-outbox:{n}")
+            for n in range(self.workers)
+        ]
+        if self._events:
+            self._wake.set()
+
+    async def stop(self) -> None:
+        """Let the workers drain the queue and exit, then store any late arrivals.
+
+        Workers are never cancelled: one cancelled inside ``_drain_one`` would
+        lose the batch it had already taken off the queue.
+        """
+        self._stopping = True
+        if self._wake is not None:
+            self._wake.set()
+        await asyncio.gather(*self._tasks)
+        self._tasks = []
+        while await self._drain_one():
+            pass
+
+    def _take(self) -> List[OutboxEvent]:
+        with self._lock:
+            n = min(self.batch_size, len(self._events))
+            return [self._events.popleft() for _ in range(n)]
+
+    async def _work(self) -> None:
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            while await self._drain_one():
+                pass
+            if self._stopping:
+                return
+
+    async def _drain_one(self) -> bool:
+        """Store and push one batch; False when the queue was empty."""
+        batch = self._take()
+        if not batch:
+            return False
         try:
-            if websocket:
-                await websocket.send_json(payload)
+            async with AsyncSessionLocal() as db:
+                envelopes = await db.run_sync(self._store, batch)
+        except Exception:
+            logger.error(f"Failed to store {len(batch)} notifications", exc_info=True)
+            self._requeue(batch)
+            await asyncio.sleep(self.RETRY_DELAY_SECONDS)
+            return True
+        with self._lock:
+            self.batches += 1
+            self.last_lag_seconds = time.monotonic() - batch[0].enqueued_at
+        try:
+            await websocket_hub.send_messages(envelopes)
+        except Exception:
+            # Stored already; clients catch up by fetching their notifications.
+            logger.warning(f"Failed to push {len(envelopes)} notification messages", exc_info=True)
+        return True
+
+    def _store(self, db: Session, batch: List[OutboxEvent]) -> List[Envelope]:
+        """Gate by preferences, merge grouped events, insert the rest. Commits.
+
+        Returns the ``(user_id, text)`` pushes: each stored notification, then
+        each recipient's new unread count.
+        """
+        prefs = {
+            row.id: row
+            for row in db.execute(
+                select(
+                    UserDB.id, UserDB.notify_likes, UserDB.notify_comments, UserDB.notify_follows
+                ).where(UserDB.id.in_({e.user_id for e in batch}))
+            )
+        }
+        allowed = [e for e in batch if _recipient_allows(prefs.get(e.user_id), e.type)]
+        groups: Dict[Tuple[int, str], List[OutboxEvent]] = {}
+        rows = []
+        for e in allowed:
+            if e.group_key is None:
+                rows.append({
+                    "user_id": e.user_id, "message": e.message, "type": e.type,
+                    "extra_data": e.extra_data, "group_key": None, "is_read": False,
+                    "created_at": e.created_at,
+                })
             else:
-                await websocket_manager.send_message(user_id, json.dumps(payload))
-        except Exception as ws_error:
-            logger.debug(f"Real-time delivery skipped for user {user_id}: {ws_error}")
+                groups.setdefault((e.user_id, e.group_key), []).append(e)
 
-        return new_notification
-    except Exception as e:
-        logger.error(f"Failed to send notification to user {user_id}: {e}")
-        return None
+        stored = []
+        if groups:
+            merged, new_rows = self._merge_groups(db, groups)
+            stored.extend(merged)
+            rows.extend(new_rows)
+        counts = {}
+        if rows:
+            stored.extend(db.scalars(insert(NotificationDB).returning(NotificationDB), rows).all())
+            # Merged groups were already unread; only new rows move the count.
+            deltas = Counter(row["user_id"] for row in rows)
+            apply_unread_deltas(db, deltas)
+            counts = dict(db.execute(
+                select(UserDB.id, UserDB.unread_notifications).where(UserDB.id.in_(deltas))
+            ).all())
+        envelopes = [(n.user_id, json.dumps(serialize_notification(n))) for n in stored]
+        envelopes.extend((user_id, unread_count_message(n)) for user_id, n in counts.items())
+        db.commit()
+        with self._lock:
+            self.skipped += len(batch) - len(allowed)
+            self.coalesced += len(allowed) - len(rows)
+            self.stored += len(stored)
+        return envelopes
+
+    def _merge_groups(
+        self, db: Session, groups: Dict[Tuple[int, str], List[OutboxEvent]]
+    ) -> Tuple[List[NotificationDB], List[dict]]:
+        """Fold grouped events into their open notifications. Does not commit.
+
+        Returns the updated notifications (flushed) and rows to insert for
+        groups with no open notification.
+        """
+        # Another worker (or process) merging into the same recipient's groups
+        # would race on "no open row yet"; lock recipients in id order.
+        recipients = sorted({user_id for user_id, _ in groups})
+        locks = values(column("id", Integer), name="recipients").data([(r,) for r in recipients])
+        db.execute(select(func.pg_advisory_xact_lock(GROUP_LOCK_NAMESPACE, locks.c.id)))
+
+        cutoff = datetime.utcnow() - timedelta(seconds=self.coalesce_seconds)
+        open_rows = db.scalars(
+            select(NotificationDB)
+            .where(
+                NotificationDB.user_id.in_(recipients),
+                NotificationDB.group_key.in_({key for _, key in groups}),
+                NotificationDB.is_read == False,
+                NotificationDB.created_at >= cutoff,
+            )
+            .order_by(NotificationDB.id)
+        ).all()
+        current = {(n.user_id, n.group_key): n for n in open_rows}
+
+        merged, new_rows = [], []
+        for (user_id, key), events in groups.items():
+            row = current.get((user_id, key))
+            extra = (row.extra_data or {}) if row is not None else {}
+            actors = list(extra.get("actors", []))
+            if len(actors) != extra.get("actor_count", 0):
+                # Written before groups kept every actor: leave it as it is.
+                row, actors = None, []
+            folded: List[OutboxEvent] = []
+            for e in events:
+                if e.actor not in actors and len(actors) >= MAX_GROUP_ACTORS:
+                    self._fold(user_id, key, row, actors, folded, merged, new_rows)
+                    row, actors, folded = None, [], []
+                if e.actor in actors:
+                    actors.remove(e.actor)
+                actors.insert(0, e.actor)
+                folded.append(e)
+            self._fold(user_id, key, row, actors, folded, merged, new_rows)
+        db.flush()
+        return merged, new_rows
+
+    @staticmethod
+    def _fold(
+        user_id: int,
+        key: str,
+        row: Optional[NotificationDB],
+        actors: List[str],
+        events: List[OutboxEvent],
+        merged: List[NotificationDB],
+        new_rows: List[dict],
+    ) -> None:
+        """Write ``events`` (already folded into ``actors``) to ``row``, or a new row."""
+        latest = events[-1]
+        message = latest.message.replace("{actors}", _actors_text(actors, len(actors)))
+        extra_data = {**(latest.extra_data or {}), "actors": actors, "actor_count": len(actors)}
+        if row is None:
+            new_rows.append({
+                "user_id": user_id, "message": message, "type": latest.type,
+                "extra_data": extra_data, "group_key": key, "is_read": False,
+                "created_at": latest.created_at,
+            })
+        else:
+            # Bumped to the latest event so it resurfaces at the top.
+            row.message = message
+            row.extra_data = extra_data
+            row.created_at = latest.created_at
+            merged.append(row)
+
+    def _requeue(self, batch: List[OutboxEvent]) -> None:
+        retry = []
+        for event in batch:
+            event.attempts += 1
+            if event.attempts < self.MAX_ATTEMPTS:
+                retry.append(event)
+        with self._lock:
+            self.dropped += len(batch) - len(retry)
+            self._events.extendleft(reversed(retry))
+
+
+notification_outbox = NotificationOutbox(
+    workers=settings.NOTIFICATION_WORKERS,
+    batch_size=settings.NOTIFICATION_BATCH_SIZE,
+    coalesce_seconds=settings.NOTIFICATION_COALESCE_SECONDS,
+)
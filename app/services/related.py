@@ -0,0 +1,271 @@
+"""Related articles: a precomputed top-K neighbour list per article.
+
+A story's neighbours are scored from shared tags, a shared category, and
+co-readership (signed-in readers of one who also read the other). Every signal
+is symmetric, so refreshing one story also pushes it into each neighbour's
+list, then trims those lists back to ``TOP_K``.
+
+Stories are refreshed when they change (published, re-tagged, re-categorised)
+through an in-process dirty set, and a periodic sweep re-scores the stalest
+listed stories so co-readership drift is picked up and new deployments fill in.
+Every worker runs the job, but a pass holds an advisory lock: a refresh writes
+into its neighbours' lists too, so two passes at once would collide on rows.
+``/articles/{id}/related`` then reads one article's rows from an index.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import List, Set
+
+from sqlalchemy import delete, func, literal, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import PeriodicJob
+from app.db.session import SessionLocal, engine
+from app.models.article import ArticleDB
+from app.models.enums import ArticleStatus
+from app.models.related_article import RelatedArticleDB
+from app.models.tag import ArticleTagDB
+from app.models.view_history import ViewHistoryDB
+from app.services.tags import is_listed
+
+logger = logging.getLogger(__name__)
+
+TOP_K = 10
+TAG_WEIGHT = 3.0
+CATEGORY_WEIGHT = 2.0
+CO_READ_WEIGHT = 1.0
+# Most recent readers of a story considered for co-readership.
+CO_READ_SAMPLE = 500
+# Session advisory lock held for a whole refresh pass.
+REFRESH_LOCK_KEY = 0x72656C61
+
+
+def _listed():
+    return (ArticleDB.status == ArticleStatus.PUBLISHED, ArticleDB.is_unlisted == False)
+
+
+def score_neighbours(db: Session, article: ArticleDB) -> List[tuple]:
+    """``(related_id, score)`` for the article's best ``TOP_K`` listed neighbours."""
+    sources = [
+        select(
+            ArticleTagDB.article_id.label("id"),
+            (func.count() * TAG_WEIGHT).label("score"),
+        )
+        .where(
+            ArticleTagDB.tag_id.in_(
+                select(ArticleTagDB.tag_id).where(ArticleTagDB.article_id == article.id)
+            )
+        )
+        .group_by(ArticleTagDB.article_id)
+    ]
+    if article.category:
+        sources.append(
+            select(ArticleDB.id.label("id"), literal(CATEGORY_WEIGHT).label("score")).where(
+                func.lower(ArticleDB.category) == func.lower(article.category)
+            )
+        )
+    readers = (
+        select(ViewHistoryDB.user_id)
+        .where(ViewHistoryDB.article_id == article.id)
+        .order_by(ViewHistoryDB.viewed_at.desc())
+        .limit(CO_READ_SAMPLE)
+    )
+    sources.append(
+        select(
+            ViewHistoryDB.article_id.label("id"),
+            (CO_READ_WEIGHT * func.ln(1 + func.count())).label("score"),
+        )
+        .where(ViewHistoryDB.user_id.in_(readers.scalar_subquery()))
+        .group_by(ViewHistoryDB.article_id)
+    )
+
+    candidates = union_all(*sources).subquery()
+    score = func.sum(candidates.c.score).label("score")
+    rows = db.execute(
+        select(candidates.c.id, score)
+        .join(ArticleDB, ArticleDB.id == candidates.c.id)
+        .where(candidates.c.id != article.id, *_listed())
+        .group_by(candidates.c.id)
+        .order_by(score.desc(), candidates.c.id.desc())
+        .limit(TOP_K)
+    ).all()
+    return [(row.id, row.score) for row in rows]
+
+
+def _trim(db: Session, article_ids: List[int]) -> None:
+    """Cut the given articles' neighbour lists back to their best ``TOP_K``."""
+    ranked = (
+        select(
+            RelatedArticleDB.article_id,
+            RelatedArticleDB.related_id,
+            func.row_number()
+            .over(
+                partition_by=RelatedArticleDB.article_id,
+                order_by=(RelatedArticleDB.score.desc(), RelatedArticleDB.related_id.desc()),
+            )
+            .label("rank"),
+        )
+        .where(RelatedArticleDB.article_id.in_(article_ids))
+        .subquery()
+    )
+    db.execute(
+        delete(RelatedArticleDB)
+        .where(
+            RelatedArticleDB.article_id == ranked.c.article_id,
+            RelatedArticleDB.related_id == ranked.c.related_id,
+            ranked.c.rank > TOP_K,
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def refresh_related(db: Session, article_id: int) -> List[int]:
+    """Recompute one article's neighbours and its place in theirs. Commits.
+
+    Returns the articles that lost this one as a neighbour (it is no longer
+    listed); their lists are now short and should be refreshed in turn.
+    """
+    article = db.get(ArticleDB, article_id)
+    if article is None:
+        return []
+
+    neighbours = score_neighbours(db, article)
+    db.execute(delete(RelatedArticleDB).where(RelatedArticleDB.article_id == article.id))
+    if neighbours:
+        db.execute(
+            insert(RelatedArticleDB).values(
+                [{"article_id": article.id, "related_id": rid, "score": s} for rid, s in neighbours]
+            )
+        )
+
+    orphaned: List[int] = []
+    if is_listed(article):
+        if neighbours:
+            stmt = insert(RelatedArticleDB).values(
+                [{"article_id": rid, "related_id": article.id, "score": s} for rid, s in neighbours]
+            )
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=["article_id", "related_id"],
+                set_={"score": stmt.excluded.score},
+            ))
+            _trim(db, [rid for rid, _ in neighbours])
+    else:
+        orphaned = list(db.execute(
+            delete(RelatedArticleDB)
+            .where(RelatedArticleDB.related_id == article.id)
+            .returning(RelatedArticleDB.article_id)
+        ).scalars())
+
+    db.execute(
+        update(ArticleDB)
+        .where(ArticleDB.id == article.id)
+        # Pinned: a neighbour refresh must not count as an edit (onupdate).
+        .values(related_refreshed_at=datetime.utcnow(), updated_date=ArticleDB.updated_date)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return orphaned
+
+
+def get_related_articles(
+    db: Session, article: ArticleDB, limit: int, full: bool = False
+) -> List[ArticleDB]:
+    """The article's precomputed neighbours, padded with trending stories if short."""
+    from app.services.articles import card_options  # local import to avoid a cycle
+
+    related = (
+        db.query(ArticleDB)
+        .options(*card_options(full))
+        .join(RelatedArticleDB, RelatedArticleDB.related_id == ArticleDB.id)
+        .filter(RelatedArticleDB.article_id == article.id, *_listed())
+        .order_by(RelatedArticleDB.score.desc(), RelatedArticleDB.related_id.desc())
+        .limit(limit)
+        .all()
+    )
+    if article.related_refreshed_at is None:
+        related_index.mark(article.id)
+
+    if len(related) < limit:
+        seen = {a.id for a in related} | {article.id}
+        related.extend(
+            db.query(ArticleDB)
+            .options(*card_options(full))
+            .filter(*_listed(), ArticleDB.id.notin_(seen))
+            .order_by(ArticleDB.hot_score.desc(), ArticleDB.id.desc())
+            .limit(limit - len(related))
+            .all()
+        )
+    return related
+
+
+class RelatedIndex:
+    """Dirty set of articles awaiting a neighbour refresh, drained by its job."""
+
+    def __init__(self, refresh_interval_seconds: float, sweep_batch: int) -> None:
+        self.sweep_batch = sweep_batch
+        self._lock = threading.Lock()
+        self._dirty: Set[int] = set()
+        self.job = PeriodicJob("related-articles", self.refresh_pending, refresh_interval_seconds)
+
+    def mark(self, *article_ids: int) -> None:
+        """Queue articles for a refresh on the next pass."""
+        with self._lock:
+            self._dirty.update(article_ids)
+
+    def mark_listing(self, db: Session, article_id: int) -> None:
+        """Queue every article whose neighbour list currently includes ``article_id``."""
+        ids = db.execute(
+            select(RelatedArticleDB.article_id).where(RelatedArticleDB.related_id == article_id)
+        ).scalars()
+        self.mark(*ids)
+
+    def refresh_pending(self) -> int:
+        """Refresh dirty articles plus the stalest listed ones; returns the count."""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+
+        with engine.connect() as conn:
+            locked = conn.execute(select(func.pg_try_advisory_lock(REFRESH_LOCK_KEY))).scalar()
+            conn.commit()
+            if not locked:
+                # Another worker is mid-pass; keep these for the next one.
+                self.mark(*dirty)
+                return 0
+            try:
+                return self._refresh(SessionLocal(bind=conn), dirty)
+            finally:
+                conn.execute(select(func.pg_advisory_unlock(REFRESH_LOCK_KEY)))
+                conn.commit()
+
+    def _refresh(self, db: Session, dirty: Set[int]) -> int:
+        """Run one pass on ``db``; only called with the pass lock held."""
+        refreshed = 0
+        try:
+            ids = list(dirty)
+            if self.sweep_batch:
+                stalest = (
+                    select(ArticleDB.id)
+                    .where(*_listed())
+                    .order_by(ArticleDB.related_refreshed_at.asc().nulls_first())
+                    .limit(self.sweep_batch)
+                )
+                ids.extend(i for i in db.execute(stalest).scalars() if i not in dirty)
+            for article_id in ids:
+                try:
+                    self.mark(*refresh_related(db, article_id))
+                    refreshed += 1
+                except Exception:
+                    db.rollback()
+                    logger.error(f"Failed to refresh related articles for {article_id}", exc_info=True)
+        finally:
+            db.close()
+        return refreshed
+
+
+related_index = RelatedIndex(
+    refresh_interval_seconds=settings.RELATED_REFRESH_SECONDS,
+    sweep_batch=settings.RELATED_SWEEP_BATCH,
+)
@@ -0,0 +1,183 @@
+"""Notification retention: monthly partitions and batched pruning.
+
+``notifications`` is range-partitioned by ``created_at``, one partition per
+calendar month plus a default partition catching stray timestamps. The
+retention job keeps it bounded:
+
+- partitions for the current month and the next ``PARTITIONS_AHEAD`` exist
+  before any row needs them;
+- a partition whose whole month is past the unread retention age is detached
+  and dropped, which frees its space at once and leaves nothing to vacuum;
+- inside the live partitions, read notifications past
+  ``NOTIFICATION_READ_RETENTION_DAYS`` and unread ones past
+  ``NOTIFICATION_UNREAD_RETENTION_DAYS`` are deleted in short batches.
+
+Removing an unread notification moves its owner's unread count down in the
+same transaction. On an unpartitioned table only the batched deletes run.
+"""
+import logging
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import PeriodicJob
+from app.db.session import SessionLocal
+from app.models.notification import NotificationDB
+from app.services.counters import apply_unread_deltas
+
+logger = logging.getLogger(__name__)
+
+PARTITION_PREFIX = "notifications_p"
+DEFAULT_PARTITION = "notifications_default"
+# Months created ahead of the current one.
+PARTITIONS_AHEAD = 2
+
+
+def _add_months(month: date, n: int) -> date:
+    years, month_index = divmod(month.month - 1 + n, 12)
+    return date(month.year + years, month_index + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITION_PREFIX}{month:%Y_%m}"
+
+
+def is_partitioned(conn) -> bool:
+    """Whether ``notifications`` is a partitioned table (works on a Session or Connection)."""
+    relkind = conn.execute(
+        text("SELECT relkind FROM pg_class WHERE oid = to_regclass('notifications')")
+    ).scalar()
+    return relkind == "p"
+
+
+def ensure_partitions(conn, first_month: Optional[date] = None) -> None:
+    """Create the default partition and monthly ones through ``PARTITIONS_AHEAD``.
+
+    Starts at ``first_month`` (default: the current month). A no-op on an
+    unpartitioned table. Does not commit.
+    """
+    if not is_partitioned(conn):
+        return
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF notifications DEFAULT"))
+    this_month = datetime.utcnow().date().replace(day=1)
+    month = (first_month or this_month).replace(day=1)
+    while month <= _add_months(this_month, PARTITIONS_AHEAD):
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF notifications "
+            f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+        ))
+        month = _add_months(month, 1)
+
+
+def monthly_partitions(conn) -> List[Tuple[str, date]]:
+    """``(name, first day of month)`` for each monthly partition, oldest first."""
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass('notifications')"
+    )).scalars()
+    months = []
+    for name in names:
+        if name.startswith(PARTITION_PREFIX):
+            try:
+                months.append((name, datetime.strptime(name[len(PARTITION_PREFIX):], "%Y_%m").date()))
+            except ValueError:
+                continue
+    return sorted(months, key=lambda p: p[1])
+
+
+def drop_expired_partitions(db: Session, cutoff: datetime) -> int:
+    """Drop monthly partitions that end on or before ``cutoff``. Commits each; returns the count."""
+    dropped = 0
+    for name, month in monthly_partitions(db):
+        if _add_months(month, 1) > cutoff.date():
+            break
+        # Detached first, so no request can read or mark its rows while the
+        # unread counts are being taken out.
+        db.execute(text(f"ALTER TABLE notifications DETACH PARTITION {name}"))
+        unread = db.execute(
+            text(f"SELECT user_id, count(*) FROM {name} WHERE NOT is_read GROUP BY user_id")
+        ).all()
+        apply_unread_deltas(db, {user_id: -n for user_id, n in unread})
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        dropped += 1
+    return dropped
+
+
+def prune_batch(db: Session, is_read: bool, cutoff: datetime, batch_size: int) -> int:
+    """Delete up to ``batch_size`` read (or unread) notifications older than ``cutoff``. Commits."""
+    doomed = (
+        select(NotificationDB.id, NotificationDB.created_at)
+        .where(NotificationDB.is_read == is_read, NotificationDB.created_at < cutoff)
+        .limit(batch_size)
+    )
+    owners = db.execute(
+        delete(NotificationDB)
+        .where(tuple_(NotificationDB.id, NotificationDB.created_at).in_(doomed))
+        .returning(NotificationDB.user_id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    if not is_read:
+        deltas: Dict[int, int] = {}
+        for user_id in owners:
+            deltas[user_id] = deltas.get(user_id, 0) - 1
+        apply_unread_deltas(db, deltas)
+    db.commit()
+    return len(owners)
+
+
+class NotificationRetention:
+    """One retention pass per job run: partitions first, then batched deletes."""
+
+    # Bounds one pass; a backlog is worked off over the following passes.
+    MAX_BATCHES_PER_PASS = 20
+
+    def __init__(
+        self, interval_seconds: float, read_days: int, unread_days: int, batch_size: int
+    ) -> None:
+        self.read_days = read_days
+        self.unread_days = unread_days
+        self.batch_size = batch_size
+        self.deleted = 0
+        self.dropped_partitions = 0
+        self.job = PeriodicJob("notification-retention", self.run, interval_seconds)
+
+    def run(self) -> int:
+        """Maintain partitions and prune; returns the number of rows deleted."""
+        now = datetime.utcnow()
+        read_cutoff = now - timedelta(days=self.read_days)
+        unread_cutoff = now - timedelta(days=self.unread_days)
+        db = SessionLocal()
+        deleted = 0
+        try:
+            if is_partitioned(db):
+                try:
+                    ensure_partitions(db)
+                    db.commit()
+                except Exception:
+                    db.rollback()
+                    logger.error("Failed to create notification partitions", exc_info=True)
+                self.dropped_partitions += drop_expired_partitions(db, unread_cutoff)
+            for is_read, cutoff in ((True, read_cutoff), (False, unread_cutoff)):
+                for _ in range(self.MAX_BATCHES_PER_PASS):
+                    n = prune_batch(db, is_read, cutoff, self.batch_size)
+                    deleted += n
+                    if n < self.batch_size:
+                        break
+        finally:
+            db.close()
+        self.deleted += deleted
+        if deleted:
+            logger.info(f"Pruned {deleted} expired notifications")
+        return deleted
+
+
+notification_retention = NotificationRetention(
+    interval_seconds=settings.NOTIFICATION_RETENTION_SECONDS,
+    read_days=settings.NOTIFICATION_READ_RETENTION_DAYS,
+    unread_days=settings.NOTIFICATION_UNREAD_RETENTION_DAYS,
+    batch_size=settings.NOTIFICATION_RETENTION_BATCH,
+)
@@ -0,0 +1,143 @@
+"""Tag domain: the normalized tag index and its per-tag published counts.
+
+``ArticleDB.tags`` stays the article's own ordered tag list; ``article_tags``
+mirrors it for indexed lookups, and ``tags.published_count`` counts the listed,
+published stories carrying each tag. Every write path that changes an article's
+tags or visibility calls into this module before committing, so the counts move
+in the same transaction as the article.
+"""
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.models.article import ArticleDB
+from app.models.enums import ArticleStatus
+from app.models.tag import ArticleTagDB, TagDB
+
+
+def is_listed(article: ArticleDB) -> bool:
+    """Whether the article counts toward public tag totals."""
+    return article.status == ArticleStatus.PUBLISHED and not article.is_unlisted
+
+
+def _tag_ids(db: Session, names: Iterable[str]) -> Dict[str, int]:
+    """Resolve tag names to ids, creating any that do not exist yet."""
+    names = sorted(set(names))
+    if not names:
+        return {}
+    db.execute(
+        insert(TagDB).values([{"name": n} for n in names]).on_conflict_do_nothing(index_elements=["name"])
+    )
+    return dict(db.execute(select(TagDB.name, TagDB.id).where(TagDB.name.in_(names))).all())
+
+
+def _apply_count_deltas(db: Session, deltas: Dict[int, int]) -> None:
+    """Adjust published counts with one UPDATE per distinct delta value."""
+    by_delta: Dict[int, List[int]] = defaultdict(list)
+    for tag_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(tag_id)
+    for delta, tag_ids in by_delta.items():
+        db.execute(
+            update(TagDB)
+            .where(TagDB.id.in_(tag_ids))
+            .values(published_count=TagDB.published_count + delta)
+        )
+
+
+def sync_article_tags(db: Session, article: ArticleDB, old_tags: Iterable[str], was_listed: bool) -> None:
+    """Reconcile the tag index with the article's current tags and visibility.
+
+    ``old_tags`` and ``was_listed`` describe the article before the change
+    (empty / False for a new article). The article must have an id (flushed).
+    Does not commit.
+    """
+    old = set(old_tags or [])
+    new = set(article.tags or [])
+    listed = is_listed(article)
+    if old == new and was_listed == listed:
+        return
+
+    ids = _tag_ids(db, old | new)
+    removed = [ids[n] for n in old - new if n in ids]
+    added = [ids[n] for n in new - old]
+    if removed:
+        db.execute(
+            delete(ArticleTagDB).where(
+                ArticleTagDB.article_id == article.id, ArticleTagDB.tag_id.in_(removed)
+            )
+        )
+    if added:
+        db.execute(
+            insert(ArticleTagDB)
+            .values([{"article_id": article.id, "tag_id": t} for t in added])
+            .on_conflict_do_nothing()
+        )
+
+    deltas: Dict[int, int] = defaultdict(int)
+    if was_listed:
+        for name in old:
+            deltas[ids[name]] -= 1
+    if listed:
+        for name in new:
+            deltas[ids[name]] += 1
+    _apply_count_deltas(db, deltas)
+
+
+def release_article_tags(db: Session, article: ArticleDB) -> None:
+    """Drop a to-be-deleted article from the published counts.
+
+    Its ``article_tags`` rows go with it through the foreign key cascade.
+    Does not commit.
+    """
+    if is_listed(article):
+        ids = _tag_ids(db, article.tags or [])
+        _apply_count_deltas(db, {tag_id: -1 for tag_id in ids.values()})
+
+
+def release_author_tags(db: Session, author_id: int) -> None:
+    """Remove all of an author's listed stories from the published counts.
+
+    Used when the author's stories are hidden in bulk (account deletion).
+    Must run before their status changes. Does not commit.
+    """
+    counts = (
+        select(ArticleTagDB.tag_id, func.count().label("n"))
+        .join(ArticleDB, ArticleDB.id == ArticleTagDB.article_id)
+        .where(
+            ArticleDB.author_id == author_id,
+            ArticleDB.status == ArticleStatus.PUBLISHED,
+            ArticleDB.is_unlisted == False,
+        )
+        .group_by(ArticleTagDB.tag_id)
+        .subquery()
+    )
+    db.execute(
+        update(TagDB)
+        .where(TagDB.id == counts.c.tag_id)
+        .values(published_count=TagDB.published_count - counts.c.n)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def top_tags(db: Session, limit: int = 30) -> List[TagDB]:
+    """Tags in use on listed, published stories, most used first."""
+    return (
+        db.query(TagDB)
+        .filter(TagDB.published_count > 0)
+        .order_by(TagDB.published_count.desc(), TagDB.name)
+        .limit(limit)
+        .all()
+    )
+
+
+def tagged_article_ids(tag: str):
+    """Subquery of article ids carrying ``tag`` (for ``ArticleDB.id.in_``)."""
+    return (
+        select(ArticleTagDB.article_id)
+        .join(TagDB, TagDB.id == ArticleTagDB.tag_id)
+        .where(TagDB.name == tag)
+    )
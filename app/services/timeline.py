@@ -0,0 +1,271 @@
+"""Home timelines: fan-out on write, with fan-out on read for large authors.
+
+When a story becomes listed, one INSERT ... SELECT copies it into the
+``timeline_entries`` of every follower of its author, so the feed is a single
+range scan over the reader's own rows. Following an author backfills their
+recent stories; unfollowing, unpublishing, unlisting and deletion remove them.
+
+An author whose follower count passes ``TIMELINE_FANOUT_MAX_FOLLOWERS`` stops
+being fanned out (``users.timeline_fanout`` goes false; one post would write
+that many rows). Their stories are read from ``articles`` at request time and
+merged into the page by the same ``(published_date, id)`` key, so cursors work
+across both sources.
+
+Going back is deliberately lazy. Only once the author is down to
+``TIMELINE_FANOUT_RESUME_FOLLOWERS`` (a little under the threshold, so a count
+hovering around it does not flip the mode on every follow) does the
+``timeline-resume`` job backfill every follower's timeline and turn fan-out
+back on. Until then the author is still merged at read time, so nothing is
+missing in between and no unfollow request pays for the backfill.
+"""
+import heapq
+import logging
+from typing import List, Optional
+
+from sqlalchemy import delete, insert as sa_insert, select, true, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import PeriodicJob
+from app.db.session import SessionLocal
+from app.models.article import ArticleDB
+from app.models.enums import ArticleStatus
+from app.models.follow import FollowDB
+from app.models.timeline import TimelineEntryDB
+from app.models.user import UserDB
+from app.services.tags import is_listed
+from app.utils.pagination import after_cursor
+
+logger = logging.getLogger(__name__)
+
+# Stories copied into a timeline when its owner starts following an author.
+BACKFILL_PER_AUTHOR = 100
+# Authors switched back to fan-out per pass of the resume job.
+RESUME_PER_PASS = 10
+
+ENTRY_COLUMNS = ["user_id", "article_id", "author_id", "published_date"]
+
+
+def _listed():
+    return (ArticleDB.status == ArticleStatus.PUBLISHED, ArticleDB.is_unlisted == False)
+
+
+def fan_out_article(db: Session, article: ArticleDB) -> None:
+    """Deliver a newly listed story to every follower's timeline. Does not commit."""
+    fanned_out = db.query(UserDB.timeline_fanout).filter(UserDB.id == article.author_id).scalar()
+    if not fanned_out:
+        return
+    # The copy reads the article row, so pending changes (e.g. published_date)
+    # must reach the database first.
+    db.flush()
+    rows = (
+        select(FollowDB.follower_id, ArticleDB.id, ArticleDB.author_id, ArticleDB.published_date)
+        .join(ArticleDB, ArticleDB.author_id == FollowDB.followed_id)
+        .where(ArticleDB.id == article.id)
+    )
+    db.execute(insert(TimelineEntryDB).from_select(ENTRY_COLUMNS, rows).on_conflict_do_nothing())
+
+
+def retract_article(db: Session, article_id: int) -> None:
+    """Remove a story from every timeline. Does not commit."""
+    db.execute(delete(TimelineEntryDB).where(TimelineEntryDB.article_id == article_id))
+
+
+def retract_author(db: Session, author_id: int) -> None:
+    """Remove all of an author's stories from every timeline. Does not commit."""
+    db.execute(delete(TimelineEntryDB).where(TimelineEntryDB.author_id == author_id))
+
+
+def sync_article_timelines(db: Session, article: ArticleDB, was_listed: bool) -> None:
+    """Fan out or retract the article when its listed state changes. Does not commit."""
+    listed = is_listed(article)
+    if listed and not was_listed:
+        fan_out_article(db, article)
+    elif was_listed and not listed:
+        retract_article(db, article.id)
+
+
+def backfill(db: Session, author_id: int, follower_id: Optional[int] = None) -> None:
+    """Copy the author's recent stories into one follower's timeline (or all). Does not commit."""
+    recent = (
+        select(ArticleDB.id, ArticleDB.author_id, ArticleDB.published_date)
+        .where(ArticleDB.author_id == author_id, *_listed())
+        .order_by(ArticleDB.published_date.desc(), ArticleDB.id.desc())
+        .limit(BACKFILL_PER_AUTHOR)
+        .subquery()
+    )
+    followers = select(FollowDB.follower_id).where(FollowDB.followed_id == author_id)
+    if follower_id is not None:
+        followers = followers.where(FollowDB.follower_id == follower_id)
+    followers = followers.subquery()
+    rows = select(
+        followers.c.follower_id, recent.c.id, recent.c.author_id, recent.c.published_date
+    ).select_from(followers.join(recent, true()))
+    db.execute(insert(TimelineEntryDB).from_select(ENTRY_COLUMNS, rows).on_conflict_do_nothing())
+
+
+def _adjust_followers(db: Session, author_id: int, delta: int):
+    """Move the author's follower count: ``(followers_count, timeline_fanout)``."""
+    return db.execute(
+        update(UserDB)
+        .where(UserDB.id == author_id)
+        .values(followers_count=UserDB.followers_count + delta)
+        .returning(UserDB.followers_count, UserDB.timeline_fanout)
+        .execution_options(synchronize_session=False)
+    ).one()
+
+
+def follow(db: Session, follower_id: int, author_id: int) -> int:
+    """Record a follow and backfill the follower's timeline.
+
+    Raises ``IntegrityError`` if the follow already exists. Does not commit;
+    returns the author's new follower count.
+    """
+    db.execute(sa_insert(FollowDB).values(follower_id=follower_id, followed_id=author_id))
+    followers_count, fanned_out = _adjust_followers(db, author_id, +1)
+    if not fanned_out:
+        return followers_count
+    if followers_count > settings.TIMELINE_FANOUT_MAX_FOLLOWERS:
+        # Switch to fan-out on read. Entries already written stay; the read
+        # side skips duplicates.
+        db.execute(update(UserDB).where(UserDB.id == author_id).values(timeline_fanout=False))
+    else:
+        backfill(db, author_id, follower_id)
+    return followers_count
+
+
+def unfollow(db: Session, follower_id: int, author_id: int) -> Optional[int]:
+    """Remove a follow and trim the author from the follower's timeline.
+
+    Returns the author's new follower count, or None when there was no follow.
+    Does not commit.
+    """
+    removed = db.execute(
+        delete(FollowDB)
+        .where(FollowDB.follower_id == follower_id, FollowDB.followed_id == author_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if not removed:
+        return None
+    followers_count, fanned_out = _adjust_followers(db, author_id, -1)
+    db.execute(
+        delete(TimelineEntryDB).where(
+            TimelineEntryDB.user_id == follower_id, TimelineEntryDB.author_id == author_id
+        )
+    )
+    if not fanned_out and followers_count <= settings.TIMELINE_FANOUT_RESUME_FOLLOWERS:
+        # Small enough to fan out again; the backfill runs in the background.
+        timeline_resumer.job.wake()
+    return followers_count
+
+
+class TimelineResumer:
+    """Switch authors back to fan-out on write once they are under the resume threshold."""
+
+    def __init__(self, interval_seconds: float) -> None:
+        self.resumed = 0
+        self.job = PeriodicJob("timeline-resume", self.resume, interval_seconds)
+
+    def resume_author(self, db: Session, author_id: int) -> bool:
+        """Backfill every follower's timeline and turn fan-out back on. Commits.
+
+        The author row stays locked until the commit, so a concurrent follow
+        waits and then sees fan-out on (and backfills its own follower).
+        """
+        row = db.execute(
+            select(UserDB.followers_count, UserDB.timeline_fanout)
+            .where(UserDB.id == author_id)
+            .with_for_update()
+        ).one_or_none()
+        if (
+            row is None
+            or row.timeline_fanout
+            or row.followers_count > settings.TIMELINE_FANOUT_RESUME_FOLLOWERS
+        ):
+            db.rollback()
+            return False
+        backfill(db, author_id)
+        db.execute(update(UserDB).where(UserDB.id == author_id).values(timeline_fanout=True))
+        db.commit()
+        return True
+
+    def resume(self) -> int:
+        """Resume up to ``RESUME_PER_PASS`` authors; wakes itself again while more are due."""
+        db = SessionLocal()
+        try:
+            due = list(db.execute(
+                select(UserDB.id)
+                .where(
+                    UserDB.timeline_fanout == False,
+                    UserDB.followers_count <= settings.TIMELINE_FANOUT_RESUME_FOLLOWERS,
+                )
+                .order_by(UserDB.id)
+                .limit(RESUME_PER_PASS + 1)
+            ).scalars())
+            db.rollback()
+            resumed = sum(self.resume_author(db, author_id) for author_id in due[:RESUME_PER_PASS])
+        finally:
+            db.close()
+        if resumed:
+            self.resumed += resumed
+            logger.info(f"Resumed timeline fan-out for {resumed} authors")
+        if len(due) > RESUME_PER_PASS:
+            self.job.wake()
+        return resumed
+
+
+def home_timeline(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 20,
+    after: Optional[str] = None,
+    full: bool = False,
+) -> List[ArticleDB]:
+    """Listed stories from followed authors, newest first by ``(published_date, id)``."""
+    from app.services.articles import card_options  # local import to avoid a cycle
+
+    entry_key = (TimelineEntryDB.published_date, TimelineEntryDB.article_id)
+    query = (
+        db.query(ArticleDB)
+        .options(*card_options(full))
+        .join(TimelineEntryDB, TimelineEntryDB.article_id == ArticleDB.id)
+        .filter(TimelineEntryDB.user_id == user_id, *_listed())
+    )
+    if after:
+        query = query.filter(after_cursor(entry_key, after))
+        skip = 0
+    skip = max(0, skip)
+
+    large_authors = list(db.execute(
+        select(FollowDB.followed_id)
+        .join(UserDB, UserDB.id == FollowDB.followed_id)
+        .where(FollowDB.follower_id == user_id, UserDB.timeline_fanout == False)
+    ).scalars())
+    ordered = query.order_by(*(c.desc() for c in entry_key))
+    if not large_authors:
+        return ordered.offset(skip).limit(limit).all()
+
+    # Fan-out on read: both sources are sorted by the same key, so take the
+    # first skip + limit of each and merge. Entries fanned out before an
+    # author crossed the threshold are skipped, so the sources never overlap
+    # and every page is full while stories remain.
+    ordered = ordered.filter(TimelineEntryDB.author_id.notin_(large_authors))
+    window = skip + limit
+    article_key = (ArticleDB.published_date, ArticleDB.id)
+    pulled = (
+        db.query(ArticleDB)
+        .options(*card_options(full))
+        .filter(ArticleDB.author_id.in_(large_authors), *_listed())
+    )
+    if after:
+        pulled = pulled.filter(after_cursor(article_key, after))
+    pulled = pulled.order_by(*(c.desc() for c in article_key)).limit(window).all()
+
+    sort_key = lambda a: (a.published_date, a.id)
+    merged = list(heapq.merge(ordered.limit(window).all(), pulled, key=sort_key, reverse=True))
+    return merged[skip:skip + limit]
+
+
+timeline_resumer = TimelineResumer(interval_seconds=settings.TIMELINE_RESUME_SECONDS)
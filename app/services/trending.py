@@ -0,0 +1,88 @@
+"""Trending: a time-decayed "hot" score materialized on each article.
+
+``recent_views`` is an exponentially decayed view counter (the view flush adds
+to it; each refresh decays it by the time elapsed since that row's last
+refresh). ``hot_score`` combines it with likes and comments and divides by a
+power of the story's age, so fresh engagement outranks lifetime totals.
+
+Only stories published within the trending window — or still carrying a score
+from when they were — are refreshed, so each pass touches a bounded set of
+rows. ``sort=trending`` then reads the partial (hot_score, id) index in order.
+"""
+import logging
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, or_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.jobs import PeriodicJob
+from app.db.session import SessionLocal
+from app.models.article import ArticleDB
+from app.models.enums import ArticleStatus
+
+logger = logging.getLogger(__name__)
+
+LIKE_WEIGHT = 4.0
+COMMENT_WEIGHT = 6.0
+GRAVITY = 1.5
+RECENT_VIEWS_HALF_LIFE_HOURS = 24.0
+TRENDING_WINDOW_DAYS = 30
+
+
+def refresh_hot_scores(db: Session) -> int:
+    """Decay recent views and recompute hot scores for the trending window."""
+    now = datetime.utcnow()
+    window_start = now - timedelta(days=TRENDING_WINDOW_DAYS)
+
+    elapsed_hours = func.extract(
+        "epoch", now - func.coalesce(ArticleDB.hot_refreshed_at, now)
+    ) / 3600.0
+    decayed_views = ArticleDB.recent_views * func.power(
+        0.5, elapsed_hours / RECENT_VIEWS_HALF_LIFE_HOURS
+    )
+    age_hours = func.extract("epoch", now - ArticleDB.published_date) / 3600.0
+    engagement = (
+        decayed_views
+        + LIKE_WEIGHT * ArticleDB.likes_count
+        + COMMENT_WEIGHT * ArticleDB.comments_count
+        + 1.0
+    )
+
+    result = db.execute(
+        update(ArticleDB)
+        .where(
+            ArticleDB.status == ArticleStatus.PUBLISHED,
+            or_(ArticleDB.published_date >= window_start, ArticleDB.hot_score > 0),
+        )
+        .values(
+            recent_views=decayed_views,
+            # Stories that aged out of the window drop to zero and stop being refreshed.
+            hot_score=case(
+                (
+                    ArticleDB.published_date >= window_start,
+                    engagement / func.power(func.greatest(age_hours, 0) + 2.0, GRAVITY),
+                ),
+                else_=0.0,
+            ),
+            hot_refreshed_at=now,
+            # A score refresh is not an edit: keep the column's onupdate away
+            # from the author-facing "updated" time.
+            updated_date=ArticleDB.updated_date,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def _refresh() -> None:
+    db = SessionLocal()
+    try:
+        refreshed = refresh_hot_scores(db)
+        logger.debug(f"Refreshed hot scores for {refreshed} articles")
+    finally:
+        db.close()
+
+
+hot_score_job = PeriodicJob("hot-scores", _refresh, settings.HOT_SCORE_REFRESH_SECONDS)
@@ -1,18 +1,27 @@
 """User domain: account creation, profiles, roles, and soft deletion."""
 import logging
-from typing import List
+from collections import Counter
+from typing import Iterable, List
 
 from fastapi import HTTPException, status
-from sqlalchemy import or_, func
+from sqlalchemy import or_, func, select, update
 from sqlalchemy.orm import Session
 
+from app.core.cache import response_cache
+from app.core.principals import Principal, principal_cache
 from app.core.security import hash_password
 from app.models.article import ArticleDB
+from app.models.bookmark import BookmarkDB
 from app.models.comment import CommentDB
 from app.models.enums import ArticleStatus, UserRole
+from app.models.follow import FollowDB
+from app.models.like import LikeDB
 from app.models.refresh_token import RefreshTokenDB
 from app.models.user import UserDB
-from app.schemas.user import UserCreate
+from app.schemas.user import ArticleViewerState, AuthorViewerState, UserCreate, ViewerState
+from app.services.counters import apply_comment_deltas, apply_reply_deltas
+from app.services.tags import release_author_tags
+from app.services.timeline import retract_author
 
 logger = logging.getLogger(__name__)
 
@@ -58,15 +67,19 @@ def create_new_user(db: Session, user_data: UserCreate, role: UserRole = UserRol
 
 def update_user_profile(db: Session, user: UserDB, data: dict) -> UserDB:
     """Apply whitelisted profile fields and persist."""
+    old_username = user.username
     for key, value in data.items():
         if key in PROFILE_FIELDS:
             setattr(user, key, value)
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
+    # Author details are embedded in article listings as well as the profile.
+    response_cache.invalidate("articles", f"user:{old_username}", f"user:{user.username}")
     return user
 
 
-def update_user_role(db: Session, current_user: UserDB, user_id: int, new_role: str) -> UserDB:
+def update_user_role(db: Session, current_user: Principal, user_id: int, new_role: str) -> UserDB:
     """Change another user's role, guarding self-change and super-admin demotion."""
     if current_user.id == user_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You cannot change your own role")
@@ -80,6 +93,7 @@ def update_user_role(db: Session, current_user: UserDB, user_id: int, new_role:
     user.role = UserRole[new_role]
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
     return user
 
 
@@ -95,6 +109,7 @@ def promote_user(db: Session, user_id: int, new_role: UserRole) -> UserDB:
     user.role = new_role
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.id)
     return user
 
 
@@ -103,20 +118,65 @@ def delete_user_from_db(db: Session, user_id: int) -> None:
     user = get_user_by_id(db, user_id)
     user.is_active = False
 
+    release_author_tags(db, user_id)
+    retract_author(db, user_id)
     db.query(ArticleDB).filter(ArticleDB.author_id == user_id).update(
         {ArticleDB.status: ArticleStatus.DELETED}, synchronize_session=False
     )
-    db.query(CommentDB).filter(CommentDB.user_id == user_id).update(
-        {CommentDB.is_deleted: True}, synchronize_session=False
-    )
+    hidden = db.execute(
+        update(CommentDB)
+        .where(CommentDB.user_id == user_id, CommentDB.is_deleted == False)
+        .values(is_deleted=True)
+        .returning(CommentDB.article_id, CommentDB.parent_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    apply_comment_deltas(db, {a: -n for a, n in Counter(row.article_id for row in hidden).items()})
+    apply_reply_deltas(db, {
+        p: -n for p, n in Counter(row.parent_id for row in hidden if row.parent_id).items()
+    })
     db.query(RefreshTokenDB).filter(RefreshTokenDB.user_id == user_id).update(
         {RefreshTokenDB.is_active: False, RefreshTokenDB.revoked: True},
         synchronize_session=False,
     )
     db.commit()
+    principal_cache.invalidate(user_id)
+    response_cache.invalidate("articles", "engagement", f"user:{user.username}")
     logger.info(f"User {user.username} and associated content soft deleted.")
 
 
+def get_viewer_state(
+    db: Session, user_id: int, article_ids: Iterable[int], author_ids: Iterable[int]
+) -> ViewerState:
+    """Liked/bookmarked flags per article and following flags per author.
+
+    One ``IN`` query per relation, whatever the number of ids.
+    """
+    article_ids = sorted(set(article_ids))
+    author_ids = sorted(set(author_ids))
+    liked, bookmarked, followed = set(), set(), set()
+    if article_ids:
+        liked = set(db.scalars(
+            select(LikeDB.article_id).where(LikeDB.user_id == user_id, LikeDB.article_id.in_(article_ids))
+        ))
+        bookmarked = set(db.scalars(
+            select(BookmarkDB.article_id).where(
+                BookmarkDB.user_id == user_id, BookmarkDB.article_id.in_(article_ids)
+            )
+        ))
+    if author_ids:
+        followed = set(db.scalars(
+            select(FollowDB.followed_id).where(
+                FollowDB.follower_id == user_id, FollowDB.followed_id.in_(author_ids)
+            )
+        ))
+    return ViewerState(
+        articles={
+            i: ArticleViewerState(liked=i in liked, bookmarked=i in bookmarked) for i in article_ids
+        },
+        authors={i: AuthorViewerState(following=i in followed) for i in author_ids},
+    )
+
+
 def get_all_users(db: Session) -> List[UserDB]:
     """All users, id-ordered (admin listing)."""
     return db.query(UserDB).order_by(UserDB.id).all()
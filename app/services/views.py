@@ -0,0 +1,123 @@
+"""View aggregation: write-behind buffering of article views and reading history.
+
+Reads only record a view in memory; a background job flushes the accumulated
+per-article deltas and per-(reader, article) history touches in two batched
+statements. A hot article therefore costs one row update per flush instead of
+one row-locked write per page view.
+"""
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import DateTime, Integer, column, select, update, values
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.jobs import PeriodicJob
+from app.db.session import SessionLocal
+from app.models.article import ArticleDB
+from app.models.view_history import ViewHistoryDB
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounter:
+    """Thread-safe in-memory view buffer, flushed by its own periodic job."""
+
+    def __init__(self, flush_interval_seconds: float, max_pending: int) -> None:
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._deltas: Dict[int, int] = {}
+        self._history: Dict[Tuple[int, int], datetime] = {}
+        self.job = PeriodicJob(
+            "view-counter", self.flush, flush_interval_seconds, run_on_stop=True
+        )
+
+    def record(self, article_id: int, viewer_id: Optional[int] = None) -> None:
+        """Buffer one view, plus a history touch when the reader is signed in."""
+        with self._lock:
+            self._deltas[article_id] = self._deltas.get(article_id, 0) + 1
+            if viewer_id is not None:
+                self._history[(viewer_id, article_id)] = datetime.utcnow()
+            full = len(self._deltas) + len(self._history) >= self.max_pending
+        if full:
+            self.job.wake()
+
+    def pending(self, article_id: int) -> int:
+        """Views recorded for the article but not yet flushed."""
+        with self._lock:
+            return self._deltas.get(article_id, 0)
+
+    def stats(self) -> dict:
+        """Buffered view counts and history touches awaiting the next flush."""
+        with self._lock:
+            return {"pending_articles": len(self._deltas), "pending_history": len(self._history)}
+
+    def flush(self) -> int:
+        """Write buffered views in one UPDATE ... FROM (VALUES ...) and one upsert.
+
+        Returns the number of views written. On failure the batch is merged
+        back into the buffer so the next flush retries it.
+        """
+        with self._lock:
+            deltas, self._deltas = self._deltas, {}
+            history, self._history = self._history, {}
+        if not deltas and not history:
+            return 0
+
+        db = SessionLocal()
+        try:
+            if deltas:
+                batch = values(
+                    column("id", Integer), column("delta", Integer), name="view_deltas"
+                ).data(list(deltas.items()))
+                db.execute(
+                    update(ArticleDB)
+                    .where(ArticleDB.id == batch.c.id)
+                    .values(
+                        views_count=ArticleDB.views_count + batch.c.delta,
+                        recent_views=ArticleDB.recent_views + batch.c.delta,
+                        # Views are not edits: keep updated_date's onupdate off.
+                        updated_date=ArticleDB.updated_date,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            if history:
+                touches = values(
+                    column("user_id", Integer),
+                    column("article_id", Integer),
+                    column("viewed_at", DateTime),
+                    name="view_touches",
+                ).data([(user_id, article_id, at) for (user_id, article_id), at in history.items()])
+                # Joining articles drops touches for stories deleted since the view,
+                # which would otherwise fail the whole batch on the foreign key.
+                rows = select(touches.c.user_id, touches.c.article_id, touches.c.viewed_at).join(
+                    ArticleDB, ArticleDB.id == touches.c.article_id
+                )
+                stmt = insert(ViewHistoryDB).from_select(["user_id", "article_id", "viewed_at"], rows)
+                db.execute(stmt.on_conflict_do_update(
+                    constraint="unique_view_history",
+                    set_={"viewed_at": stmt.excluded.viewed_at},
+                ))
+            db.commit()
+        except Exception:
+            db.rollback()
+            self._requeue(deltas, history)
+            raise
+        finally:
+            db.close()
+        return sum(deltas.values())
+
+    def _requeue(self, deltas: Dict[int, int], history: Dict[Tuple[int, int], datetime]) -> None:
+        with self._lock:
+            for article_id, delta in deltas.items():
+                self._deltas[article_id] = self._deltas.get(article_id, 0) + delta
+            for key, at in history.items():
+                self._history[key] = max(at, self._history.get(key, at))
+
+
+view_counter = ViewCounter(
+    flush_interval_seconds=settings.VIEW_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.VIEW_FLUSH_MAX_PENDING,
+)
@@ -1,4 +1,5 @@
-"""Text utilities: slug generation and reading-time estimation."""
+"""Text utilities: slug generation, excerpts, and reading-time estimation."""
+import html
 import math
 import re
 import secrets
@@ -8,6 +9,7 @@ from sqlalchemy.orm import Session
 _TAG_RE = re.compile(r"<[^>]+>")
 _NON_WORD_RE = re.compile(r"[^a-z0-9]+")
 WORDS_PER_MINUTE = 200
+EXCERPT_LENGTH = 280
 
 
 def slugify(title: str, max_length: int = 80) -> str:
@@ -39,6 +41,14 @@ def strip_html(html: str) -> str:
     return _TAG_RE.sub(" ", html or "")
 
 
+def make_excerpt(html_content: str, length: int = EXCERPT_LENGTH) -> str:
+    """Plain-text preview of a story body, cut at a word boundary."""
+    text = " ".join(html.unescape(strip_html(html_content)).split())
+    if len(text) <= length:
+        return text
+    return text[:length].rsplit(" ", 1)[0].rstrip(" ,.;:") + "…"
+
+
 def word_count(html_content: str) -> int:
     """Count the visible words of an HTML fragment."""
     return len(strip_html(html_content).split())
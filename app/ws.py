@@ -1,57 +1,398 @@
-"""In-process WebSocket connection registry for real-time notifications."""
+"""WebSocket hub: every live socket per user, fanned out across workers.
+
+A user may hold several sockets (one per tab or device), and those sockets may
+live in any uvicorn worker. Sends therefore go through a backplane: the hub
+publishes each message, every worker's hub receives every published message,
+and each writes it to the matching sockets it holds.
+
+Backplanes are pluggable: in-process (the default; right for a single worker)
+or Postgres ``LISTEN``/``NOTIFY`` on the application database, which needs no
+extra infrastructure to span workers and hosts.
+"""
+import asyncio
+import json
 import logging
-from typing import Dict
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
-from fastapi import WebSocket
+from fastapi import WebSocket, status
+from sqlalchemy import String, column, func, select, values
+
+from app.core.config import settings
+from app.db.session import engine
 
 logger = logging.getLogger(__name__)
 
+# (user id, or None for every connected user; text to send)
+Envelope = Tuple[Optional[int], str]
+
+
+class Backplane(ABC):
+    """Transport interface: publish envelopes to every worker's hub."""
+
+    @abstractmethod
+    def start(self, receive: Callable[[Optional[int], str], None]) -> None:
+        """Begin handing received envelopes to ``receive`` (called on the event loop)."""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, envelopes: List[Envelope]) -> None:
+        ...
 
-class WebSocketManager:
-    """Tracks one live socket per user and delivers messages to it."""
+
+class MemoryBackplane(Backplane):
+    """Loop published envelopes straight back to this process's hub."""
 
     def __init__(self) -> None:
-        self.active_connections: Dict[int, WebSocket] = {}
+        self._receive: Optional[Callable[[Optional[int], str], None]] = None
 
-    async def connect(self, websocket: WebSocket, user_id: int) -> None:
-        """Accept the socket and register it as the user's current connection."""
-        await websocket.accept()
-        self.active_connections[user_id] = websocket
+    def start(self, receive: Callable[[Optional[int], str], None]) -> None:
+        self._receive = receive
+
+    async def stop(self) -> None:
+        self._receive = None
+
+    async def publish(self, envelopes: List[Envelope]) -> None:
+        if self._receive is not None:
+            for user_id, message in envelopes:
+                self._receive(user_id, message)
+
+
+class PostgresBackplane(Backplane):
+    """``LISTEN``/``NOTIFY`` on one channel: every worker listens, any worker publishes.
+
+    The listening connection is opened outside the engine's pool and watched
+    with ``add_reader``, so waiting for notifications costs no thread. If it
+    drops, it is reopened after a short delay; envelopes published meanwhile
+    are missed (notifications stay in the database for clients to fetch).
+    """
+
+    RECONNECT_DELAY_SECONDS = 1.0
+    # NOTIFY rejects payloads of 8000 bytes or more.
+    MAX_PAYLOAD_BYTES = 7999
 
-    async def disconnect(self, user_id: int, websocket: WebSocket = None) -> None:
-        """Unregister the user's socket.
+    def __init__(self, engine, channel: str) -> None:
+        self.engine = engine
+        self.channel = channel
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._receive: Optional[Callable[[Optional[int], str], None]] = None
+        self._conn = None
+        self._fd: Optional[int] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
 
-        Only removes the registry entry when it still points at ``websocket`` (when
-        given), so a stale tab disconnecting cannot evict a newer live connection
-        that replaced it.
-        """
-        current = self.active_connections.get(user_id)
-        if current is None:
+    def start(self, receive: Callable[[Optional[int], str], None]) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._receive = receive
+        self._attach(self._connect())
+
+    async def stop(self) -> None:
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        self._detach()
+        self._receive = None
+
+    async def publish(self, envelopes: List[Envelope]) -> None:
+        payloads = []
+        for user_id, message in envelopes:
+            payload = json.dumps({"user_id": user_id, "message": message})
+            if len(payload.encode()) > self.MAX_PAYLOAD_BYTES:
+                # Too large for NOTIFY: reach this worker's sockets at least.
+                logger.warning(f"WebSocket message for user {user_id} too large for the backplane")
+                if self._receive is not None:
+                    self._receive(user_id, message)
+            else:
+                payloads.append(payload)
+        if payloads:
+            await asyncio.to_thread(self._notify, payloads)
+
+    def _notify(self, payloads: List[str]) -> None:
+        """One ``pg_notify`` per payload, in a single statement and transaction."""
+        batch = values(column("payload", String), name="payloads").data([(p,) for p in payloads])
+        with self.engine.begin() as conn:
+            conn.execute(select(func.pg_notify(self.channel, batch.c.payload)))
+
+    def _connect(self):
+        """Open a dedicated, autocommit connection listening on the channel (blocking)."""
+        dialect = self.engine.dialect
+        cargs, cparams = dialect.create_connect_args(self.engine.url)
+        conn = dialect.connect(*cargs, **cparams)
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f'LISTEN "{self.channel}"')
+        return conn
+
+    def _attach(self, conn) -> None:
+        self._conn = conn
+        self._fd = conn.fileno()
+        self._loop.add_reader(self._fd, self._on_readable)
+
+    def _detach(self) -> None:
+        if self._conn is None:
+            return
+        # By fd remembered at attach: a broken connection can no longer report it.
+        self._loop.remove_reader(self._fd)
+        try:
+            self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+        self._fd = None
+
+    def _on_readable(self) -> None:
+        try:
+            self._conn.poll()
+        except Exception:
+            logger.warning("WebSocket backplane connection lost; reconnecting", exc_info=True)
+            self._detach()
+            self._reconnect_task = self._loop.create_task(self._reconnect())
             return
-        if websocket is not None and current is not websocket:
+        while self._conn.notifies:
+            note = self._conn.notifies.pop(0)
+            try:
+                envelope = json.loads(note.payload)
+                self._receive(envelope["user_id"], envelope["message"])
+            except (ValueError, KeyError, TypeError):
+                logger.warning(f"Ignoring malformed backplane payload: {note.payload[:100]}")
+
+    async def _reconnect(self) -> None:
+        while True:
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+            try:
+                conn = await asyncio.to_thread(self._connect)
+            except Exception:
+                logger.warning("WebSocket backplane reconnect failed", exc_info=True)
+                continue
+            self._attach(conn)
+            self._reconnect_task = None
             return
-        self.active_connections.pop(user_id, None)
+
+
+class Connection:
+    """One socket, its bounded outbound queue, and the writer task draining it.
+
+    Senders never await the socket: they ``offer`` a message, which fails when
+    the queue is full so the hub can evict the slow consumer instead of
+    buffering without bound or stalling everyone else's delivery.
+    """
+
+    def __init__(
+        self, websocket: WebSocket, user_id: int, queue_size: int, heartbeat: bool = False
+    ) -> None:
+        self.websocket = websocket
+        self.user_id = user_id
+        # Opted in to application pings (and to being reaped when silent).
+        self.heartbeat = heartbeat
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.last_seen = time.monotonic()
+        self.writer: Optional[asyncio.Task] = None
+        self.closing = False
+
+    def offer(self, message: str) -> bool:
+        """Queue text for the writer; False when the queue is full."""
         try:
-            await current.close()
-        except Exception as e:
-            logger.debug(f"Error closing WebSocket for user {user_id}: {e}")
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            return False
+        return True
 
-    async def send_message(self, user_id: int, message: str) -> None:
-        """Send text to the user's socket; drop the connection on failure."""
-        if user_id in self.active_connections:
+    def touch(self) -> None:
+        """Record that the client was heard from (any frame, including pongs)."""
+        self.last_seen = time.monotonic()
+
+
+class WebSocketHub:
+    """Tracks every live socket per user and delivers backplane messages to them.
+
+    Each connection has its own writer task, so a fan-out only queues the
+    message per socket and one slow client cannot hold up the rest. A
+    connection whose queue overflows is closed. Sockets that opt in to the
+    heartbeat get a ``ping`` every ``ping_interval`` and are reaped once not
+    heard from in ``idle_timeout``; the rest are only dropped when a send to
+    them fails (the server's protocol-level pings catch dead peers there).
+    Started and stopped from the ``lifespan`` hook alongside the periodic jobs.
+    """
+
+    PING = "ping"
+
+    def __init__(
+        self,
+        backplane: Backplane,
+        queue_size: int,
+        ping_interval_seconds: float,
+        idle_timeout_seconds: float,
+    ) -> None:
+        self.backplane = backplane
+        self.queue_size = queue_size
+        self.ping_interval_seconds = ping_interval_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+        self.connections: Dict[int, Dict[WebSocket, Connection]] = {}
+        self._inbox: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._closing: Set[asyncio.Task] = set()
+        self.published = 0
+        self.delivered = 0
+        self.evicted_slow = 0
+        self.reaped_idle = 0
+
+    def start(self) -> None:
+        """Start receiving from the backplane and the heartbeat on the running loop."""
+        loop = asyncio.get_running_loop()
+        self._inbox = asyncio.Queue()
+        self._tasks = [
+            loop.create_task(self._pump(), name="ws-hub"),
+            loop.create_task(self._heartbeat(), name="ws-heartbeat"),
+        ]
+        self.backplane.start(self._receive)
+
+    async def stop(self) -> None:
+        await self.backplane.stop()
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        self._inbox = None
+
+    async def connect(self, websocket: WebSocket, user_id: int, heartbeat: bool = False) -> Connection:
+        """Accept the socket, add it to the user's connections, start its writer."""
+        await websocket.accept()
+        conn = Connection(websocket, user_id, self.queue_size, heartbeat)
+        conn.writer = asyncio.get_running_loop().create_task(
+            self._write(conn), name=f"ws-writer:{user_id}"
+        )
+        self.connections.setdefault(user_id, {})[websocket] = conn
+        return conn
+
+    async def disconnect(self, user_id: int, websocket: WebSocket = None, code: int = 1000) -> None:
+        """Unregister and close one of the user's sockets (all of them when not given)."""
+        sockets = self.connections.get(user_id)
+        if not sockets:
+            return
+        closing = [websocket] if websocket is not None else list(sockets)
+        for ws in closing:
+            conn = sockets.pop(ws, None)
+            if conn is None:
+                continue
+            if conn.writer is not None and conn.writer is not asyncio.current_task():
+                conn.writer.cancel()
             try:
-                await self.active_connections[user_id].send_text(message)
+                await ws.close(code=code)
             except Exception as e:
-                logger.warning(f"Error sending to user {user_id}: {e}")
-                await self.disconnect(user_id)
+                logger.debug(f"Error closing WebSocket for user {user_id}: {e}")
+        if not sockets:
+            self.connections.pop(user_id, None)
+
+    def push(self, conn: Connection, message: str) -> None:
+        """Queue text for one local connection, evicting it if it cannot keep up."""
+        if conn.closing or conn.offer(message):
+            return
+        self.evicted_slow += 1
+        logger.warning(f"Evicting slow WebSocket consumer for user {conn.user_id}")
+        self._close_soon(conn, status.WS_1013_TRY_AGAIN_LATER)
+
+    async def send_message(self, user_id: int, message: str) -> None:
+        """Send text to every socket the user holds, in any worker."""
+        await self.send_messages([(user_id, message)])
+
+    async def send_messages(self, envelopes: List[Envelope]) -> None:
+        """Publish many ``(user_id, text)`` sends in one backplane round trip."""
+        if not envelopes:
+            return
+        if self._inbox is None:
+            # Not started (no lifespan, e.g. a bare script): local sockets only.
+            for user_id, message in envelopes:
+                self._deliver(user_id, message)
+            return
+        await self.backplane.publish(envelopes)
+        self.published += len(envelopes)
 
     async def broadcast(self, message: str) -> None:
-        """Send text to every connected user, skipping failed sockets."""
-        for user_id, websocket in list(self.active_connections.items()):
+        """Send text to every connected user, in every worker."""
+        await self.send_messages([(None, message)])
+
+    def stats(self) -> dict:
+        conns = [c for sockets in self.connections.values() for c in sockets.values()]
+        return {
+            "backplane": type(self.backplane).__name__,
+            "users": len(self.connections),
+            "connections": len(conns),
+            "queued": sum(c.queue.qsize() for c in conns),
+            "published": self.published,
+            "delivered": self.delivered,
+            "evicted_slow": self.evicted_slow,
+            "reaped_idle": self.reaped_idle,
+        }
+
+    def _receive(self, user_id: Optional[int], message: str) -> None:
+        if self._inbox is not None:
+            self._inbox.put_nowait((user_id, message))
+
+    async def _pump(self) -> None:
+        while True:
+            user_id, message = await self._inbox.get()
+            self._deliver(user_id, message)
+
+    def _deliver(self, user_id: Optional[int], message: str) -> None:
+        """Queue the message on each matching local connection."""
+        if user_id is None:
+            targets = [c for sockets in self.connections.values() for c in sockets.values()]
+        else:
+            targets = list(self.connections.get(user_id, {}).values())
+        for conn in targets:
+            self.push(conn, message)
+
+    async def _write(self, conn: Connection) -> None:
+        while True:
+            message = await conn.queue.get()
             try:
-                await websocket.send_text(message)
+                await conn.websocket.send_text(message)
             except Exception as e:
-                logger.warning(f"Error broadcasting to user {user_id}: {e}")
+                logger.warning(f"Error sending to user {conn.user_id}: {e}")
+                await self.disconnect(conn.user_id, conn.websocket)
+                return
+            self.delivered += 1
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(self.ping_interval_seconds)
+            idle_before = time.monotonic() - self.idle_timeout_seconds
+            for sockets in list(self.connections.values()):
+                for conn in list(sockets.values()):
+                    if conn.closing or not conn.heartbeat:
+                        continue
+                    if conn.last_seen < idle_before:
+                        self.reaped_idle += 1
+                        self._close_soon(conn, status.WS_1001_GOING_AWAY)
+                    else:
+                        self.push(conn, self.PING)
+
+    def _close_soon(self, conn: Connection, code: int) -> None:
+        """Disconnect from synchronous code, keeping the task referenced until done."""
+        conn.closing = True
+        task = asyncio.get_running_loop().create_task(
+            self.disconnect(conn.user_id, conn.websocket, code=code)
+        )
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+
+def build_backplane() -> Backplane:
+    if settings.WS_BACKPLANE == "postgres":
+        return PostgresBackplane(engine, settings.WS_BACKPLANE_CHANNEL)
+    return MemoryBackplane()
 
 
-websocket_manager = WebSocketManager()
+websocket_hub = WebSocketHub(
+    build_backplane(),
+    queue_size=settings.WS_SEND_QUEUE_SIZE,
+    ping_interval_seconds=settings.WS_PING_INTERVAL_SECONDS,
+    idle_timeout_seconds=settings.WS_IDLE_TIMEOUT_SECONDS,
+)
@@ -8,14 +8,14 @@ import { useAuth } from "@/contexts/AuthContext";
 type Draft = {
   id: number;
   title: string;
-  content: string;
+  excerpt?: string | null;
   category?: string | null;
   tags: string[];
   updated_date?: string | null;
 };
 
-function excerpt(content: string, max = 80): string {
-  const plain = content.replace(/<[^>]+>/g, "");
+function excerpt(text: string | null | undefined, max = 80): string {
+  const plain = text ?? "";
   return plain.length > max ? plain.slice(0, max) + "…" : plain;
 }
 
@@ -143,7 +143,7 @@ export default function DraftsPage() {
                     {draft.title}
                   </h2>
                   <p className="text-muted text-sm mt-1 line-clamp-2 leading-relaxed">
-                    {excerpt(draft.content, 140)}
+                    {excerpt(draft.excerpt, 140)}
                   </p>
                   <div className="flex items-center gap-3 mt-2 text-xs text-muted">
                     {draft.category && (
@@ -5,7 +5,8 @@ export type Post = {
   id: number;
   title: string;
   subtitle?: string | null;
-  content: string;
+  // Plain-text preview from the server; list endpoints omit the body.
+  excerpt?: string | null;
   tags: string[];
   category?: string | null;
   cover_image_url?: string | null;
@@ -18,7 +19,7 @@ export type Post = {
 
 export function excerpt(post: Post, maxLen = 150): string {
   if (post.subtitle) return post.subtitle;
-  const plain = post.content.replace(/<[^>]+>/g, "").trim();
+  const plain = (post.excerpt ?? "").trim();
   return plain.length > maxLen ? plain.slice(0, maxLen) + "…" : plain;
 }
 
@@ -20,6 +20,10 @@ type NotificationContextValue = {
   refresh: () => Promise<void>;
 };
 
+// Frames on the notification socket: a stored notification, or the server's
+// unread count after any change to it.
+type UnreadCountMessage = { type: "unread_count"; unread_count: number };
+
 const NotificationContext = createContext<NotificationContextValue | null>(null);
 
 function defaultWsBaseUrl(): string {
@@ -35,6 +39,8 @@ function defaultWsBaseUrl(): string {
 export function NotificationProvider({ children }: { children: ReactNode }) {
   const { user } = useAuth();
   const [notifications, setNotifications] = useState<Notification[]>([]);
+  // Authoritative count pushed by the server; null until the first push.
+  const [serverUnread, setServerUnread] = useState<number | null>(null);
   const wsRef = useRef<WebSocket | null>(null);
   const reconnectRef = useRef<ReturnType<typeof setTimeout> | null>(null);
 
@@ -49,6 +55,7 @@ export function NotificationProvider({ children }: { children: ReactNode }) {
   useEffect(() => {
     if (!user) {
       setNotifications([]);
+      setServerUnread(null);
       return;
     }
     fetchNotifications();
@@ -80,7 +87,10 @@ export function NotificationProvider({ children }: { children: ReactNode }) {
       }
       if (cancelled) return;
 
-      const ws = new WebSocket(`${defaultWsBaseUrl()}/notification/ws/${user.id}?token=${token}`);
+      // heartbeat=1: the server pings and drops the socket if we stop answering.
+      const ws = new WebSocket(
+        `${defaultWsBaseUrl()}/notification/ws/${user.id}?token=${token}&heartbeat=1`
+      );
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -88,14 +98,25 @@ export function NotificationProvider({ children }: { children: ReactNode }) {
       };
 
       ws.onmessage = (e) => {
+        if (e.data === "ping") {
+          ws.send("pong");
+          return;
+        }
+        let data: Notification | UnreadCountMessage;
         try {
-          const notif: Notification = JSON.parse(e.data as string);
-          setNotifications((prev) =>
-            prev.some((n) => n.id === notif.id) ? prev : [notif, ...prev]
-          );
+          data = JSON.parse(e.data as string);
         } catch {
-          // ignore malformed messages
+          return; // ignore other plain-text frames and malformed messages
+        }
+        if (data.type === "unread_count") {
+          setServerUnread((data as UnreadCountMessage).unread_count);
+          return;
         }
+        const notif = data as Notification;
+        if (typeof notif.id !== "number") return;
+        // A grouped notification ("alice and 3 others ...") arrives again under
+        // the same id each time it grows: replace it and move it to the top.
+        setNotifications((prev) => [notif, ...prev.filter((n) => n.id !== notif.id)]);
       };
 
       ws.onerror = () => {
@@ -122,6 +143,8 @@ export function NotificationProvider({ children }: { children: ReactNode }) {
   const markRead = async (id: number) => {
     const res = await fetch(`/api/notification/read/${id}`, { method: "POST" });
     if (res.ok) {
+      const { unread_count } = (await res.json()) as { unread_count?: number };
+      if (typeof unread_count === "number") setServerUnread(unread_count);
       setNotifications((prev) =>
         prev.map((n) => (n.id === id ? { ...n, is_read: true } : n))
       );
@@ -131,6 +154,7 @@ export function NotificationProvider({ children }: { children: ReactNode }) {
   const markAllRead = async () => {
     const res = await fetch("/api/notification/read-all", { method: "POST" });
     if (res.ok) {
+      setServerUnread(0);
       setNotifications((prev) => prev.map((n) => ({ ...n, is_read: true })));
     }
   };
@@ -139,7 +163,7 @@ export function NotificationProvider({ children }: { children: ReactNode }) {
     <NotificationContext.Provider
       value={{
         notifications,
-        unreadCount: notifications.filter((n) => !n.is_read).length,
+        unreadCount: serverUnread ?? notifications.filter((n) => !n.is_read).length,
         markRead,
         markAllRead,
         refresh: fetchNotifications,